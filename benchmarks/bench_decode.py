@@ -0,0 +1,96 @@
+"""
+Benchmark: in-memory FFmpeg decode vs. the old pydub temp-WAV round-trip.
+
+Each variant runs in a fresh interpreter so peak RSS is measured in isolation.
+
+Usage:
+    python benchmarks/bench_decode.py <audio file> [--repeat N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def decode_temp_wav(file_path):
+    """Previous implementation: export a WAV next to the source and read it back."""
+    import numpy as np
+    import soundfile as sf
+    from pydub import AudioSegment
+    
+    sound = AudioSegment.from_file(file_path)
+    temp_wav = os.path.join(os.path.dirname(file_path), "_temp_whisper.wav")
+    sound.export(temp_wav, format="wav")
+    data, sample_rate = sf.read(temp_wav)
+    os.remove(temp_wav)
+    if len(data.shape) > 1:
+        data = data.mean(axis=1)
+    return np.asarray(data, dtype=np.float32)
+
+
+def decode_in_memory(file_path):
+    """Current implementation: FFmpeg raw PCM piped into a NumPy buffer."""
+    from models.audio_processor import AudioProcessor
+    
+    data, _ = AudioProcessor().decode_to_memory(file_path)
+    return data
+
+
+VARIANTS = {
+    "temp_wav": decode_temp_wav,
+    "in_memory": decode_in_memory,
+}
+
+
+def run_variant(name, file_path):
+    """Run a single variant in this process and print a JSON result line."""
+    import resource
+    
+    sys.path.insert(0, PROJECT_ROOT)
+    start = time.perf_counter()
+    data = VARIANTS[name](file_path)
+    elapsed = time.perf_counter() - start
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    peak_bytes = peak if sys.platform == "darwin" else peak * 1024
+    print(json.dumps({
+        "variant": name,
+        "seconds": elapsed,
+        "peak_rss_mb": peak_bytes / (1024 * 1024),
+        "samples": int(len(data)),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("file", help="Audio file to decode (e.g. an MP3)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant")
+    parser.add_argument("--variant", choices=sorted(VARIANTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.variant:
+        run_variant(args.variant, os.path.abspath(args.file))
+        return
+    
+    print(f"{'variant':<12}{'best [s]':>10}{'mean [s]':>10}{'peak RSS [MB]':>16}")
+    for name in VARIANTS:
+        runs = []
+        for _ in range(args.repeat):
+            output = subprocess.run(
+                [sys.executable, __file__, args.file, "--variant", name],
+                capture_output=True, text=True, check=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        
+        times = [run["seconds"] for run in runs]
+        peak = max(run["peak_rss_mb"] for run in runs)
+        print(f"{name:<12}{min(times):>10.3f}{sum(times) / len(times):>10.3f}{peak:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
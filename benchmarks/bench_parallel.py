@@ -0,0 +1,74 @@
+"""
+Benchmark: real-time factor of parallel chunked transcription vs. worker count.
+
+The real-time factor (RTF) is processing time divided by audio duration;
+below 1.0 is faster than real time. Model loading in the workers is done
+before timing starts. Memory is reported per worker after the run: RSS
+includes shared model pages, private memory does not.
+
+Usage:
+    python benchmarks/bench_parallel.py <audio file> [--model small] [--workers 1,2,4] [--no-share]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.audio_processor import AudioProcessor
+from models.parallel_transcriber import ParallelTranscriber
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("file", help="Audio file to transcribe")
+    parser.add_argument("--model", default="small", help="Whisper model size")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Torch threads per worker (default: cores / workers)")
+    parser.add_argument("--chunk-s", type=float, default=120.0, help="Nominal chunk length")
+    parser.add_argument("--no-share", action="store_true",
+                        help="Load a model copy per worker instead of sharing one")
+    args = parser.parse_args()
+    
+    processor = AudioProcessor()
+    audio, sample_rate = processor.load_audio(args.file)
+    duration = processor.get_audio_duration(audio, sample_rate)
+    print(f"Audio: {duration:.1f}s, model: {args.model}, cores: {os.cpu_count()}")
+    
+    print(
+        f"{'workers':>8}{'threads':>9}{'chunks':>8}{'time [s]':>10}{'RTF':>8}{'speedup':>9}"
+        f"{'RSS/worker [MB]':>17}{'private/worker [MB]':>21}"
+    )
+    baseline = None
+    for workers in [int(value) for value in args.workers.split(",")]:
+        transcriber = ParallelTranscriber(
+            args.model, workers=workers,
+            threads_per_worker=args.threads, chunk_s=args.chunk_s,
+            share_weights=not args.no_share
+        )
+        transcriber.warm_up()
+        chunks = len(transcriber.vad.split_points(audio, sample_rate, args.chunk_s)) + 1
+        
+        start = time.perf_counter()
+        transcriber.transcribe(audio)
+        elapsed = time.perf_counter() - start
+        memory = transcriber.worker_memory()
+        transcriber.shutdown()
+        
+        rss = [entry["rss"] for entry in memory if entry["rss"] is not None]
+        private = [entry["private"] for entry in memory if entry["private"] is not None]
+        mean_rss = f"{sum(rss) / len(rss) / 1024 ** 2:>17.0f}" if rss else f"{'n/a':>17}"
+        mean_private = f"{sum(private) / len(private) / 1024 ** 2:>21.0f}" if private else f"{'n/a':>21}"
+        
+        baseline = baseline or elapsed
+        print(
+            f"{workers:>8}{transcriber.threads_per_worker:>9}{chunks:>8}"
+            f"{elapsed:>10.2f}{elapsed / duration:>8.3f}{baseline / elapsed:>9.2f}"
+            f"{mean_rss}{mean_private}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark: int8 dynamic quantization vs. fp32 on the CPU.
+
+Transcribes every audio file of a local corpus with both variants and
+reports the speedup, the memory of the model weights and the word error
+rate (WER). A file "<name>.txt" next to "<name>.<ext>" is used as its
+reference transcript; the drift column is the WER of the int8 output
+against the fp32 output and needs no references.
+
+Usage:
+    python benchmarks/bench_quantization.py <corpus dir> [--model small]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+import whisper
+
+from models.audio_processor import AudioProcessor
+from models.memory_budget import process_rss
+from models.model_registry import model_bytes
+from models.quantization import QuantizedModelStore
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".ogg", ".flac")
+
+
+def words(text):
+    """Lower-case words without punctuation."""
+    return re.findall(r"\w+", text.lower())
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the reference length."""
+    ref, hyp = words(reference), words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            ))
+        previous = current
+    return previous[-1] / max(len(ref), 1)
+
+
+def load_corpus(corpus_dir):
+    """Decode every audio file of the corpus and read its reference, if any."""
+    processor = AudioProcessor()
+    corpus = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.lower().endswith(AUDIO_EXTENSIONS):
+            continue
+        path = os.path.join(corpus_dir, name)
+        audio, sample_rate = processor.load_audio(path)
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, "r", encoding="utf-8") as f:
+                reference = f.read()
+        corpus.append((name, audio, processor.get_audio_duration(audio, sample_rate), reference))
+    return corpus
+
+
+def run_variant(load, corpus):
+    """Load a model variant and transcribe the corpus with it."""
+    rss_before = process_rss()
+    start = time.perf_counter()
+    model = load()
+    load_s = time.perf_counter() - start
+    rss_after = process_rss()
+    
+    texts = {}
+    decode_s = 0.0
+    for name, audio, _, _ in corpus:
+        start = time.perf_counter()
+        texts[name] = model.transcribe(audio, fp16=False, temperature=0.0)["text"]
+        decode_s += time.perf_counter() - start
+    
+    weights = model_bytes(model)
+    rss = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    del model
+    return {"load_s": load_s, "decode_s": decode_s, "weights": weights, "rss": rss, "texts": texts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", help="Directory of audio files with optional .txt references")
+    parser.add_argument("--model", default="small", help="Whisper model size")
+    parser.add_argument("--threads", type=int, default=None, help="Torch intra-op threads")
+    parser.add_argument("--store-dir", default=None,
+                        help="Quantized model cache (default: a temporary directory)")
+    args = parser.parse_args()
+    
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"No audio files in {args.corpus}")
+    audio_s = sum(duration for _, _, duration, _ in corpus)
+    print(f"Corpus: {len(corpus)} files, {audio_s:.1f}s, model: {args.model}, "
+          f"threads: {torch.get_num_threads()}")
+    
+    store = QuantizedModelStore(args.store_dir or tempfile.mkdtemp(prefix="whisper-int8-"))
+    # Create the checkpoint first so the timed int8 load reads it from disk
+    store.load(args.model)
+    
+    results = {
+        "fp32": run_variant(lambda: whisper.load_model(args.model, device="cpu"), corpus),
+        "int8": run_variant(lambda: store.load(args.model), corpus)
+    }
+    
+    print(f"{'variant':<8}{'load [s]':>10}{'RTF':>8}{'speedup':>9}"
+          f"{'weights [MB]':>14}{'RSS [MB]':>10}{'WER':>8}{'drift':>8}")
+    fp32 = results["fp32"]
+    for variant, result in results.items():
+        references = [(name, reference) for name, _, _, reference in corpus if reference]
+        wer = (
+            sum(word_error_rate(reference, result["texts"][name]) for name, reference in references)
+            / len(references)
+        ) if references else None
+        drift = sum(
+            word_error_rate(fp32["texts"][name], result["texts"][name]) for name, _, _, _ in corpus
+        ) / len(corpus)
+        rss = f"{result['rss'] / 1024 ** 2:>10.0f}" if result["rss"] is not None else f"{'n/a':>10}"
+        print(
+            f"{variant:<8}{result['load_s']:>10.2f}{result['decode_s'] / audio_s:>8.3f}"
+            f"{fp32['decode_s'] / result['decode_s']:>9.2f}"
+            f"{result['weights'] / 1024 ** 2:>14.0f}{rss}"
+            f"{(f'{wer:.3f}' if wer is not None else 'n/a'):>8}{drift:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
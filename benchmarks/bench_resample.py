@@ -0,0 +1,65 @@
+"""
+Benchmark: resampling throughput of AudioProcessor.resample.
+
+Reports input samples per second (per channel) for common rate pairs, for
+mono input and for stereo input that is downmixed in the same pass.
+
+Usage:
+    python benchmarks/bench_resample.py [--seconds S] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.audio_processor import AudioProcessor, WHISPER_SAMPLE_RATE
+
+RATE_PAIRS = [
+    (8000, WHISPER_SAMPLE_RATE),
+    (22050, WHISPER_SAMPLE_RATE),
+    (32000, WHISPER_SAMPLE_RATE),
+    (44100, WHISPER_SAMPLE_RATE),
+    (48000, WHISPER_SAMPLE_RATE),
+]
+
+
+def measure(processor, data, orig_sr, target_sr, repeat):
+    """Return the best wall-clock time over several runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        processor.resample(data, orig_sr, target_sr)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0, help="Length of test signal")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args()
+    
+    processor = AudioProcessor()
+    rng = np.random.default_rng(0)
+    
+    print(f"{'rate pair':<16}{'channels':>10}{'best [s]':>10}{'Msamples/s':>12}{'x realtime':>12}")
+    for orig_sr, target_sr in RATE_PAIRS:
+        frames = int(args.seconds * orig_sr)
+        for channels in (1, 2):
+            shape = (frames,) if channels == 1 else (frames, channels)
+            data = rng.standard_normal(shape).astype(np.float32) * 0.1
+            
+            best = measure(processor, data, orig_sr, target_sr, args.repeat)
+            throughput = frames / best
+            print(
+                f"{orig_sr:>6}->{target_sr:<8}{channels:>10}{best:>10.4f}"
+                f"{throughput / 1e6:>12.2f}{args.seconds / best:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""
+Benchmark suite: decode, resample, model load, real-time factor and peak memory.
+
+The test audio is generated locally and deterministically: a speech-like
+signal (voiced phrases of harmonics with syllable-rate envelopes,
+separated by pauses) at 44.1 kHz stereo, written as WAV (and FLAC when
+FFmpeg is available) for each requested length. Every model size and
+thread count runs in a fresh interpreter, so load time and peak RSS are
+measured in isolation. The real-time factor (RTF) is inference time
+divided by audio duration; the best of --repeat runs is reported.
+
+--stub replaces Whisper with a NumPy model whose work grows with model
+size and audio length, so the suite runs in CI without torch or weights.
+
+Results are written as JSON. --baseline compares them against a stored
+run and exits with code 1 if a metric got worse by more than --tolerance.
+
+Usage:
+    python benchmarks/bench_rtf.py [--models tiny,base,small] [--threads 1,4] [--lengths 10,60,300]
+                                   [--stub] [--output results.json] [--baseline baseline.json]
+    python benchmarks/bench_rtf.py --input results.json --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+SOURCE_RATE = 44100
+SEED = 1234
+
+# Metrics where lower is better, with the smallest change worth reporting
+METRICS = {
+    "decode_s": 0.005,
+    "resample_s": 0.005,
+    "load_s": 0.05,
+    "peak_rss_mb": 10.0,
+    "rtf": 0.005,
+}
+
+# Hidden size of the stub model per Whisper model size
+STUB_WIDTHS = {"tiny": 384, "base": 512, "small": 768, "medium": 1024, "large": 1280}
+
+
+def synth_speech(seconds, sample_rate=SOURCE_RATE, seed=SEED):
+    """Generate a deterministic speech-like stereo signal.
+    
+    Returns:
+        numpy.ndarray: float32 array of shape (frames, 2)
+    """
+    import numpy as np
+    
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * sample_rate)
+    signal = np.zeros(frames, dtype=np.float32)
+    
+    position = 0
+    while position < frames:
+        phrase = min(int(rng.uniform(1.0, 4.0) * sample_rate), frames - position)
+        t = np.arange(phrase, dtype=np.float32) / sample_rate
+        f0 = rng.uniform(100.0, 220.0) * (1.0 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+        phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 9))
+        syllables = 0.5 * (1.0 - np.cos(2 * np.pi * rng.uniform(3.0, 5.0) * t))
+        signal[position:position + phrase] = 0.1 * voiced * syllables
+        position += phrase + int(rng.uniform(0.3, 1.2) * sample_rate)
+    
+    signal += rng.standard_normal(frames).astype(np.float32) * 0.003
+    # Slightly different channels so downmixing does real work
+    return np.stack([signal, np.roll(signal, 7) * 0.9], axis=1).astype(np.float32)
+
+
+def write_audio(audio_dir, lengths, with_flac):
+    """Write the test files once per length and format.
+    
+    Returns:
+        list: (format, length_s, path) tuples
+    """
+    import soundfile as sf
+    
+    os.makedirs(audio_dir, exist_ok=True)
+    files = []
+    for length in lengths:
+        formats = ["wav", "flac"] if with_flac else ["wav"]
+        for audio_format in formats:
+            path = os.path.join(audio_dir, f"speech-{length:g}s-{SEED}.{audio_format}")
+            if not os.path.exists(path):
+                sf.write(path, synth_speech(length), SOURCE_RATE)
+            files.append((audio_format, length, path))
+    return files
+
+
+def best_time(func, repeat):
+    """Return the best wall-clock time of several calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_audio(files, repeat):
+    """Time decoding (at the native rate) and resampling to 16 kHz mono."""
+    from models.audio_processor import AudioProcessor
+    
+    processor = AudioProcessor()
+    results = []
+    for audio_format, length, path in files:
+        decode_s = best_time(lambda: processor.load_audio(path, target_sr=None), repeat)
+        if audio_format == "wav":
+            import soundfile as sf
+            # Stereo source so the downmix is part of the measurement
+            stereo, sample_rate = sf.read(path, dtype="float32")
+            resample_s = best_time(lambda: processor.resample(stereo, sample_rate), repeat)
+        else:
+            resample_s = None
+        results.append({
+            "format": audio_format,
+            "length_s": length,
+            "decode_s": decode_s,
+            "resample_s": resample_s,
+        })
+    return results
+
+
+class StubModel:
+    """Stand-in for a Whisper model: spectrogram plus dense layers in NumPy.
+    
+    Work per 30 second window grows with the model width, so relative
+    timings between sizes and lengths behave like the real models.
+    """
+    
+    def __init__(self, model_size, seed=SEED):
+        import numpy as np
+        
+        width = STUB_WIDTHS[model_size]
+        rng = np.random.default_rng(seed)
+        self.mel = rng.standard_normal((201, 80)).astype(np.float32) * 0.1
+        self.layers = [
+            rng.standard_normal((width if i else 80, width)).astype(np.float32) / np.sqrt(width)
+            for i in range(4)
+        ]
+    
+    def transcribe(self, audio, **kwargs):
+        import numpy as np
+        
+        segments = []
+        window = 30 * 16000
+        for start in range(0, len(audio), window):
+            chunk = audio[start:start + window]
+            frames = np.lib.stride_tricks.sliding_window_view(chunk, 400)[::160]
+            features = np.log(np.abs(np.fft.rfft(frames, axis=1)) ** 2 @ self.mel + 1e-6)
+            for layer in self.layers:
+                features = np.tanh(features @ layer)
+            segments.append({
+                "start": start / 16000,
+                "end": (start + len(chunk)) / 16000,
+                "text": f" {float(features.mean()):.3f}",
+            })
+        return {"text": "".join(segment["text"] for segment in segments), "segments": segments}
+
+
+def load_model(model_size, stub):
+    """Load a model the way the app does, or the stub.
+    
+    Returns:
+        tuple: (model, device, load seconds)
+    """
+    if stub:
+        start = time.perf_counter()
+        return StubModel(model_size), "cpu", time.perf_counter() - start
+    
+    from config.settings import AppSettings
+    from models.transcription_engine import TranscriptionEngine
+    
+    engine = TranscriptionEngine.from_settings(AppSettings(), result_cache=None)
+    device = engine.ensure_device()
+    checksum = engine.get_model_checksum(model_size)
+    # A first-time conversion into the model store is not part of load time
+    if engine.model_store is not None and not engine.model_store.contains(model_size, checksum):
+        engine.model_store.convert(model_size, checksum)
+    
+    start = time.perf_counter()
+    model = engine._load_weights(model_size, device)
+    return model, device, time.perf_counter() - start
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return (peak if sys.platform == "darwin" else peak * 1024) / (1024 * 1024)
+
+
+def run_model(model_size, threads, files, repeat, stub):
+    """Measure one model size and thread count in this process; print a JSON line."""
+    from models.audio_processor import AudioProcessor
+    
+    if not stub:
+        import torch
+        torch.set_num_threads(threads)
+    
+    processor = AudioProcessor()
+    audio = {length: processor.load_audio(path)[0] for _, length, path in files}
+    
+    model, device, load_s = load_model(model_size, stub)
+    
+    options = {} if stub else {"fp16": device == "cuda"}
+    # The first decode pays for lazy initialization (and mapped weight pages)
+    model.transcribe(audio[min(audio)][:16000 * 5], **options)
+    
+    results = []
+    for length, samples in sorted(audio.items()):
+        inference_s = best_time(lambda: model.transcribe(samples, **options), repeat)
+        results.append({"length_s": length, "inference_s": inference_s, "rtf": inference_s / length})
+    
+    print(json.dumps({
+        "model": model_size,
+        "threads": threads,
+        "device": device,
+        "load_s": load_s,
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results,
+    }))
+
+
+def derive_factors(runs):
+    """Relative speed of the model sizes, comparable to AppSettings.get_model_factors().
+    
+    Uses the longest audio at the highest thread count measured.
+    
+    Returns:
+        dict: rtf and factor (RTF relative to base, or the smallest model) per size
+    """
+    threads = max(run["threads"] for run in runs)
+    rtf = {
+        run["model"]: max(run["results"], key=lambda result: result["length_s"])["rtf"]
+        for run in runs if run["threads"] == threads
+    }
+    reference = rtf.get("base") or next(iter(rtf.values()))
+    return {
+        "threads": threads,
+        "rtf": rtf,
+        "factor": {model: value / reference for model, value in rtf.items()},
+    }
+
+
+def compare(baseline, current, tolerance):
+    """Find metrics that got worse than the baseline.
+    
+    Args:
+        baseline: Results dict of the stored run
+        current: Results dict of this run
+        tolerance: Allowed relative increase, e.g. 0.15 for 15%
+        
+    Returns:
+        list: Regression dicts (name, metric, baseline, current, change)
+    """
+    def rows(results):
+        for entry in results.get("audio", []):
+            yield f"audio {entry['format']} {entry['length_s']:g}s", entry
+        for run in results.get("runs", []):
+            name = f"{run['model']} x{run['threads']}"
+            yield name, run
+            for result in run["results"]:
+                yield f"{name} {result['length_s']:g}s", result
+    
+    previous = dict(rows(baseline))
+    regressions = []
+    for name, entry in rows(current):
+        reference = previous.get(name)
+        if reference is None:
+            continue
+        for metric, min_delta in METRICS.items():
+            old, new = reference.get(metric), entry.get(metric)
+            if old is None or new is None:
+                continue
+            if new - old > min_delta and new > old * (1 + tolerance):
+                regressions.append({
+                    "name": name,
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": new / old - 1 if old else float("inf"),
+                })
+    return regressions
+
+
+def run_suite(args):
+    """Generate audio, measure it and every model in child processes."""
+    from models.audio_processor import AudioProcessor
+    
+    lengths = [float(value) for value in args.lengths.split(",")]
+    threads = [int(value) for value in args.threads.split(",")]
+    with_flac = AudioProcessor().ffmpeg_path is not None
+    files = write_audio(args.audio_dir, lengths, with_flac)
+    
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "stub": args.stub,
+            "repeat": args.repeat,
+            "seed": SEED,
+        },
+        "audio": measure_audio(files, args.repeat),
+        "runs": [],
+    }
+    
+    for model_size in args.models.split(","):
+        for thread_count in threads:
+            env = dict(os.environ, OMP_NUM_THREADS=str(thread_count),
+                       MKL_NUM_THREADS=str(thread_count), OPENBLAS_NUM_THREADS=str(thread_count))
+            command = [
+                sys.executable, os.path.abspath(__file__), "--run-model", model_size,
+                "--threads", str(thread_count), "--lengths", args.lengths,
+                "--audio-dir", args.audio_dir, "--repeat", str(args.repeat)
+            ]
+            if args.stub:
+                command.append("--stub")
+            output = subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout
+            run = json.loads(output.strip().splitlines()[-1])
+            results["runs"].append(run)
+            if not args.stub:
+                results["meta"].setdefault("device", run["device"])
+    
+    if results["runs"]:
+        results["derived"] = derive_factors(results["runs"])
+    return results
+
+
+def print_results(results):
+    """Print the results as tables."""
+    print(f"{'audio':<10}{'length [s]':>12}{'decode [s]':>12}{'resample [s]':>14}")
+    for entry in results["audio"]:
+        resample = f"{entry['resample_s']:>14.4f}" if entry["resample_s"] is not None else f"{'-':>14}"
+        print(f"{entry['format']:<10}{entry['length_s']:>12g}{entry['decode_s']:>12.4f}{resample}")
+    
+    print()
+    print(f"{'model':<10}{'threads':>8}{'load [s]':>10}{'peak RSS [MB]':>15}{'length [s]':>12}{'RTF':>8}")
+    for run in results["runs"]:
+        peak = f"{run['peak_rss_mb']:>15.0f}" if run["peak_rss_mb"] is not None else f"{'n/a':>15}"
+        for index, result in enumerate(run["results"]):
+            prefix = (
+                f"{run['model']:<10}{run['threads']:>8}{run['load_s']:>10.2f}{peak}"
+                if index == 0 else " " * 43
+            )
+            print(f"{prefix}{result['length_s']:>12g}{result['rtf']:>8.3f}")
+    
+    derived = results.get("derived")
+    if derived:
+        print()
+        print(f"Measured model factors ({derived['threads']} threads, longest audio):")
+        for model, factor in derived["factor"].items():
+            print(f"  {model:<8} factor {factor:>6.2f}   RTF {derived['rtf'][model]:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--models", default="tiny,base,small", help="Comma-separated model sizes")
+    parser.add_argument("--threads", default=str(os.cpu_count() or 1),
+                        help="Comma-separated thread counts")
+    parser.add_argument("--lengths", default="10,60,300", help="Comma-separated audio lengths in seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("--stub", action="store_true", help="Use a NumPy stub instead of Whisper")
+    parser.add_argument("--audio-dir", default=os.path.join(tempfile.gettempdir(), "whisper-bench-audio"),
+                        help="Directory for the generated audio")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--input", help="Compare a stored results file instead of running")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed relative slowdown before a metric counts as regressed")
+    parser.add_argument("--run-model", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.run_model:
+        lengths = [float(value) for value in args.lengths.split(",")]
+        files = write_audio(args.audio_dir, lengths, False)
+        run_model(args.run_model, int(args.threads), files, args.repeat, args.stub)
+        return
+    
+    if args.input:
+        with open(args.input, "r", encoding="utf-8") as f:
+            results = json.load(f)
+    else:
+        results = run_suite(args)
+        print_results(results)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, args.tolerance)
+        print()
+        if not regressions:
+            print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+            return
+        print(f"Regressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(
+                f"  {regression['name']:<24}{regression['metric']:<14}"
+                f"{regression['baseline']:>10.4f} -> {regression['current']:>10.4f}"
+                f"  (+{regression['change']:.0%})"
+            )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
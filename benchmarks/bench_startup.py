@@ -0,0 +1,118 @@
+"""
+Benchmark: cold model load from Whisper's pickled checkpoint vs. the memory-mapped model store.
+
+Each variant runs in a fresh interpreter so load time and peak RSS are
+measured in isolation. The first decode of a few seconds of silence is
+timed as well, since a mapped model reads its pages from disk lazily.
+The page cache is not dropped between runs, so this compares warm-cache
+restarts, the common case after closing and reopening the app.
+
+Usage:
+    python benchmarks/bench_startup.py [--model small] [--store-dir DIR] [--repeat N]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_pickle(model_size, store_dir):
+    """Whisper's own loader: unpickle the checkpoint and copy it into a new model."""
+    import whisper
+    
+    return whisper.load_model(model_size, device="cpu")
+
+
+def load_mmap(model_size, store_dir):
+    """Map the converted model from the local store."""
+    from models.model_store import LocalModelStore
+    
+    return LocalModelStore(store_dir).load(model_size)
+
+
+VARIANTS = {
+    "pickle": load_pickle,
+    "mmap": load_mmap,
+}
+
+
+def run_variant(name, model_size, store_dir):
+    """Run a single variant in this process and print a JSON result line."""
+    import resource
+    
+    sys.path.insert(0, PROJECT_ROOT)
+    import numpy as np
+    import torch
+    
+    start = time.perf_counter()
+    model = VARIANTS[name](model_size, store_dir)
+    load_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    model.transcribe(np.zeros(16000 * 5, dtype=np.float32), fp16=False)
+    decode_s = time.perf_counter() - start
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    peak_bytes = peak if sys.platform == "darwin" else peak * 1024
+    print(json.dumps({
+        "variant": name,
+        "load_s": load_s,
+        "first_decode_s": decode_s,
+        "peak_rss_mb": peak_bytes / (1024 * 1024),
+        "torch": torch.__version__,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default="small", help="Whisper model size")
+    parser.add_argument("--store-dir", default=None,
+                        help="Model store directory (default: a temporary directory)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant")
+    parser.add_argument("--variant", choices=sorted(VARIANTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    store_dir = args.store_dir or tempfile.mkdtemp(prefix="whisper-store-")
+    if args.variant:
+        run_variant(args.variant, args.model, store_dir)
+        return
+    
+    # Convert once up front so the mmap runs only measure loading
+    subprocess.run(
+        [sys.executable, "-c",
+         "import sys; sys.path.insert(0, sys.argv[1]);"
+         "from models.model_store import LocalModelStore;"
+         "LocalModelStore(sys.argv[2]).convert(sys.argv[3])",
+         PROJECT_ROOT, store_dir, args.model],
+        check=True
+    )
+    
+    print(f"Model: {args.model}, store: {store_dir}")
+    print(f"{'variant':<10}{'best load [s]':>15}{'mean load [s]':>15}"
+          f"{'first decode [s]':>18}{'peak RSS [MB]':>16}")
+    for name in VARIANTS:
+        runs = []
+        for _ in range(args.repeat):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--variant", name,
+                 "--model", args.model, "--store-dir", store_dir],
+                check=True, capture_output=True, text=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        
+        loads = [run["load_s"] for run in runs]
+        print(
+            f"{name:<10}{min(loads):>15.3f}{sum(loads) / len(loads):>15.3f}"
+            f"{min(run['first_decode_s'] for run in runs):>18.3f}"
+            f"{max(run['peak_rss_mb'] for run in runs):>16.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Live transcription latency: replay audio at real-time speed through StreamingTranscriber.
+
+The audio (a file, or the generated speech-like signal of bench_rtf.py)
+is fed in 100 ms chunks at the pace it would be recorded. Reported are
+the latency of partial and final segments — from the arrival of the
+newest audio a segment covers until it was emitted, including the
+silence the endpointer waits for — and the real-time factor of the
+decodes (decode seconds per second of audio; partial decodes included).
+The stream keeps up as long as the RTF stays below 1.
+
+--stub replaces Whisper with the NumPy model of bench_rtf.py.
+
+Usage:
+    python benchmarks/bench_streaming.py [recording.wav] [--seconds 60] [--model base]
+                                         [--speed 1.0] [--stub] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_rtf import SOURCE_RATE, StubModel, synth_speech
+
+
+class StubModule:
+    """Stand-in for the encoder and decoder, accepting the engine's forward hooks."""
+    
+    class Handle:
+        def __init__(self, hooks, hook):
+            self.hooks = hooks
+            self.hook = hook
+        
+        def remove(self):
+            self.hooks.remove(self.hook)
+    
+    def __init__(self):
+        self.pre_hooks = []
+        self.hooks = []
+    
+    def register_forward_pre_hook(self, hook):
+        self.pre_hooks.append(hook)
+        return self.Handle(self.pre_hooks, hook)
+    
+    def register_forward_hook(self, hook):
+        self.hooks.append(hook)
+        return self.Handle(self.hooks, hook)
+    
+    def __call__(self):
+        for hook in list(self.pre_hooks):
+            hook(self, ())
+        for hook in list(self.hooks):
+            hook(self, (), None)
+
+
+class HookedStubModel(StubModel):
+    """StubModel with one encoder pass per call, so cancellation and tracing work."""
+    
+    def __init__(self, model_size):
+        super().__init__(model_size)
+        self.encoder = StubModule()
+        self.decoder = StubModule()
+    
+    def transcribe(self, audio, **kwargs):
+        self.encoder()
+        self.decoder()
+        return super().transcribe(audio)
+
+
+def create_engine(model_size, stub):
+    """Create an engine with a loaded model (no result cache: every decode is real)."""
+    from config.settings import AppSettings
+    from models.transcription_engine import TranscriptionEngine
+    
+    if stub:
+        engine = TranscriptionEngine()
+        engine.model = HookedStubModel(model_size)
+        engine.model_size = model_size
+        return engine
+    
+    engine = TranscriptionEngine.from_settings(AppSettings(), result_cache=None)
+    engine.load_model(model_size).result()
+    return engine
+
+
+def load_input(path, seconds):
+    """Get 16 kHz mono audio from a file or the generated signal."""
+    from models.audio_processor import AudioProcessor
+    
+    processor = AudioProcessor()
+    if path:
+        return processor.load_audio(path)[0]
+    return processor.resample(synth_speech(seconds), SOURCE_RATE)
+
+
+def run_stream(engine, audio, speed, partial_interval_s, max_utterance_s):
+    """Replay audio through a StreamingTranscriber.
+    
+    Returns:
+        dict: StreamingTranscriber.get_stats() plus wall_s and the segments
+    """
+    from cli.stream import pace
+    from models.streaming import StreamingTranscriber
+    from models.vad import SpeechEndpointer
+    
+    segments = []
+    transcriber = StreamingTranscriber(
+        engine, SpeechEndpointer(max_utterance_s=max_utterance_s),
+        partial_interval_s=partial_interval_s, on_segment=segments.append
+    )
+    start = time.perf_counter()
+    transcriber.start()
+    for samples in pace(audio, speed):
+        transcriber.feed(samples)
+    transcriber.close()
+    return dict(transcriber.get_stats(), wall_s=time.perf_counter() - start, segments=segments)
+
+
+def print_results(results):
+    """Print the latency table."""
+    def seconds(value):
+        return f"{value:>10.3f}" if value is not None else f"{'n/a':>10}"
+    
+    print(f"{results['audio_s']:.1f}s audio replayed in {results['wall_s']:.1f}s, "
+          f"{results['decodes']} decodes in {results['decode_s']:.1f}s, RTF {results['rtf']:.3f}")
+    print()
+    print(f"{'segments':<10}{'count':>8}{'p50 [s]':>10}{'p95 [s]':>10}{'max [s]':>10}")
+    for kind in ("partial", "final"):
+        print(f"{kind + 's':<10}{results[kind + 's']:>8}"
+              f"{seconds(results[kind + '_latency_p50_s'])}{seconds(results[kind + '_latency_p95_s'])}"
+              f"{seconds(results[kind + '_latency_max_s'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", nargs="?", help="Audio file to replay (default: generated speech)")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Length of the generated audio")
+    parser.add_argument("--model", default="base", help="Whisper model size")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed relative to real time")
+    parser.add_argument("--partial-interval", type=float, default=1.0,
+                        help="Seconds between partial decodes, 0 for final results only")
+    parser.add_argument("--max-utterance", type=float, default=20.0,
+                        help="Longest utterance before a forced cut")
+    parser.add_argument("--stub", action="store_true", help="Use a NumPy stub instead of Whisper")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+    
+    audio = load_input(args.input, args.seconds)
+    engine = create_engine(args.model, args.stub)
+    try:
+        stats = run_stream(engine, audio, args.speed, args.partial_interval, args.max_utterance)
+    finally:
+        engine.scheduler.shutdown(wait=False)
+    
+    results = dict(stats, meta={
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "input": args.input,
+        "model": args.model,
+        "stub": args.stub,
+        "speed": args.speed,
+        "partial_interval_s": args.partial_interval,
+    })
+    print_results(results)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
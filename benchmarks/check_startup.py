@@ -0,0 +1,58 @@
+"""
+Check: time to first window stays under a budget.
+
+Runs `main.py --startup-profile --json` several times and fails (exit
+code 1) if the best time from process start to the first drawn window
+exceeds the budget. Needs a display; use e.g. xvfb-run on a headless
+machine. Suitable as a CI step.
+
+Usage:
+    python benchmarks/check_startup.py [--budget 1.0] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that must not be imported before the first window
+HEAVY_PACKAGES = ("torch", "whisper", "scipy", "soundfile", "pydub")
+
+
+def profile_startup():
+    """Run one profiled startup and return its JSON profile."""
+    output = subprocess.run(
+        [sys.executable, os.path.join(PROJECT_ROOT, "main.py"), "--startup-profile", "--json"],
+        check=True, capture_output=True, text=True, cwd=PROJECT_ROOT
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds to first window")
+    parser.add_argument("--repeat", type=int, default=3, help="Profiled startups")
+    args = parser.parse_args()
+    
+    profiles = [profile_startup() for _ in range(args.repeat)]
+    best = min(profile["marks"]["first_window"] for profile in profiles)
+    print(f"Time to first window: best {best:.3f}s of {args.repeat}, budget {args.budget:.3f}s")
+    for phase in profiles[0]["phases"]:
+        print(f"  {phase['name']:<16}{phase['seconds'] * 1000:>8.1f} ms")
+    
+    if best > args.budget:
+        heavy = [
+            entry["package"] for entry in profiles[0].get("imports", [])
+            if entry["package"] in HEAVY_PACKAGES
+        ]
+        print(f"FAIL: over budget by {best - args.budget:.3f}s")
+        if heavy:
+            print(f"Heavy packages imported during the run: {', '.join(heavy)}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""Command line interface for the Whisper Transcription App."""
+from .batch import BatchTranscriber, run
+from .watch import WatchDaemon
+from .watch_state import WatchState
+
+__all__ = ['BatchTranscriber', 'run', 'WatchDaemon', 'WatchState']
\ No newline at end of file
@@ -0,0 +1,343 @@
+"""
+Headless batch transcription of files and directories.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import AppSettings
+from models.audio_processor import AudioProcessor
+from models.transcription_engine import TranscriptionEngine
+from models.vad import VoiceActivityDetector
+from utils.tracing import tracer
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg", ".m4a", ".flac", ".aac", ".wma", ".opus", ".webm", ".mp4")
+
+def expand_paths(patterns):
+    """Expand files, directories (recursively) and glob patterns into audio files.
+    
+    Args:
+        patterns: Paths or glob patterns
+        
+    Returns:
+        list: Absolute paths of audio files, each once, in argument order
+    """
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for match in matches:
+            if os.path.isdir(match):
+                for root, _, names in sorted(os.walk(match)):
+                    files.extend(
+                        os.path.join(root, name) for name in sorted(names)
+                        if name.lower().endswith(AUDIO_EXTENSIONS)
+                    )
+            elif os.path.isfile(match):
+                files.append(match)
+            else:
+                print(f"Skipping {match}: no such file or directory", file=sys.stderr)
+    
+    seen = set()
+    unique = []
+    for path in map(os.path.abspath, files):
+        if path not in seen:
+            seen.add(path)
+            unique.append(path)
+    return unique
+
+class BatchTranscriber:
+    """Transcribe many files, decoding upcoming files while the model runs."""
+    
+    def __init__(self, engine, audio_processor, model_size, jobs=2, vad=None,
+                 out_dir=None, output_format="txt", model_ready=None):
+        """Initialize the batch transcriber.
+        
+        Args:
+            engine: TranscriptionEngine used for inference
+            audio_processor: AudioProcessor used for decoding
+            model_size: Whisper model size
+            jobs: Number of files decoded ahead in parallel
+            vad: Optional VoiceActivityDetector to skip silence
+            out_dir: Output directory; None writes next to each input file
+            output_format: "txt" or "json"
+            model_ready: threading.Event set once the model load finished;
+                         None if the model is already loaded
+        """
+        self.engine = engine
+        self.audio_processor = audio_processor
+        self.model_size = model_size
+        self.jobs = max(1, jobs)
+        self.vad = vad
+        self.out_dir = out_dir
+        self.output_format = output_format
+        self.model_ready = model_ready
+        self._output_paths = {}
+        self._output_lock = threading.Lock()
+    
+    def _prepare(self, file_path):
+        """Look up the result cache or decode a file (runs on a decode thread).
+        
+        Returns:
+            dict: file, cache_key, cached result or audio, duration_s, decode_s
+        """
+        start = time.perf_counter()
+        cache_key = self._cache_key(file_path, self.model_size)
+        cached = self.engine.get_cached_result(cache_key)
+        if cached is not None:
+            # Cached results carry no duration; the last segment end is close
+            return {
+                "file": file_path, "cache_key": cache_key, "cached": cached,
+                "audio": None, "duration_s": cached["segments"][-1]["end"] if cached["segments"] else 0.0,
+                "decode_s": time.perf_counter() - start
+            }
+        
+        audio, sample_rate = self.audio_processor.load_audio(file_path)
+        return {
+            "file": file_path, "cache_key": cache_key, "cached": None,
+            "audio": audio, "duration_s": self.audio_processor.get_audio_duration(audio, sample_rate),
+            "decode_s": time.perf_counter() - start
+        }
+    
+    def _cache_key(self, file_path, model_size):
+        """Result cache key of a file transcribed with a model size."""
+        return self.engine.result_cache_key(
+            file_path, model_size=model_size,
+            options={"vad": self.vad is not None, "parallel_chunk_s": None}
+        )
+    
+    def run(self, files, progress=print):
+        """Transcribe files in order.
+        
+        Args:
+            files: Audio file paths
+            progress: Callable receiving one status line per file
+            
+        Returns:
+            dict: Throughput summary (see summarize)
+        """
+        stats = {
+            "files": 0, "failed": 0, "cached": 0, "audio_s": 0.0,
+            "decode_s": 0.0, "inference_s": 0.0
+        }
+        start = time.perf_counter()
+        
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="decode") as pool:
+            # Keep `jobs` decodes in flight ahead of the file being transcribed
+            pending = [pool.submit(self._prepare, path) for path in files[:self.jobs]]
+            for index, file_path in enumerate(files):
+                future = pending.pop(0)
+                if index + self.jobs < len(files):
+                    pending.append(pool.submit(self._prepare, files[index + self.jobs]))
+                
+                name = os.path.basename(file_path)
+                try:
+                    prepared = future.result()
+                    stats["decode_s"] += prepared["decode_s"]
+                    outcome = self._finish(prepared)
+                except Exception as e:
+                    stats["failed"] += 1
+                    progress(f"[{index + 1}/{len(files)}] {name}: FAILED ({e})")
+                    continue
+                
+                stats["files"] += 1
+                stats["cached"] += outcome["cached"]
+                stats["audio_s"] += prepared["duration_s"]
+                stats["inference_s"] += outcome["inference_s"]
+                progress(f"[{index + 1}/{len(files)}] {name}: {self.describe(outcome)}")
+        
+        stats["wall_s"] = time.perf_counter() - start
+        return self.summarize(stats)
+    
+    def process_file(self, file_path, out_dir=None):
+        """Decode, transcribe and write a single file.
+        
+        Args:
+            file_path: Audio file path
+            out_dir: Output directory overriding the transcriber's
+            
+        Returns:
+            dict: output, duration_s, decode_s, inference_s and cached
+        """
+        prepared = self._prepare(file_path)
+        return self._finish(prepared, out_dir)
+    
+    def _finish(self, prepared, out_dir=None):
+        """Transcribe a prepared file (unless cached) and write its transcript."""
+        if prepared["cached"] is not None:
+            result = prepared["cached"]
+            model_size = self.model_size
+            inference_s = 0.0
+        else:
+            inference_start = time.perf_counter()
+            result, model_size = self._transcribe(prepared)
+            inference_s = time.perf_counter() - inference_start
+        
+        output_path = self._write(prepared["file"], result, prepared["duration_s"], out_dir, model_size)
+        return {
+            "output": output_path,
+            "duration_s": prepared["duration_s"],
+            "decode_s": prepared["decode_s"],
+            "inference_s": inference_s,
+            "cached": prepared["cached"] is not None
+        }
+    
+    @staticmethod
+    def describe(outcome):
+        """Format the outcome of one file as a status line."""
+        rtf = outcome["inference_s"] / outcome["duration_s"] if outcome["duration_s"] else 0.0
+        return (
+            f"{outcome['duration_s']:.1f}s audio, {outcome['inference_s']:.1f}s, RTF {rtf:.3f}"
+            f"{' (cached)' if outcome['cached'] else ''} -> {outcome['output']}"
+        )
+    
+    def _transcribe(self, prepared):
+        """Run one decoded file through the engine and wait for the result.
+        
+        Returns:
+            tuple: (result dict, model size that produced it)
+        """
+        speech_regions = None
+        if self.vad is not None:
+            speech_regions = self.vad.detect(prepared["audio"])
+        
+        # The memory budget may have loaded a smaller model than requested;
+        # its result must not be cached under the requested size
+        if self.model_ready is not None:
+            self.model_ready.wait()
+        model_size = self.engine.model_size
+        cache_key = prepared["cache_key"]
+        if model_size != self.model_size:
+            cache_key = self._cache_key(prepared["file"], model_size)
+        
+        with tracer.context(file=prepared["file"], model=model_size):
+            job = self.engine.transcribe(
+                prepared["audio"], speech_regions=speech_regions, cache_key=cache_key
+            )
+            if not job:
+                raise RuntimeError("Model not loaded")
+            return job.result(), model_size
+    
+    def _write(self, file_path, result, duration_s, out_dir=None, model_size=None):
+        """Write one transcript and return its path."""
+        directory = out_dir or self.out_dir or os.path.dirname(file_path)
+        os.makedirs(directory, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        output_path = os.path.join(directory, f"{stem}.{self.output_format}")
+        
+        # Inputs with the same name from different directories; the same
+        # input written again replaces its own transcript
+        with self._output_lock:
+            counter = 2
+            while self._output_paths.get(output_path, file_path) != file_path:
+                output_path = os.path.join(directory, f"{stem}-{counter}.{self.output_format}")
+                counter += 1
+            self._output_paths[output_path] = file_path
+        
+        with open(output_path, "w", encoding="utf-8") as f:
+            if self.output_format == "json":
+                json.dump({
+                    "file": file_path,
+                    "model": model_size or self.model_size,
+                    "duration_s": duration_s,
+                    "text": result["text"],
+                    "segments": [
+                        {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+                        for segment in result["segments"]
+                    ]
+                }, f, ensure_ascii=False, indent=2)
+            else:
+                f.write(result["text"].strip() + "\n")
+        return output_path
+    
+    @staticmethod
+    def summarize(stats):
+        """Add throughput figures to the raw counters.
+        
+        Returns:
+            dict: The counters plus files_per_s, audio_s_per_s and rtf
+                  (wall-clock seconds per second of audio)
+        """
+        wall = max(stats["wall_s"], 1e-9)
+        return dict(
+            stats,
+            files_per_s=stats["files"] / wall,
+            audio_s_per_s=stats["audio_s"] / wall,
+            rtf=wall / stats["audio_s"] if stats["audio_s"] else None
+        )
+
+def format_summary(summary):
+    """Format a throughput summary for the terminal."""
+    rtf = f"{summary['rtf']:.3f}" if summary["rtf"] is not None else "n/a"
+    return (
+        f"{summary['files']} files ({summary['cached']} cached, {summary['failed']} failed), "
+        f"{summary['audio_s']:.1f}s audio in {summary['wall_s']:.1f}s\n"
+        f"Throughput: {summary['files_per_s']:.3f} files/s, "
+        f"{summary['audio_s_per_s']:.2f} audio-s/s, RTF {rtf}\n"
+        f"Decode {summary['decode_s']:.1f}s (overlapped), inference {summary['inference_s']:.1f}s"
+    )
+
+def build_parser():
+    """Create the argument parser of the transcribe command."""
+    settings_defaults = AppSettings()
+    parser = argparse.ArgumentParser(
+        prog="main.py transcribe",
+        description="Transcribe audio files without the GUI."
+    )
+    parser.add_argument("paths", nargs="+", help="Audio files, directories or glob patterns")
+    parser.add_argument("--model", default=settings_defaults.default_model_size,
+                        choices=settings_defaults.available_models, help="Whisper model size")
+    parser.add_argument("--jobs", type=int, default=2,
+                        help="Files decoded in parallel ahead of inference")
+    parser.add_argument("--out", default=None,
+                        help="Output directory (default: next to each input file)")
+    parser.add_argument("--format", default="txt", choices=["txt", "json"], help="Output format")
+    parser.add_argument("--no-vad", action="store_true", help="Transcribe silence as well")
+    parser.add_argument("--summary-json", action="store_true",
+                        help="Print the throughput summary as JSON")
+    return parser
+
+def run(argv=None):
+    """Entry point of `main.py transcribe`.
+    
+    Returns:
+        int: Exit code (0 if every file was transcribed)
+    """
+    args = build_parser().parse_args(argv)
+    files = expand_paths(args.paths)
+    if not files:
+        print("No audio files found", file=sys.stderr)
+        return 2
+    
+    settings = AppSettings()
+    engine = TranscriptionEngine.from_settings(settings)
+    audio_processor = AudioProcessor.from_settings(settings)
+    vad = None if args.no_vad or not settings.vad_enabled else VoiceActivityDetector()
+    
+    model_ready = threading.Event()
+    batch = BatchTranscriber(
+        engine, audio_processor, args.model, jobs=args.jobs, vad=vad,
+        out_dir=args.out, output_format=args.format, model_ready=model_ready
+    )
+    
+    # The model loads while the first files are decoded
+    job = engine.load_model(args.model, on_complete=lambda success, error: model_ready.set())
+    print(f"Transcribing {len(files)} files with model {args.model}", file=sys.stderr)
+    try:
+        summary = batch.run(files, progress=lambda line: print(line, file=sys.stderr))
+    except KeyboardInterrupt:
+        engine.cancel_all("Interrupted")
+        return 130
+    finally:
+        engine.scheduler.shutdown(wait=False)
+    
+    if job and job.future.done() and job.future.exception():
+        print(f"Model could not be loaded: {job.future.exception()}", file=sys.stderr)
+    if args.summary_json:
+        print(json.dumps(summary))
+    else:
+        print(format_summary(summary))
+    return 0 if summary["failed"] == 0 else 1
@@ -0,0 +1,92 @@
+"""
+Transcription server: keep one model warm and serve many clients over HTTP.
+"""
+import argparse
+import signal
+import sys
+import threading
+from config.settings import AppSettings
+from models.audio_processor import AudioProcessor
+from models.transcription_engine import TranscriptionEngine
+from models.vad import VoiceActivityDetector
+from server.http_api import create_server
+from server.service import TranscriptionService
+
+def build_parser():
+    """Create the argument parser of the serve command."""
+    settings_defaults = AppSettings()
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        description="Serve transcriptions from one warm model over a local HTTP API."
+    )
+    parser.add_argument("--model", default=settings_defaults.default_model_size,
+                        choices=settings_defaults.available_models, help="Whisper model size")
+    parser.add_argument("--host", default=settings_defaults.server_host,
+                        help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=settings_defaults.server_port,
+                        help="TCP port to listen on")
+    parser.add_argument("--socket", default=settings_defaults.server_socket,
+                        help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--jobs", type=int, default=2,
+                        help="Uploads decoded in parallel ahead of inference")
+    parser.add_argument("--no-vad", action="store_true", help="Transcribe silence as well")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    return parser
+
+def run(argv=None):
+    """Entry point of `main.py serve`.
+    
+    Returns:
+        int: Exit code
+    """
+    args = build_parser().parse_args(argv)
+    settings = AppSettings()
+    engine = TranscriptionEngine.from_settings(settings)
+    vad = None if args.no_vad or not settings.vad_enabled else VoiceActivityDetector()
+    # Uploads are decoded once, so the decoded-audio cache would only fill up
+    service = TranscriptionService(
+        engine, AudioProcessor(), args.model, settings.server_upload_dir, vad=vad,
+        max_upload_bytes=settings.server_max_upload_bytes, decode_workers=args.jobs,
+        job_timeout_s=settings.job_timeout_s
+    )
+    
+    try:
+        httpd = create_server(service, args.host, args.port, args.socket, verbose=args.verbose)
+    except OSError as e:
+        print(f"Cannot listen: {e}", file=sys.stderr)
+        return 2
+    
+    # Requests are accepted while the model loads; they queue behind the load
+    loaded = threading.Event()
+    outcome = {}
+    
+    def on_ready(success, error):
+        outcome.update(success=success, error=error)
+        loaded.set()
+    
+    stop = threading.Event()
+    service.start(on_ready)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    threading.Thread(target=httpd.serve_forever, name="http", daemon=True).start()
+    print(f"Loading the {args.model} model; listening on {httpd.url}", file=sys.stderr, flush=True)
+    
+    try:
+        while not loaded.wait(1.0):
+            if stop.is_set():
+                return 0
+        if not outcome["success"]:
+            print(f"Cannot load the model: {outcome['error']}", file=sys.stderr)
+            return 1
+        health = service.health()
+        print(f"Ready: {health['model']} model on {health['device']}", file=sys.stderr, flush=True)
+        # Timed waits so Ctrl+C and SIGTERM are handled promptly
+        while not stop.wait(1.0):
+            pass
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        service.shutdown()
+        engine.scheduler.shutdown(wait=False)
+    return 0
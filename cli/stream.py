@@ -0,0 +1,174 @@
+"""
+Live transcription of a PCM stream from stdin, a TCP socket or a replayed file.
+"""
+import argparse
+import json
+import socket
+import sys
+import time
+import numpy as np
+from config.settings import AppSettings
+from models.audio_processor import AudioProcessor, StreamResampler, WHISPER_SAMPLE_RATE
+from models.streaming import StreamingTranscriber
+from models.transcription_engine import TranscriptionEngine
+from models.vad import SpeechEndpointer
+
+# Audio handed to the transcriber at a time
+CHUNK_S = 0.1
+
+def read_pcm(stream, sample_rate):
+    """Read signed 16-bit little-endian mono PCM in CHUNK_S pieces.
+    
+    Args:
+        stream: Binary file object; read(n) blocks until n bytes or EOF
+        sample_rate: Sample rate of the PCM
+        
+    Yields:
+        numpy.ndarray: float32 audio at 16 kHz
+    """
+    resampler = StreamResampler(sample_rate)
+    chunk_bytes = max(2, int(sample_rate * CHUNK_S) * 2)
+    while True:
+        data = stream.read(chunk_bytes)
+        if not data:
+            yield resampler.flush()
+            return
+        # Only a truncated stream ends on half a sample
+        data = data[:len(data) - len(data) % 2]
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+        yield resampler.process(samples)
+
+def pace(audio, speed=1.0):
+    """Hand out 16 kHz audio in CHUNK_S pieces at the rate it would be recorded.
+    
+    Args:
+        audio: float32 audio at 16 kHz
+        speed: Playback speed, 2.0 = twice as fast as real time
+        
+    Yields:
+        numpy.ndarray: Each chunk once it has "arrived"
+    """
+    chunk = int(WHISPER_SAMPLE_RATE * CHUNK_S)
+    started = time.monotonic()
+    for position in range(0, len(audio), chunk):
+        due = started + (position + chunk) / WHISPER_SAMPLE_RATE / speed
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        yield audio[position:position + chunk]
+
+def accept_stream(address):
+    """Wait for one client on HOST:PORT and return its byte stream."""
+    host, _, port = address.rpartition(":")
+    with socket.create_server((host or "127.0.0.1", int(port))) as server:
+        print(f"Waiting for PCM on {address}", file=sys.stderr, flush=True)
+        connection, peer = server.accept()
+    print(f"Streaming from {peer[0]}:{peer[1]}", file=sys.stderr, flush=True)
+    return connection.makefile("rb")
+
+def format_stats(stats):
+    """Format the latency and real-time factor of a stream for the terminal."""
+    def seconds(value):
+        return f"{value:.2f}s" if value is not None else "n/a"
+    
+    rtf = f"{stats['rtf']:.3f}" if stats["rtf"] is not None else "n/a"
+    return (
+        f"{stats['audio_s']:.1f}s audio, {stats['decodes']} decodes in {stats['decode_s']:.1f}s, RTF {rtf}\n"
+        f"Final latency p50 {seconds(stats['final_latency_p50_s'])}, "
+        f"p95 {seconds(stats['final_latency_p95_s'])}, max {seconds(stats['final_latency_max_s'])} "
+        f"({stats['finals']} segments)\n"
+        f"Partial latency p50 {seconds(stats['partial_latency_p50_s'])}, "
+        f"p95 {seconds(stats['partial_latency_p95_s'])} ({stats['partials']} updates)"
+    )
+
+def build_parser():
+    """Create the argument parser of the stream command."""
+    settings_defaults = AppSettings()
+    parser = argparse.ArgumentParser(
+        prog="main.py stream",
+        description="Transcribe live audio: signed 16-bit mono PCM on stdin (default), "
+                    "from a TCP client, or a file replayed in real time."
+    )
+    parser.add_argument("--model", default=settings_defaults.default_model_size,
+                        choices=settings_defaults.available_models, help="Whisper model size")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--listen", metavar="HOST:PORT", help="Read PCM from one TCP client")
+    source.add_argument("--replay", metavar="FILE",
+                        help="Replay an audio file at real-time speed to measure latency")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed (with --replay)")
+    parser.add_argument("--sample-rate", type=int, default=WHISPER_SAMPLE_RATE,
+                        help="Sample rate of the PCM input")
+    parser.add_argument("--partial-interval", type=float,
+                        default=settings_defaults.stream_partial_interval_s,
+                        help="Seconds between partial results, 0 for final results only")
+    parser.add_argument("--json", action="store_true",
+                        help="Print every segment and the statistics as JSON lines")
+    return parser
+
+def run(argv=None):
+    """Entry point of `main.py stream`.
+    
+    Returns:
+        int: Exit code
+    """
+    args = build_parser().parse_args(argv)
+    if args.speed <= 0:
+        print("--speed must be positive", file=sys.stderr)
+        return 2
+    
+    settings = AppSettings()
+    engine = TranscriptionEngine.from_settings(settings)
+    audio_processor = AudioProcessor()
+    
+    print(f"Loading the {args.model} model", file=sys.stderr, flush=True)
+    try:
+        engine.load_model(args.model).result()
+    except Exception as e:
+        print(f"Cannot load the model: {e}", file=sys.stderr)
+        engine.scheduler.shutdown(wait=False)
+        return 1
+    
+    def on_segment(segment):
+        if args.json:
+            print(json.dumps(segment, ensure_ascii=False), flush=True)
+        elif segment["type"] == "error":
+            print(f"Decoding failed: {segment['error']}", file=sys.stderr, flush=True)
+        elif segment["type"] == "final":
+            print(f"[{segment['start']:7.1f}s - {segment['end']:7.1f}s] {segment['text']}", flush=True)
+        else:
+            print(f"  ... {segment['text']}", file=sys.stderr, flush=True)
+    
+    endpointer = SpeechEndpointer(max_utterance_s=settings.stream_max_utterance_s)
+    transcriber = StreamingTranscriber(
+        engine, endpointer, buffer_s=settings.stream_buffer_s,
+        partial_interval_s=args.partial_interval, on_segment=on_segment
+    )
+    
+    try:
+        if args.replay:
+            chunks = pace(audio_processor.load_audio(args.replay)[0], args.speed)
+        elif args.listen:
+            chunks = read_pcm(accept_stream(args.listen), args.sample_rate)
+        else:
+            chunks = read_pcm(sys.stdin.buffer, args.sample_rate)
+        
+        transcriber.start()
+        for samples in chunks:
+            transcriber.feed(samples)
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        # A failed decode stops feed(); it was reported as an error segment
+        if transcriber.error is None:
+            print(f"Stream failed: {e}", file=sys.stderr)
+            return 1
+    finally:
+        transcriber.close()
+        engine.scheduler.shutdown(wait=False)
+    
+    stats = transcriber.get_stats()
+    if args.json:
+        print(json.dumps(dict(stats, type="stats")))
+    else:
+        print(format_stats(stats), file=sys.stderr)
+    return 1 if stats["error"] else 0
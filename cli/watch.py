@@ -0,0 +1,445 @@
+"""
+Watch-folder daemon: transcribe audio files as they arrive in watched directories.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import signal
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import AppSettings
+from models.audio_processor import AudioProcessor
+from models.job_scheduler import JobCancelled
+from models.transcription_engine import TranscriptionEngine
+from models.vad import VoiceActivityDetector
+from .batch import AUDIO_EXTENSIONS, BatchTranscriber
+from .watch_state import WatchState
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR
+
+EVENT_HEADER = struct.Struct("iIII")
+
+def is_audio_file(path):
+    """Whether a path has one of the supported audio extensions."""
+    return path.lower().endswith(AUDIO_EXTENSIONS)
+
+def walk_audio_files(directory):
+    """Yield every audio file below a directory."""
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if is_audio_file(name):
+                yield os.path.join(root, name)
+
+class PollingWatcher:
+    """Fallback watcher: every wait asks for a full rescan."""
+    
+    name = "polling"
+    
+    def __init__(self, directories):
+        """Initialize the watcher.
+        
+        Args:
+            directories: Directories to watch recursively
+        """
+        self.directories = directories
+    
+    def wait(self, timeout, stop_event):
+        """Wait for the poll interval.
+        
+        Returns:
+            None: The caller should rescan all directories
+        """
+        stop_event.wait(timeout)
+        return None
+    
+    def close(self):
+        """Release resources (none for polling)."""
+
+class InotifyWatcher:
+    """Watch directory trees with Linux inotify through libc."""
+    
+    name = "inotify"
+    
+    def __init__(self, directories):
+        """Initialize the watcher.
+        
+        Args:
+            directories: Directories to watch recursively
+            
+        Raises:
+            OSError: If inotify is not available
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._watches = {}
+        
+        self.directories = directories
+        for directory in directories:
+            self._add_tree(directory)
+    
+    def _add_tree(self, directory):
+        """Watch a directory and all directories below it.
+        
+        Directories removed or replaced by a file while the tree is walked
+        are skipped; the next rescan picks up whatever took their place.
+        """
+        for root, _, _ in os.walk(directory):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(error, f"Cannot watch {root}: {os.strerror(error)}")
+            self._watches[wd] = root
+    
+    def wait(self, timeout, stop_event):
+        """Wait for file system events.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            stop_event: Not polled; the timeout bounds the reaction time
+            
+        Returns:
+            set: Paths of changed audio files, or None if events were lost
+                 and the caller should rescan all directories
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # A new tree may already hold files written before its watch
+                    self._add_tree(path)
+                    changed.update(walk_audio_files(path))
+            elif is_audio_file(path):
+                changed.add(path)
+        return changed
+    
+    def close(self):
+        """Close the inotify descriptor."""
+        os.close(self._fd)
+
+def create_watcher(directories, use_inotify=True):
+    """Create an inotify watcher, or a polling watcher if inotify is unavailable."""
+    if use_inotify:
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), polling instead", file=sys.stderr)
+    return PollingWatcher(directories)
+
+class WatchDaemon:
+    """Queue new audio files from watched directories into the transcription engine.
+    
+    A file is queued once its size and modification time stay unchanged
+    for settle_s seconds, so files still being copied are left alone.
+    Admission stops while max_queue files or max_inflight_bytes of audio
+    files are queued or being transcribed; waiting files stay on disk
+    and are admitted as earlier ones finish.
+    """
+    
+    def __init__(self, batch, state, directories, out_dir=None, max_queue=8,
+                 max_inflight_bytes=512 * 1024 ** 2, settle_s=5.0, poll_s=2.0,
+                 rescan_s=300.0, use_inotify=True, progress=print):
+        """Initialize the daemon.
+        
+        Args:
+            batch: BatchTranscriber that decodes, transcribes and writes files
+            state: WatchState recording finished files
+            directories: Directories to watch recursively
+            out_dir: Output root mirroring the watched trees; None writes
+                     next to each input file
+            max_queue: Maximum number of files queued or being transcribed
+            max_inflight_bytes: Maximum total size of those files; a single
+                                larger file is still admitted on its own
+            settle_s: Seconds a file must stay unchanged before it is queued
+            poll_s: Seconds between checks of pending files (and between
+                    rescans when polling)
+            rescan_s: Seconds between full rescans while inotify is active,
+                      to catch events that were missed
+            use_inotify: Use inotify where available
+            progress: Callable receiving status lines
+        """
+        self.batch = batch
+        self.state = state
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.out_dir = out_dir
+        self.max_queue = max(1, max_queue)
+        self.max_inflight_bytes = max_inflight_bytes
+        self.settle_s = settle_s
+        self.poll_s = poll_s
+        self.rescan_s = rescan_s
+        self.use_inotify = use_inotify
+        self.progress = progress
+        
+        # path -> (size, mtime_ns, unchanged since)
+        self._pending = {}
+        # path -> (size, mtime_ns) of files that need no further work
+        self._settled = {}
+        # path -> size
+        self._inflight = {}
+        self._inflight_bytes = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.stats = {"done": 0, "failed": 0}
+    
+    def stop(self):
+        """Ask the daemon loop to exit."""
+        self._stop_event.set()
+    
+    def _observe(self, path, now):
+        """Track a file until it has settled."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Deleted or moved away before it settled
+            self._pending.pop(path, None)
+            return
+        
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if path in self._inflight or self._settled.get(path) == signature:
+                return
+        previous = self._pending.get(path)
+        if previous is not None and previous[:2] == signature:
+            return
+        if previous is None and self.state.is_settled(path, *signature):
+            with self._lock:
+                self._settled[path] = signature
+            return
+        self._pending[path] = signature + (now,)
+    
+    def _ready(self, now):
+        """Get settled files, oldest first."""
+        ready = []
+        for path, (size, mtime_ns, since) in list(self._pending.items()):
+            if now - since < self.settle_s:
+                continue
+            if size == 0 or not os.path.exists(path):
+                # Empty files come back with an event or rescan once written
+                del self._pending[path]
+            else:
+                ready.append((since, path))
+        return [path for _, path in sorted(ready)]
+    
+    def _admit(self, ready, pool):
+        """Queue ready files while the backpressure limits allow."""
+        for path in ready:
+            size, mtime_ns, _ = self._pending[path]
+            with self._lock:
+                if len(self._inflight) >= self.max_queue:
+                    return
+                if self._inflight and self._inflight_bytes + size > self.max_inflight_bytes:
+                    return
+                self._inflight[path] = size
+                self._inflight_bytes += size
+            
+            del self._pending[path]
+            self.state.mark_queued(path, size, mtime_ns)
+            future = pool.submit(self.batch.process_file, path, self._output_dir(path))
+            future.add_done_callback(lambda future, path=path: self._on_done(path, future))
+    
+    def _output_dir(self, path):
+        """Mirror the file's place in its watched tree below out_dir."""
+        if not self.out_dir:
+            return None
+        for directory in self.directories:
+            if path.startswith(directory + os.sep):
+                relative = os.path.relpath(os.path.dirname(path), directory)
+                return os.path.normpath(
+                    os.path.join(self.out_dir, os.path.basename(directory), relative)
+                )
+        return self.out_dir
+    
+    def _on_done(self, path, future):
+        """Record the outcome of a file (runs on a worker thread)."""
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or isinstance(error, JobCancelled):
+            # Stays queued in the state and is transcribed after a restart
+            outcome = "cancelled"
+        elif error is None:
+            outcome = "done"
+            result = future.result()
+            self.state.mark_done(path, result["output"])
+            self.progress(f"{os.path.basename(path)}: {self.batch.describe(result)}")
+        else:
+            outcome = "failed"
+            self.state.mark_failed(path, str(error))
+            self.progress(f"{os.path.basename(path)}: FAILED ({error})")
+        
+        with self._lock:
+            size = self._inflight.pop(path)
+            self._inflight_bytes -= size
+            if outcome in self.stats:
+                self.stats[outcome] += 1
+    
+    def _rescan(self, now):
+        """Look at every audio file in the watched directories."""
+        for directory in self.directories:
+            for path in walk_audio_files(directory):
+                self._observe(path, now)
+    
+    def run(self, once=False):
+        """Watch and transcribe until stop() is called.
+        
+        Args:
+            once: Exit as soon as every file present has been handled
+            
+        Returns:
+            dict: Number of files done and failed
+        """
+        watcher = create_watcher(self.directories, self.use_inotify)
+        self.progress(
+            f"Watching {', '.join(self.directories)} ({watcher.name}); "
+            f"at most {self.max_queue} files / {self.max_inflight_bytes / 1024 ** 2:.0f} MB in flight"
+        )
+        pool = ThreadPoolExecutor(max_workers=self.batch.jobs, thread_name_prefix="watch")
+        try:
+            now = time.monotonic()
+            self._rescan(now)
+            next_rescan = now + self.rescan_s
+            
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                self._admit(self._ready(now), pool)
+                
+                with self._lock:
+                    idle = not self._inflight
+                if once and idle and not self._pending:
+                    break
+                
+                changed = watcher.wait(self.poll_s, self._stop_event)
+                now = time.monotonic()
+                if changed is None or now >= next_rescan:
+                    self._rescan(now)
+                    next_rescan = now + self.rescan_s
+                else:
+                    for path in changed:
+                        self._observe(path, now)
+                    # Files waiting to settle produce no further events
+                    for path in list(self._pending):
+                        self._observe(path, now)
+        except KeyboardInterrupt:
+            # Running files stay queued in the state and are redone on restart
+            self.batch.engine.cancel_all("Interrupted")
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            watcher.close()
+        return dict(self.stats)
+
+def build_parser():
+    """Create the argument parser of the watch command."""
+    settings_defaults = AppSettings()
+    parser = argparse.ArgumentParser(
+        prog="main.py watch",
+        description="Transcribe audio files as they arrive in watched directories."
+    )
+    parser.add_argument("directories", nargs="+", help="Directories to watch recursively")
+    parser.add_argument("--model", default=settings_defaults.default_model_size,
+                        choices=settings_defaults.available_models, help="Whisper model size")
+    parser.add_argument("--jobs", type=int, default=2,
+                        help="Files decoded in parallel ahead of inference")
+    parser.add_argument("--out", default=None,
+                        help="Output directory (default: next to each input file)")
+    parser.add_argument("--format", default="txt", choices=["txt", "json"], help="Output format")
+    parser.add_argument("--no-vad", action="store_true", help="Transcribe silence as well")
+    parser.add_argument("--state", default=settings_defaults.watch_state_path,
+                        help="State database recording finished files")
+    parser.add_argument("--max-queue", type=int, default=settings_defaults.watch_max_queue,
+                        help="Maximum files queued or being transcribed")
+    parser.add_argument("--max-inflight-mb", type=float,
+                        default=settings_defaults.watch_max_inflight_bytes / 1024 ** 2,
+                        help="Maximum total size of those files in MB")
+    parser.add_argument("--settle", type=float, default=settings_defaults.watch_settle_s,
+                        help="Seconds a file must stay unchanged before it is queued")
+    parser.add_argument("--poll", type=float, default=settings_defaults.watch_poll_s,
+                        help="Seconds between checks")
+    parser.add_argument("--no-inotify", action="store_true", help="Always poll")
+    parser.add_argument("--once", action="store_true",
+                        help="Exit once every file present has been handled")
+    return parser
+
+def run(argv=None):
+    """Entry point of `main.py watch`.
+    
+    Returns:
+        int: Exit code
+    """
+    args = build_parser().parse_args(argv)
+    missing = [directory for directory in args.directories if not os.path.isdir(directory)]
+    if missing:
+        print(f"Not a directory: {', '.join(missing)}", file=sys.stderr)
+        return 2
+    
+    settings = AppSettings()
+    engine = TranscriptionEngine.from_settings(settings)
+    audio_processor = AudioProcessor.from_settings(settings)
+    vad = None if args.no_vad or not settings.vad_enabled else VoiceActivityDetector()
+    model_ready = threading.Event()
+    batch = BatchTranscriber(
+        engine, audio_processor, args.model, jobs=args.jobs, vad=vad,
+        output_format=args.format, model_ready=model_ready
+    )
+    state = WatchState(args.state, max_attempts=settings.watch_max_attempts)
+    daemon = WatchDaemon(
+        batch, state, args.directories, out_dir=args.out, max_queue=args.max_queue,
+        max_inflight_bytes=int(args.max_inflight_mb * 1024 ** 2), settle_s=args.settle,
+        poll_s=args.poll, rescan_s=settings.watch_rescan_s, use_inotify=not args.no_inotify,
+        progress=lambda line: print(line, file=sys.stderr, flush=True)
+    )
+    
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    engine.load_model(args.model, on_complete=lambda success, error: model_ready.set())
+    try:
+        stats = daemon.run(once=args.once)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        engine.scheduler.shutdown(wait=False)
+        state.close()
+    
+    print(f"{stats['done']} files transcribed, {stats['failed']} failed", file=sys.stderr)
+    return 0 if stats["failed"] == 0 else 1
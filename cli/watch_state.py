@@ -0,0 +1,137 @@
+"""
+Durable record of which watched files have been transcribed.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+class WatchState:
+    """Track watched files in SQLite so a restarted daemon resumes where it stopped.
+    
+    A file is identified by its path, size and modification time. It is
+    settled once it was transcribed, or once it failed max_attempts times;
+    a settled file is only picked up again after it changes. Files that
+    were queued when the daemon stopped are not settled and are
+    transcribed again on the next start.
+    """
+    
+    QUEUED = "queued"
+    DONE = "done"
+    FAILED = "failed"
+    
+    def __init__(self, db_path, max_attempts=3):
+        """Initialize the state store.
+        
+        Args:
+            db_path: Path of the SQLite database file
+            max_attempts: Failed attempts after which a file is given up on
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                output TEXT,
+                error TEXT,
+                updated REAL NOT NULL
+            );
+        """)
+        self._connection.commit()
+    
+    def is_settled(self, path, size, mtime_ns):
+        """Whether this version of a file needs no further work.
+        
+        Args:
+            path: Absolute file path
+            size: File size in bytes
+            mtime_ns: Modification time in nanoseconds
+            
+        Returns:
+            bool: True if it was transcribed or failed too often
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status, attempts FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, size, mtime_ns)
+            ).fetchone()
+        if row is None:
+            return False
+        status, attempts = row
+        return status == self.DONE or (status == self.FAILED and attempts >= self.max_attempts)
+    
+    def mark_queued(self, path, size, mtime_ns):
+        """Record that a file version was handed to the engine."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT attempts FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, size, mtime_ns)
+            ).fetchone()
+            # A changed file starts counting attempts again
+            attempts = row[0] if row else 0
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, status, attempts, output, error, updated) "
+                "VALUES (?, ?, ?, ?, ?, NULL, NULL, ?)",
+                (path, size, mtime_ns, self.QUEUED, attempts, time.time())
+            )
+            self._connection.commit()
+    
+    def mark_done(self, path, output):
+        """Record that a file was transcribed.
+        
+        Args:
+            path: Absolute file path
+            output: Path of the written transcript
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE files SET status = ?, output = ?, error = NULL, updated = ? WHERE path = ?",
+                (self.DONE, output, time.time(), path)
+            )
+            self._connection.commit()
+    
+    def mark_failed(self, path, error):
+        """Record a failed attempt.
+        
+        Args:
+            path: Absolute file path
+            error: Error message
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE files SET status = ?, attempts = attempts + 1, error = ?, updated = ? "
+                "WHERE path = ?",
+                (self.FAILED, error, time.time(), path)
+            )
+            self._connection.commit()
+    
+    def get_stats(self):
+        """Get the number of files per status.
+        
+        Returns:
+            dict: queued, done and failed counts
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT status, COUNT(*) FROM files GROUP BY status"
+            ).fetchall()
+        stats = {self.QUEUED: 0, self.DONE: 0, self.FAILED: 0}
+        stats.update(dict(rows))
+        return stats
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
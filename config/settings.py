@@ -1,7 +1,8 @@
 """
 Application settings and configuration.
 """
-import customtkinter as ctk
+import os
+from models.memory_budget import ModelFootprints
 
 class AppSettings:
     """Application configuration settings."""
@@ -18,6 +19,71 @@ class AppSettings:
         # Model settings
         self.default_model_size = "small"
         self.available_models = ["tiny", "base", "small", "medium", "large"]
+        self.resident_models = 2  # Models kept loaded for fast switching
+        self.resident_models_max_bytes = None  # Optional cap on their weights
+        self.memory_headroom_bytes = 512 * 1024 ** 2  # Kept free when admitting a model
+        self.memory_policy = "fallback"  # "refuse" or "fallback" to the largest model that fits
+        self.quantized_models = []  # Sizes run with int8 Linear layers on the CPU, e.g. ["medium", "large"]
+        
+        # Job scheduling
+        self.max_workers = 1
+        self.max_queued_jobs = 16
+        self.job_timeout_s = None  # Wall-clock limit per transcription, None = unlimited
+        self.shortest_job_first = True  # Queued jobs of equal priority run shortest predicted first
+        
+        # Parallel chunked transcription of long files (0 workers = off)
+        self.parallel_workers = 0
+        self.parallel_threads_per_worker = None  # Default: cores / workers
+        self.parallel_min_duration_s = 600
+        self.parallel_chunk_s = 120
+        self.parallel_share_weights = True  # Workers read one shared copy of the model
+        
+        # Decoded audio cache
+        self.cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "whisper-transcription")
+        self.audio_cache_dir = os.path.join(self.cache_dir, "audio")
+        self.audio_cache_max_bytes = 4 * 1024 ** 3  # 4 GB
+        
+        # Finished transcription cache
+        self.result_cache_path = os.path.join(self.cache_dir, "results.sqlite3")
+        self.result_cache_max_bytes = 256 * 1024 ** 2  # 256 MB
+        
+        # Real-time factors of finished jobs for time estimates
+        self.job_history_path = os.path.join(self.cache_dir, "job_history.json")
+        
+        # Measured model memory footprints
+        self.model_footprint_path = os.path.join(self.cache_dir, "model_footprints.json")
+        self._model_footprints = None
+        self.quantized_model_dir = os.path.join(self.cache_dir, "quantized")
+        
+        # Models converted for memory-mapped loading
+        self.model_store_dir = os.path.join(self.cache_dir, "models")
+        self.model_download_root = None  # Whisper checkpoints (<size>.pt), None = Whisper's cache
+        self.offline = False  # Never download; convert only from model_download_root
+        
+        # Watch-folder daemon (main.py watch)
+        self.watch_state_path = os.path.join(self.cache_dir, "watch_state.sqlite3")
+        self.watch_max_queue = 8  # Files queued or being transcribed
+        self.watch_max_inflight_bytes = 512 * 1024 ** 2  # Total size of those files
+        self.watch_settle_s = 5.0  # A file must stay unchanged this long before it is queued
+        self.watch_poll_s = 2.0
+        self.watch_rescan_s = 300.0  # Full rescan interval while inotify is active
+        self.watch_max_attempts = 3  # Failed attempts before a file is given up on
+        
+        # Transcription server (main.py serve)
+        self.server_host = "127.0.0.1"
+        self.server_port = 8765
+        self.server_socket = None  # Unix socket path to listen on instead of TCP
+        self.server_upload_dir = os.path.join(self.cache_dir, "uploads")
+        self.server_max_upload_bytes = 2 * 1024 ** 3  # 2 GB
+        self.server_url = None  # GUI transcribes on this server, e.g. "http://127.0.0.1:8765"
+        
+        # Live transcription (main.py stream)
+        self.stream_buffer_s = 60.0  # Seconds of audio kept in the ring buffer
+        self.stream_partial_interval_s = 1.0  # Re-decode the open utterance this often, 0 = off
+        self.stream_max_utterance_s = 20.0  # Longer utterances are cut at a pause
+        
+        # Skip silence before transcription
+        self.vad_enabled = True
         
         # Default language
         self.default_language = "de"
@@ -29,21 +95,28 @@ class AppSettings:
             ("MP3 Files", "*.mp3"),
             ("All Files", "*.*")
         )
-        
-        # Apply custom tkinter settings
-        self.apply_ctk_settings()
     
     def apply_ctk_settings(self):
-        """Apply CustomTkinter global settings."""
+        """Apply CustomTkinter global settings (called by the GUI only)."""
+        import customtkinter as ctk
+        
         ctk.set_appearance_mode(self.appearance_mode)
         ctk.set_default_color_theme(self.color_theme)
     
-    def get_model_factors(self):
-        """Get processing time factors for different model sizes."""
-        return {
-            "tiny": 0.5, 
-            "base": 1.0, 
-            "small": 2.0, 
-            "medium": 4.0, 
-            "large": 8.0
-        }
+    def get_model_footprints(self):
+        """Get the shared footprint table, read from disk once.
+        
+        The engine's memory budget records into the same instance, so new
+        measurements are seen without reading the file again.
+        """
+        if self._model_footprints is None or self._model_footprints.table_path != self.model_footprint_path:
+            self._model_footprints = ModelFootprints(self.model_footprint_path)
+        return self._model_footprints
+    
+    def get_model_factors(self, device="cpu"):
+        """Get processing time factors for different model sizes.
+        
+        Derived from the measured model footprints (base = 1.0); used to
+        compare model sizes until their jobs have been timed.
+        """
+        return self.get_model_footprints().get_factors(device)
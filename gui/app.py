@@ -1,30 +1,47 @@
 """
 Main application window for the Whisper Transcription App.
 """
+import contextlib
+import threading
 import time
 import customtkinter as ctk
 from config.settings import AppSettings
 from localization.translations import TranslationManager
 from models.transcription_engine import TranscriptionEngine
 from models.audio_processor import AudioProcessor
+from models.vad import VoiceActivityDetector
+from server.client import TranscriptionClient
 from utils.file_operations import FileOperations
 from utils.status_tracker import StatusTracker
+from utils.tracing import tracer
+from utils.ui_bus import UIEventBus
 from gui.ui_components import UIFactory
 
 class WhisperApp(ctk.CTk):
     """Main application window."""
     
-    def __init__(self):
-        """Initialize the application."""
-        super().__init__()
+    def __init__(self, startup_profile=None, warm_up=True):
+        """Initialize the application.
+        
+        Torch, Whisper and the audio libraries are imported in the
+        background once the window is up.
+        
+        Args:
+            startup_profile: Optional StartupProfile recording the phases
+            warm_up: Start the background imports and the model load; off
+                     when only the first paint is profiled
+        """
+        with self._startup_phase(startup_profile, "window"):
+            super().__init__()
         
         # Initialize components
-        self.settings = AppSettings()
-        self.translations = TranslationManager(self.settings.default_language)
-        self.transcription_engine = TranscriptionEngine()
-        self.audio_processor = AudioProcessor()
-        self.file_operations = FileOperations(self.settings.file_types)
-        self.status_tracker = StatusTracker()
+        with self._startup_phase(startup_profile, "settings"):
+            self.settings = AppSettings()
+            self.settings.apply_ctk_settings()
+            self.translations = TranslationManager(self.settings.default_language)
+        
+        with self._startup_phase(startup_profile, "engine"):
+            self._create_components()
         
         # Application state
         self.file_path = ""
@@ -37,11 +54,40 @@ class WhisperApp(ctk.CTk):
         self.minsize(*self.settings.min_window_size)
         
         # Create UI
-        self.create_ui()
-        
-        # Load model
+        with self._startup_phase(startup_profile, "create_ui"):
+            self.create_ui()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.ui_bus.start()
+        
+        # Heavy imports and the model load start once the first frame is drawn
+        if warm_up:
+            self.after_idle(self.warm_up)
+    
+    @staticmethod
+    def _startup_phase(startup_profile, name):
+        """Time a startup phase if profiling, otherwise do nothing."""
+        if startup_profile is None:
+            return contextlib.nullcontext()
+        return startup_profile.phase(name)
+    
+    def warm_up(self):
+        """Load the model and import the audio libraries in the background."""
+        if self.client is None:
+            threading.Thread(target=self.audio_processor.warm_up, daemon=True).start()
         self.load_model_thread()
     
+    def _create_components(self):
+        """Create the engine, caches and audio components (no heavy imports)."""
+        self.transcription_engine = TranscriptionEngine.from_settings(self.settings)
+        self.audio_processor = AudioProcessor.from_settings(self.settings)
+        self.vad = VoiceActivityDetector() if self.settings.vad_enabled else None
+        self.file_operations = FileOperations(self.settings.file_types)
+        # With a server configured, its warm model transcribes instead of a local one
+        self.client = TranscriptionClient.from_settings(self.settings)
+        # Worker threads hand widget updates to the main loop through the bus
+        self.ui_bus = UIEventBus(self)
+        self.status_tracker = StatusTracker(ui_bus=self.ui_bus)
+    
     def get_text(self, key, **kwargs):
         """Get text in current language with formatting."""
         return self.translations.get_text(key, **kwargs)
@@ -110,6 +156,13 @@ class WhisperApp(ctk.CTk):
         )
         self.status_frame.grid(row=4, column=0, padx=10, pady=5, sticky="ew")
         
+        self.cancel_button = UIFactory.create_cancel_button(
+            self.status_frame,
+            self.get_text("cancel_button"),
+            self.cancel_transcription
+        )
+        self.cancel_button.grid(row=2, column=0, padx=10, pady=(0, 5), sticky="e")
+        
         # Update status tracker with UI components
         self.status_tracker.set_ui_components(
             self.status_label,
@@ -160,8 +213,9 @@ class WhisperApp(ctk.CTk):
         device_text = self.get_text("device_label", device=self.transcription_engine.get_device_name())
         self.device_label.configure(text=device_text)
         
-        # Update transcribe button
+        # Update transcribe and cancel buttons
         self.transcribe_button.configure(text=self.get_text("transcribe_button"))
+        self.cancel_button.configure(text=self.get_text("cancel_button"))
         
         # Update transcript section
         self.transcript_label.configure(text=self.get_text("transcript_label"))
@@ -200,6 +254,10 @@ class WhisperApp(ctk.CTk):
     
     def load_model_thread(self):
         """Load Whisper model in a separate thread."""
+        if self.client is not None:
+            self.connect_server()
+            return
+        
         self.status_tracker.update_status(self.get_text("status_loading"))
         self.status_tracker.update_progress(0.2, self.get_text("status_loading"))
         self.toggle_ui_state(False)
@@ -209,34 +267,72 @@ class WhisperApp(ctk.CTk):
         
         def on_model_loaded(success, error):
             """Callback when model loading completes."""
-            if success:
-                elapsed_time = time.time() - start_time
+            with tracer.span("gui.on_model_loaded"):
+                if success:
+                    elapsed_time = time.time() - start_time
+                    
+                    # The memory budget may have fallen back to a smaller model
+                    self.model_size.set(self.transcription_engine.model_size)
+                    # The device is known once torch has been imported
+                    self.device_label.configure(
+                        text=self.get_text("device_label", device=self.transcription_engine.get_device_name())
+                    )
+                    
+                    self.status_tracker.update_status(
+                        self.get_text("status_model_loaded", 
+                                     model=self.model_size.get(), 
+                                     device=self.transcription_engine.get_device_name())
+                    )
+                    self.status_tracker.update_progress(
+                        1.0, self.get_text("status_loaded_in", time=elapsed_time)
+                    )
+                    
+                    # Reset after a delay
+                    self.after(2000, lambda: self.status_tracker.update_progress(0, ""))
+                    self.after(2000, lambda: self.status_tracker.update_status(self.get_text("status_ready")))
+                else:
+                    self.status_tracker.update_status(
+                        self.get_text("error_generic", error=error)
+                    )
                 
+                self.toggle_ui_state(True)
+                self.status_tracker.stop_timer()
+        
+        # Start loading the model; the callback runs on the main loop
+        self.transcription_engine.load_model(
+            self.model_size.get(),
+            on_complete=lambda success, error: self.ui_bus.call(on_model_loaded, success, error)
+        )
+    
+    def connect_server(self):
+        """Show the model and device of the transcription server.
+        
+        The server decides the model, so the model menu is reset to it.
+        """
+        self.status_tracker.update_status(self.get_text("status_loading"))
+        self.toggle_ui_state(False)
+        
+        def on_connected(health, error):
+            if health:
+                self.model_size.set(health["model"])
+                self.device_label.configure(text=self.get_text("device_label", device=health["device"]))
                 self.status_tracker.update_status(
-                    self.get_text("status_model_loaded", 
-                                 model=self.model_size.get(), 
-                                 device=self.transcription_engine.get_device_name())
+                    self.get_text("status_model_loaded", model=health["model"], device=health["device"])
                 )
-                self.status_tracker.update_progress(
-                    1.0, self.get_text("status_loaded_in", time=elapsed_time)
-                )
-                
-                # Reset after a delay
-                self.after(2000, lambda: self.status_tracker.update_progress(0, ""))
                 self.after(2000, lambda: self.status_tracker.update_status(self.get_text("status_ready")))
             else:
-                self.status_tracker.update_status(
-                    self.get_text("error_generic", error=error)
-                )
-            
+                self.status_tracker.update_status(self.get_text("error_generic", error=error))
             self.toggle_ui_state(True)
-            self.status_tracker.stop_timer()
         
-        # Start loading the model
-        self.transcription_engine.load_model(
-            self.model_size.get(),
-            on_complete=on_model_loaded
-        )
+        def check():
+            try:
+                health = self.client.health()
+            except Exception as e:
+                self.ui_bus.call(on_connected, None, str(e))
+                return
+            self.ui_bus.call(on_connected, health, None)
+        
+        threading.Thread(target=check, daemon=True).start()
     
     def change_model(self, choice):
         """Change model size."""
@@ -255,10 +351,6 @@ class WhisperApp(ctk.CTk):
             self.status_tracker.update_status(self.get_text("status_select_file"))
             return
         
-        if self.transcription_engine.is_loading or not self.transcription_engine.model:
-            self.status_tracker.update_status(self.get_text("status_wait_model"))
-            return
-        
         if self.status_tracker.processing:
             return
         
@@ -269,79 +361,260 @@ class WhisperApp(ctk.CTk):
         
         # Start timer
         self.status_tracker.start_timer()
+        self.cancel_button.configure(state="normal")
+        
+        # Segments are appended as they are decoded
+        self.transcript_text.delete("0.0", ctk.END)
+        
+        # Tk variables are read here; the worker thread must not touch Tk
+        file_path = self.file_path
+        model_size = self.model_size.get()
+        
+        # Results are cached under the path that ran: chunked in parallel
+        # (long speech with parallel workers) or in this process
+        cache_options = {"vad": self.vad is not None, "parallel_chunk_s": None}
+        parallel_options = dict(cache_options, parallel_chunk_s=self.settings.parallel_chunk_s)
         
         def process_audio():
             try:
+                # A finished result for the same audio and settings needs no
+                # model; which path ran is only known after decoding
+                lookups = [cache_options]
+                if self.settings.parallel_workers:
+                    lookups.append(parallel_options)
+                with tracer.span("result_cache.get"):
+                    for options in lookups:
+                        cached = self.transcription_engine.get_cached_result(
+                            self.transcription_engine.result_cache_key(
+                                file_path, model_size=model_size, options=options
+                            )
+                        )
+                        if cached is not None:
+                            self.ui_bus.call(self.show_cached_result, cached)
+                            return
+                
+                if self.transcription_engine.is_loading or not self.transcription_engine.model:
+                    self.status_tracker.update_status(self.get_text("status_wait_model"))
+                    self.status_tracker.stop_timer()
+                    self.status_tracker.update_progress(0, "")
+                    self.ui_bus.call(self.end_processing)
+                    return
+                
+                # The memory budget may have loaded a smaller model than
+                # selected; its result is cached under the size that ran
+                loaded_size = self.transcription_engine.model_size
+                
                 # Load audio
                 self.status_tracker.update_status(self.get_text("status_loading_audio"))
-                audio = self.audio_processor.load_audio(self.file_path)
+                audio, sample_rate = self.audio_processor.load_audio(file_path)
                 
                 # Update progress
                 self.status_tracker.update_progress(0.3, self.get_text("status_loading_audio"))
                 self.status_tracker.update_status(self.get_text("status_transcribing"))
                 
                 # Calculate estimated time
-                audio_duration = self.audio_processor.get_audio_duration(audio)
-                model_factors = self.settings.get_model_factors()
-                transcription_time = self.transcription_engine.estimate_processing_time(
-                    audio_duration, model_factors
-                )
+                audio_duration = self.audio_processor.get_audio_duration(audio, sample_rate)
+                total_duration = audio_duration
                 
-                # Start progress updates
-                self.status_tracker.start_progress_updates(
-                    0.3, 0.9, 
-                    transcription_time,
-                    lambda time: self.get_text("status_remaining", time=time)
+                # Detect speech so silence is not sent through the model
+                speech_regions = None
+                if self.vad:
+                    speech_regions = self.vad.detect(audio, sample_rate)
+                    vad_report = self.vad.build_report(speech_regions, audio_duration)
+                    self.status_tracker.update_status(
+                        self.get_text("status_vad_skipped",
+                                      skipped=vad_report["skipped_s"],
+                                      ratio=vad_report["skipped_ratio"])
+                    )
+                    audio_duration = vad_report["speech_s"]
+                prediction = self.transcription_engine.predict_processing_time(total_duration, audio_duration)
+                self.status_tracker.set_estimate(prediction)
+                
+                # Initial estimate from past jobs; replaced by measured throughput once decoding runs
+                self.status_tracker.update_progress(
+                    0.3, self.get_text("status_remaining_range", time=prediction["seconds"],
+                                       low=prediction["low"], high=prediction["high"])
                 )
                 
-                # Transcribe
-                def on_transcription_complete(success, transcription, error):
-                    if success:
-                        self.transcription = transcription
-                        
-                        # Calculate total time
-                        total_time = self.status_tracker.stop_timer()
-                        
-                        # Update UI
-                        self.update_transcript(self.transcription)
-                        self.status_tracker.update_progress(
-                            1.0, self.get_text("status_completed", time=total_time)
+                def on_progress(event):
+                    with tracer.span("gui.on_progress"):
+                        self.status_tracker.report_progress(
+                            event, 0.3, 0.9,
+                            lambda time: self.get_text("status_remaining", time=time)
                         )
-                        self.status_tracker.update_status(
-                            self.get_text("status_completed", time=total_time)
-                        )
-                        
-                        # Reset after a delay
-                        self.after(5000, lambda: self.status_tracker.update_progress(0, ""))
-                        self.after(5000, lambda: self.status_tracker.update_status(self.get_text("status_ready")))
-                    else:
-                        self.status_tracker.update_status(
-                            self.get_text("error_audio", error=error)
-                        )
-                        self.status_tracker.stop_timer()
-                    
-                    self.toggle_ui_state(True)
                 
-                # Start transcription
-                self.transcription_engine.transcribe(audio, on_transcription_complete)
+                def on_segment(segment):
+                    # Called on a worker thread; hand over to the Tk event loop
+                    self.ui_bus.call(self.append_transcript_segment, segment)
+                
+                # Transcribe
+                def on_complete(success, transcription, error):
+                    # Called on a worker thread; the UI is updated on the main loop
+                    self.ui_bus.call(self.on_transcription_complete, success, transcription, error)
                 
+                # Cancel pressed while the audio was still loading
+                if self.status_tracker.cancel_requested:
+                    on_complete(False, None, "Cancelled")
+                    return
+                
+                # Start transcription
+                parallel = (self.settings.parallel_workers
+                            and audio_duration >= self.settings.parallel_min_duration_s)
+                cache_key = self.transcription_engine.result_cache_key(
+                    file_path, model_size=loaded_size,
+                    options=parallel_options if parallel else cache_options
+                )
+                if parallel:
+                    job = self.transcription_engine.transcribe_parallel(
+                        audio, on_complete,
+                        workers=self.settings.parallel_workers,
+                        threads_per_worker=self.settings.parallel_threads_per_worker,
+                        chunk_s=self.settings.parallel_chunk_s,
+                        share_weights=self.settings.parallel_share_weights,
+                        timeout=self.settings.job_timeout_s,
+                        on_progress=on_progress,
+                        on_segment=on_segment,
+                        cache_key=cache_key,
+                        speech_regions=speech_regions
+                    )
+                else:
+                    job = self.transcription_engine.transcribe(
+                        audio, on_complete,
+                        speech_regions=speech_regions,
+                        timeout=self.settings.job_timeout_s,
+                        on_progress=on_progress,
+                        on_segment=on_segment,
+                        cache_key=cache_key
+                    )
+                self.status_tracker.track_job(job)
+            
             except Exception as e:
                 error_message = str(e)
                 self.status_tracker.update_status(
                     self.get_text("error_audio", error=error_message)
                 )
                 self.status_tracker.stop_timer()
-                self.toggle_ui_state(True)
+                self.ui_bus.call(self.end_processing)
+        
+        def traced_process_audio():
+            # Jobs submitted from here carry the file and model tags
+            with tracer.context(file=file_path, model=model_size), \
+                    tracer.span("gui.process_audio"):
+                process_audio()
         
         # Start processing in a new thread
-        import threading
-        threading.Thread(target=process_audio, daemon=True).start()
+        if self.client is not None:
+            threading.Thread(target=self.process_remote, args=(file_path,), daemon=True).start()
+        else:
+            threading.Thread(target=traced_process_audio, daemon=True).start()
+    
+    def process_remote(self, file_path):
+        """Transcribe a file on the transcription server (worker thread)."""
+        def on_status(job):
+            if job["estimate"] and self.status_tracker.prediction is None:
+                self.status_tracker.set_estimate(job["estimate"])
+            if job["progress"]:
+                self.status_tracker.report_progress(
+                    job["progress"], 0.3, 0.9,
+                    lambda time: self.get_text("status_remaining", time=time)
+                )
+        
+        def on_segment(segment):
+            self.ui_bus.call(self.append_transcript_segment, segment)
+        
+        try:
+            self.status_tracker.update_status(self.get_text("status_loading_audio"))
+            job = self.client.transcribe_file(file_path)
+            self.status_tracker.track_job(job)
+            self.status_tracker.update_progress(0.3, self.get_text("status_transcribing"))
+            self.status_tracker.update_status(self.get_text("status_transcribing"))
+            result = self.client.wait(job.id, on_status=on_status, on_segment=on_segment)
+        except Exception as e:
+            # Also OSError and connection resets, or the UI would stay disabled
+            self.ui_bus.call(self.on_transcription_complete, False, None, str(e))
+            return
+        self.ui_bus.call(self.on_transcription_complete, True, result["text"], None)
+    
+    def on_transcription_complete(self, success, transcription, error):
+        """Show the outcome of a transcription (main thread)."""
+        with tracer.span("gui.on_transcription_complete"):
+            if success:
+                self.transcription = transcription
+                
+                # Calculate total time
+                total_time = self.status_tracker.stop_timer()
+                
+                # Update UI
+                self.update_transcript(self.transcription)
+                self.status_tracker.update_progress(
+                    1.0, self.get_text("status_completed", time=total_time)
+                )
+                self.status_tracker.update_status(
+                    self.get_text("status_completed", time=total_time)
+                )
+                
+                # Reset after a delay
+                self.after(5000, lambda: self.status_tracker.update_progress(0, ""))
+                self.after(5000, lambda: self.status_tracker.update_status(self.get_text("status_ready")))
+            elif self.status_tracker.cancel_requested:
+                self.status_tracker.stop_timer()
+                self.status_tracker.update_progress(0, "")
+                self.status_tracker.update_status(self.get_text("status_cancelled"))
+            else:
+                self.status_tracker.update_status(
+                    self.get_text("error_audio", error=error)
+                )
+                self.status_tracker.stop_timer()
+            
+            self.end_processing()
+    
+    def show_cached_result(self, result):
+        """Show a transcription served from the result cache."""
+        with tracer.span("gui.show_cached_result"):
+            self.transcription = result["text"]
+            self.status_tracker.stop_timer()
+            
+            self.update_transcript(self.transcription)
+            self.status_tracker.update_progress(1.0, self.get_text("status_cache_hit"))
+            self.status_tracker.update_status(self.get_text("status_cache_hit"))
+            
+            self.end_processing()
+            self.after(5000, lambda: self.status_tracker.update_progress(0, ""))
+            self.after(5000, lambda: self.status_tracker.update_status(self.get_text("status_ready")))
+    
+    def cancel_transcription(self):
+        """Cancel the running transcription."""
+        if self.status_tracker.cancel():
+            self.cancel_button.configure(state="disabled")
+    
+    def end_processing(self):
+        """Re-enable the controls once a transcription has ended."""
+        self.cancel_button.configure(state="disabled")
+        self.toggle_ui_state(True)
+    
+    def on_close(self):
+        """Stop running jobs before closing the window."""
+        self.transcription_engine.cancel_all("Window closed")
+        if self.client is not None:
+            self.status_tracker.cancel("Window closed")
+            self.client.close()
+        self.ui_bus.stop()
+        self.destroy()
     
     def update_transcript(self, text):
         """Update transcript text."""
         self.transcript_text.delete("0.0", ctk.END)
         self.transcript_text.insert("0.0", text)
     
+    def append_transcript_segment(self, segment):
+        """Append a decoded segment to the transcript while transcription runs."""
+        with tracer.span("gui.append_segment"):
+            text = segment["text"]
+            if not self.transcript_text.get("0.0", ctk.END).strip():
+                text = text.lstrip()
+            self.transcript_text.insert(ctk.END, text)
+            self.transcript_text.see(ctk.END)
+    
     def toggle_ui_state(self, enabled):
         """Enable/disable UI elements."""
         state = "normal" if enabled else "disabled"
@@ -138,6 +138,20 @@ class UIFactory:
         
         return frame, progress, percent_label, status_label, time_label
     
+    @staticmethod
+    def create_cancel_button(parent, text, command):
+        """Create secondary button to cancel the running job."""
+        button = ctk.CTkButton(
+            parent,
+            text=text,
+            width=100,
+            fg_color="gray40",
+            hover_color="gray30",
+            state="disabled",
+            command=command
+        )
+        return button
+    
     @staticmethod
     def create_transcript_area(parent, label_text):
         """Create transcript display area."""
@@ -28,14 +28,19 @@ class TranslationManager:
                 "status_processing": "Processing audio...",
                 "status_loading_audio": "Loading audio...",
                 "status_transcribing": "Transcribing...",
+                "status_vad_skipped": "Skipping {skipped:.0f}s of silence ({ratio:.0%}), transcribing...",
                 "status_completed": "Transcription completed! ({time:.1f}s)",
                 "status_select_file": "Please select an audio file",
                 "status_wait_model": "Model is still loading, please wait",
+                "status_cache_hit": "Loaded previous transcription from cache",
                 "status_remaining": "Remaining: ~{time:.1f}s",
+                "status_remaining_range": "Remaining: ~{time:.0f}s ({low:.0f}-{high:.0f}s)",
                 "transcript_label": "Transcription:",
                 "copy_button": "Copy",
                 "save_button": "Save",
                 "clear_button": "Clear",
+                "cancel_button": "Cancel",
+                "status_cancelled": "Transcription cancelled",
                 "status_copied": "Copied to clipboard",
                 "status_no_transcript": "No transcription to save",
                 "status_saved": "Saved: {filename}",
@@ -62,14 +67,19 @@ class TranslationManager:
                 "status_processing": "Audio wird verarbeitet...",
                 "status_loading_audio": "Audio wird geladen...",
                 "status_transcribing": "Transkribieren...",
+                "status_vad_skipped": "Überspringe {skipped:.0f}s Stille ({ratio:.0%}), transkribiere...",
                 "status_completed": "Transkription abgeschlossen! ({time:.1f}s)",
                 "status_select_file": "Bitte wähle eine Audio-Datei aus",
                 "status_wait_model": "Modell wird noch geladen, bitte warten",
+                "status_cache_hit": "Frühere Transkription aus dem Cache geladen",
                 "status_remaining": "Verbleibend: ~{time:.1f}s",
+                "status_remaining_range": "Verbleibend: ~{time:.0f}s ({low:.0f}-{high:.0f}s)",
                 "transcript_label": "Transkription:",
                 "copy_button": "Kopieren",
                 "save_button": "Speichern",
                 "clear_button": "Löschen",
+                "cancel_button": "Abbrechen",
+                "status_cancelled": "Transkription abgebrochen",
                 "status_copied": "In Zwischenablage kopiert",
                 "status_no_transcript": "Keine Transkription zum Speichern",
                 "status_saved": "Gespeichert: {filename}",
@@ -96,14 +106,19 @@ class TranslationManager:
                 "status_processing": "Traitement de l'audio...",
                 "status_loading_audio": "Chargement de l'audio...",
                 "status_transcribing": "Transcription...",
+                "status_vad_skipped": "{skipped:.0f}s de silence ignorées ({ratio:.0%}), transcription...",
                 "status_completed": "Transcription terminée! ({time:.1f}s)",
                 "status_select_file": "Veuillez sélectionner un fichier audio",
                 "status_wait_model": "Le modèle se charge encore, veuillez patienter",
+                "status_cache_hit": "Transcription précédente chargée depuis le cache",
                 "status_remaining": "Restant: ~{time:.1f}s",
+                "status_remaining_range": "Restant: ~{time:.0f}s ({low:.0f}-{high:.0f}s)",
                 "transcript_label": "Transcription:",
                 "copy_button": "Copier",
                 "save_button": "Enregistrer",
                 "clear_button": "Effacer",
+                "cancel_button": "Annuler",
+                "status_cancelled": "Transcription annulée",
                 "status_copied": "Copié dans le presse-papiers",
                 "status_no_transcript": "Pas de transcription à enregistrer",
                 "status_saved": "Enregistré: {filename}",
@@ -130,14 +145,19 @@ class TranslationManager:
                 "status_processing": "Procesando audio...",
                 "status_loading_audio": "Cargando audio...",
                 "status_transcribing": "Transcribiendo...",
+                "status_vad_skipped": "Omitiendo {skipped:.0f}s de silencio ({ratio:.0%}), transcribiendo...",
                 "status_completed": "¡Transcripción completada! ({time:.1f}s)",
                 "status_select_file": "Por favor seleccione un archivo de audio",
                 "status_wait_model": "El modelo aún se está cargando, por favor espere",
+                "status_cache_hit": "Transcripción anterior cargada desde la caché",
                 "status_remaining": "Restante: ~{time:.1f}s",
+                "status_remaining_range": "Restante: ~{time:.0f}s ({low:.0f}-{high:.0f}s)",
                 "transcript_label": "Transcripción:",
                 "copy_button": "Copiar",
                 "save_button": "Guardar",
                 "clear_button": "Borrar",
+                "cancel_button": "Cancelar",
+                "status_cancelled": "Transcripción cancelada",
                 "status_copied": "Copiado al portapapeles",
                 "status_no_transcript": "No hay transcripción para guardar",
                 "status_saved": "Guardado: {filename}",
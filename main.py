@@ -1,5 +1,22 @@
 """
 Whisper Transcription App - Main Entry Point
+
+Usage:
+    python main.py                          Start the application
+    python main.py transcribe <paths> [--model small] [--jobs N] [--out DIR] [--format txt|json]
+                                            Transcribe files without the GUI
+    python main.py watch <dirs> [--model small] [--out DIR] [--max-queue N] [--once]
+                                            Transcribe new files in watched directories
+    python main.py serve [--model small] [--port 8765 | --socket PATH]
+                                            Serve transcriptions from one warm model over HTTP
+    python main.py stream [--model small] [--listen HOST:PORT | --replay FILE] [--json]
+                                            Transcribe live 16-bit PCM from stdin with partial results
+    python main.py --startup-profile [--json]
+                                            Print startup phase and import times,
+                                            then exit once the first window is drawn
+    python main.py [command] --trace trace.json
+                                            Record per-stage timings as a Chrome trace
+                                            (chrome://tracing, Perfetto) and print a summary on exit
 """
 import os
 import sys
@@ -7,24 +24,120 @@ import sys
 # Add the project root directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from gui.app import WhisperApp
+from utils.startup_profile import StartupProfile, parse_importtime
+from utils.tracing import tracer
 
-if __name__ == "__main__":
-    # Check if FFmpeg is available
+def run_startup_profile(as_json=False):
+    """Re-run the app under -X importtime and report where startup time goes.
+    
+    Returns:
+        int: Exit code of the profiled run
+    """
+    import json
+    import subprocess
+    
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--startup-profile"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        return result.returncode
+    
+    # Background threads may print after the profile line
+    line = next(
+        (line for line in result.stdout.splitlines() if line.startswith('{"phases"')), None
+    )
+    if line is None:
+        sys.stderr.write(result.stdout)
+        sys.stderr.write("The profiled run exited without reporting its startup profile\n")
+        return 1
+    profile = json.loads(line)
+    imports = parse_importtime(result.stderr)
+    if as_json:
+        profile["imports"] = [{"package": package, "seconds": seconds} for package, seconds in imports]
+        print(json.dumps(profile))
+    else:
+        print("\n".join(StartupProfile.format_report(profile, imports)))
+    return 0
+
+def enable_tracing(argv):
+    """Handle --trace <file>: record spans and write them when the process exits.
+    
+    The option is removed from argv so the subcommands never see it.
+    """
+    if "--trace" not in argv:
+        return
+    import atexit
+    
+    index = argv.index("--trace")
+    if index + 1 >= len(argv):
+        sys.exit("--trace needs an output file")
+    path = argv[index + 1]
+    del argv[index:index + 2]
+    
+    def write_trace():
+        tracer.export_chrome_trace(path)
+        print("\n".join(tracer.format_summary()), file=sys.stderr)
+        print(f"Trace written to {path}", file=sys.stderr)
+    
+    tracer.enable()
+    atexit.register(write_trace)
+
+def check_ffmpeg():
+    """Warn if FFmpeg cannot be found."""
     ffmpeg_present = False
     for path in os.environ["PATH"].split(os.pathsep):
         if os.path.exists(os.path.join(path, "ffmpeg.exe")):
             ffmpeg_present = True
             break
-
+    
     if os.path.exists("ffmpeg.exe"):
         ffmpeg_present = True
         print("FFmpeg found in current directory.")
-
+    
     if not ffmpeg_present:
         print("WARNING: FFmpeg not found. Audio processing might fail.")
         print("Please download ffmpeg.exe and save it in the application directory.")
+
+if __name__ == "__main__":
+    enable_tracing(sys.argv)
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "transcribe":
+        # Headless mode: no customtkinter import
+        from cli.batch import run
+        sys.exit(run(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+        from cli.watch import run
+        sys.exit(run(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from cli.serve import run
+        sys.exit(run(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "stream":
+        from cli.stream import run
+        sys.exit(run(sys.argv[2:]))
+    
+    profiling = "--startup-profile" in sys.argv
+    if profiling and "importtime" not in sys._xoptions:
+        sys.exit(run_startup_profile(as_json="--json" in sys.argv))
+    
+    profile = StartupProfile()
+    with profile.phase("import gui"):
+        from gui.app import WhisperApp
+    
+    if not profiling:
+        check_ffmpeg()
     
     # Start the application
-    app = WhisperApp()
-    app.mainloop()
\ No newline at end of file
+    # A profiled run exits after the first paint; a warm-up would still be importing torch
+    app = WhisperApp(startup_profile=profile, warm_up=not profiling)
+    app.update()
+    profile.mark("first_window")
+    
+    if profiling:
+        import json
+        print(json.dumps(profile.to_dict()))
+        app.destroy()
+        sys.exit(0)
+    
+    app.mainloop()
@@ -1,5 +1,20 @@
 """Model components for the Whisper Transcription App."""
 from .transcription_engine import TranscriptionEngine
-from .audio_processor import AudioProcessor
+from .audio_processor import AudioProcessor, StreamResampler
+from .audio_cache import AudioCache
+from .result_cache import TranscriptionResultCache
+from .model_registry import ModelRegistry
+from .memory_budget import MemoryBudget, ModelFootprints
+from .quantization import QuantizedModelStore
+from .model_store import LocalModelStore
+from .vad import VoiceActivityDetector, SpeechEndpointer
+from .parallel_transcriber import ParallelTranscriber
+from .estimator import ProcessingTimeEstimator
+from .streaming import PCMRingBuffer, StreamingTranscriber
+from .job_scheduler import JobScheduler, JobState, CancellationToken, JobCancelled, JobTimeout
 
-__all__ = ['TranscriptionEngine', 'AudioProcessor']
\ No newline at end of file
+__all__ = ['TranscriptionEngine', 'AudioProcessor', 'StreamResampler', 'AudioCache', 'TranscriptionResultCache',
+           'VoiceActivityDetector', 'SpeechEndpointer', 'ParallelTranscriber', 'ModelRegistry',
+           'MemoryBudget', 'ModelFootprints', 'QuantizedModelStore',
+           'LocalModelStore', 'ProcessingTimeEstimator', 'PCMRingBuffer', 'StreamingTranscriber',
+           'JobScheduler', 'JobState', 'CancellationToken', 'JobCancelled', 'JobTimeout']
\ No newline at end of file
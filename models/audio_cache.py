@@ -0,0 +1,279 @@
+"""
+Persistent cache of decoded audio stored as memory-mapped float32 files.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+import numpy as np
+
+def file_content_hash(file_path, sample_bytes=None):
+    """Hash the content of a file.
+    
+    Args:
+        file_path: Path to the file
+        sample_bytes: If set, only hash this many bytes from the start,
+                      middle and end of the file instead of all of it
+        
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    size = os.path.getsize(file_path)
+    
+    with open(file_path, "rb") as f:
+        if sample_bytes is None or size <= 3 * sample_bytes:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        else:
+            for position in (0, (size - sample_bytes) // 2, size - sample_bytes):
+                f.seek(position)
+                digest.update(f.read(sample_bytes))
+    
+    return digest.hexdigest()
+
+class AudioCache:
+    """Cache decoded 16 kHz float32 PCM on disk and reopen it with np.memmap."""
+    
+    INDEX_FILE = "index.json"
+    # Cache hits only refresh last_access, so their index writes are batched
+    INDEX_WRITE_INTERVAL_S = 30.0
+    # Temporary files older than this belong to writes that were interrupted
+    STALE_TEMP_S = 3600.0
+    
+    def __init__(self, cache_dir, max_bytes=4 * 1024 ** 3, hash_sample_bytes=1024 * 1024):
+        """Initialize the cache.
+        
+        Args:
+            cache_dir: Directory holding the cached PCM files
+            max_bytes: Size cap; least recently used entries are evicted beyond it
+            hash_sample_bytes: Bytes hashed from start, middle and end of the source
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hash_sample_bytes = hash_sample_bytes
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = self._read_index()
+        self._index_dirty = False
+        self._index_written_at = time.monotonic()
+        # Files that could not be deleted while mapped (Windows); retried later
+        self._pending_removals = set()
+        self._remove_stale_temp_files()
+        atexit.register(self.flush)
+    
+    def _remove_stale_temp_files(self):
+        """Delete temporary files of writes that never finished.
+        
+        Data files missing from this index are left alone: another process
+        sharing the directory may just have written them.
+        """
+        cutoff = time.time() - self.STALE_TEMP_S
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if name.endswith(".tmp") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+    
+    def _read_index(self):
+        """Load the index and drop entries whose data file is gone."""
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        
+        return {
+            key: entry for key, entry in index.items()
+            if os.path.exists(self._data_path(key))
+        }
+    
+    def _write_index(self):
+        """Persist the index atomically."""
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        temp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(temp_path, index_path)
+        self._index_dirty = False
+        self._index_written_at = time.monotonic()
+    
+    def flush(self):
+        """Write access times of recent hits that are not yet in the index."""
+        with self._lock:
+            if self._index_dirty:
+                self._write_index()
+    
+    def _remove(self, path):
+        """Delete a data file, or defer it while the file is still mapped.
+        
+        Windows refuses to delete a file with an open memory map; such
+        files are retried on later writes.
+        """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except PermissionError:
+            self._pending_removals.add(path)
+            return
+        except OSError:
+            pass
+        self._pending_removals.discard(path)
+    
+    def _retry_removals(self):
+        """Retry deleting files that were still mapped (lock held)."""
+        for path in list(self._pending_removals):
+            self._remove(path)
+    
+    def _data_path(self, key):
+        """Get the path of the PCM file for a key."""
+        return os.path.join(self.cache_dir, f"{key}.f32")
+    
+    def make_key(self, file_path):
+        """Build the cache key from path, size, mtime and a content hash.
+        
+        Args:
+            file_path: Path to the source audio file
+            
+        Returns:
+            str: Cache key
+        """
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        content_hash = file_content_hash(file_path, self.hash_sample_bytes)
+        
+        fingerprint = f"{file_path}|{stat.st_size}|{stat.st_mtime_ns}|{content_hash}"
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:32]
+    
+    def get(self, file_path):
+        """Look up decoded audio for a source file.
+        
+        Args:
+            file_path: Path to the source audio file
+            
+        Returns:
+            np.memmap: Cached audio (copy-on-write), or None on a miss
+        """
+        key = self.make_key(file_path)
+        
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            # Mapped under the lock so a concurrent eviction cannot delete it first
+            try:
+                audio = self._open(key, entry["samples"])
+            except FileNotFoundError:
+                # Deleted behind our back, e.g. by another process
+                del self._index[key]
+                self._index_dirty = True
+                self.misses += 1
+                return None
+            
+            entry["last_access"] = time.time()
+            self.hits += 1
+            self._index_dirty = True
+            if time.monotonic() - self._index_written_at >= self.INDEX_WRITE_INTERVAL_S:
+                self._write_index()
+        
+        return audio
+    
+    def put(self, file_path, audio_data):
+        """Store decoded audio for a source file.
+        
+        Args:
+            file_path: Path to the source audio file
+            audio_data: Decoded 16 kHz mono audio
+            
+        Returns:
+            np.memmap: The stored audio, mapped from the cache file
+        """
+        key = self.make_key(file_path)
+        audio_data = np.ascontiguousarray(audio_data, dtype=np.float32)
+        
+        data_path = self._data_path(key)
+        temp_path = f"{data_path}.{threading.get_ident()}.tmp"
+        audio_data.tofile(temp_path)
+        try:
+            os.replace(temp_path, data_path)
+        except PermissionError:
+            # The file is mapped (Windows) by an earlier put of the same key;
+            # equal keys mean equal content, so the mapped file is kept
+            os.remove(temp_path)
+            if os.path.getsize(data_path) != audio_data.nbytes:
+                raise
+        
+        with self._lock:
+            self._pending_removals.discard(data_path)
+            self._retry_removals()
+            self._index[key] = {
+                "source": os.path.abspath(file_path),
+                "samples": int(audio_data.shape[0]),
+                "bytes": int(audio_data.nbytes),
+                "last_access": time.time()
+            }
+            self._evict(keep=key)
+            self._write_index()
+            return self._open(key, audio_data.shape[0])
+    
+    def _open(self, key, samples):
+        """Map a cached PCM file without reading it."""
+        if samples == 0:
+            return np.zeros(0, dtype=np.float32)
+        # Copy-on-write keeps the array writable for consumers such as torch
+        return np.memmap(self._data_path(key), dtype=np.float32, mode="c", shape=(samples,))
+    
+    def _evict(self, keep=None):
+        """Remove least recently used entries until the cache fits its cap."""
+        total = sum(entry["bytes"] for entry in self._index.values())
+        by_age = sorted(self._index.items(), key=lambda item: item[1]["last_access"])
+        
+        for key, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._remove(self._data_path(key))
+            del self._index[key]
+            total -= entry["bytes"]
+            self.evictions += 1
+    
+    def clear(self):
+        """Remove all cached audio."""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(self._data_path(key))
+            self._retry_removals()
+            self._index = {}
+            self._write_index()
+    
+    def get_stats(self):
+        """Get cache statistics.
+        
+        Returns:
+            dict: Hits, misses, hit rate, evictions, entries and size in bytes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": sum(entry["bytes"] for entry in self._index.values()),
+                "max_bytes": self.max_bytes
+            }
@@ -2,67 +2,361 @@
 Audio file loading and processing.
 """
 import os
+import shutil
+import subprocess
+from math import gcd
 import numpy as np
-import soundfile as sf
-from pydub import AudioSegment
+from models.audio_cache import AudioCache
+from utils.tracing import tracer
+
+# Sample rate expected by Whisper
+WHISPER_SAMPLE_RATE = 16000
 
 class AudioProcessor:
     """Process audio files for transcription."""
     
-    def __init__(self):
-        """Initialize audio processor."""
-        pass
+    def __init__(self, cache=None):
+        """Initialize audio processor.
+        
+        Args:
+            cache: Optional AudioCache for decoded 16 kHz audio
+        """
+        self.ffmpeg_path = self._find_ffmpeg()
+        self.cache = cache
+    
+    @classmethod
+    def from_settings(cls, settings):
+        """Create a processor with the audio cache configured in AppSettings."""
+        return cls(cache=AudioCache(settings.audio_cache_dir, max_bytes=settings.audio_cache_max_bytes))
+    
+    def warm_up(self):
+        """Import the audio libraries ahead of the first file.
+        
+        They are imported on first use so the window opens without
+        waiting for them; call this from a background thread.
+        """
+        import soundfile
+        import scipy.signal
+    
+    def _find_ffmpeg(self):
+        """Locate the FFmpeg executable (PATH or application directory)."""
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path:
+            return ffmpeg_path
+        
+        for candidate in ("ffmpeg.exe", "ffmpeg"):
+            if os.path.exists(candidate):
+                return os.path.abspath(candidate)
+        return None
     
-    def load_audio(self, file_path):
+    def load_audio(self, file_path, target_sr=WHISPER_SAMPLE_RATE):
         """Load and process audio file from various formats.
         
         Args:
             file_path: Path to the audio file
+            target_sr: Sample rate to resample to; None keeps the native rate
             
         Returns:
-            np.array: Processed audio data as a numpy array
+            tuple: (mono float32 audio data, sample rate of that data)
             
         Raises:
             Exception: If there's an error processing the audio
         """
         file_ext = os.path.splitext(file_path)[1].lower()
+        use_cache = self.cache is not None and target_sr == WHISPER_SAMPLE_RATE
         
         try:
-            if file_ext == ".ogg":
-                data, sample_rate = sf.read(file_path)
-                if len(data.shape) > 1:
-                    data = data.mean(axis=1)
-            elif file_ext == ".mp3":
-                sound = AudioSegment.from_mp3(file_path)
-                temp_wav = os.path.join(os.path.dirname(file_path), "_temp_whisper.wav")
-                sound.export(temp_wav, format="wav")
-                data, sample_rate = sf.read(temp_wav)
-                os.remove(temp_wav)
-            elif file_ext == ".wav":
-                data, sample_rate = sf.read(file_path)
-                if len(data.shape) > 1:
-                    data = data.mean(axis=1)
-            else:
-                sound = AudioSegment.from_file(file_path)
-                temp_wav = os.path.join(os.path.dirname(file_path), "_temp_whisper.wav")
-                sound.export(temp_wav, format="wav")
-                data, sample_rate = sf.read(temp_wav)
-                os.remove(temp_wav)
+            with tracer.context(file=file_path), tracer.span("audio.load"):
+                if use_cache:
+                    with tracer.span("audio.cache_get"):
+                        cached = self.cache.get(file_path)
+                    if cached is not None:
+                        return cached, target_sr
+                
+                if file_ext in (".ogg", ".wav"):
+                    # Read float32 directly; the default would allocate float64
+                    import soundfile as sf
+                    with tracer.span("audio.read"):
+                        data, sample_rate = sf.read(file_path, dtype="float32")
+                    if target_sr is not None:
+                        data = self.resample(data, sample_rate, target_sr)
+                        sample_rate = target_sr
+                    elif len(data.shape) > 1:
+                        data = data.mean(axis=1, dtype=np.float32)
+                else:
+                    # MP3 and every other container go through FFmpeg in memory,
+                    # which also resamples when a target rate is requested
+                    data, sample_rate = self.decode_to_memory(file_path, target_sr)
+                
+                # Ensure consistent data type (float32) to prevent type mismatches
+                data = np.asarray(data, dtype=np.float32)
+                if use_cache:
+                    with tracer.span("audio.cache_put"):
+                        data = self.cache.put(file_path, data)
+                return data, sample_rate
+        
+        except Exception as e:
+            raise Exception(f"Error processing audio: {str(e)}")
+    
+    def resample(self, data, orig_sr, target_sr=WHISPER_SAMPLE_RATE, mono=True):
+        """Resample audio with a polyphase filter, optionally downmixing.
+        
+        Multi-channel input of shape (frames, channels) is filtered for all
+        channels in one call. With mono=True the channels are averaged first,
+        which is equivalent because both steps are linear and filters only
+        one channel instead of all of them.
+        
+        Args:
+            data: Audio data of shape (frames,) or (frames, channels)
+            orig_sr: Sample rate of data
+            target_sr: Desired sample rate
+            mono: Downmix to a single channel
             
-            # Ensure consistent data type (float32) to prevent type mismatches
-            data = np.asarray(data, dtype=np.float32)
+        Returns:
+            np.array: Resampled float32 audio data
+        """
+        data = np.asarray(data, dtype=np.float32)
+        if mono and data.ndim > 1:
+            data = data.mean(axis=1, dtype=np.float32)
+        
+        if orig_sr == target_sr:
             return data
+        
+        divisor = gcd(int(orig_sr), int(target_sr))
+        up = int(target_sr) // divisor
+        down = int(orig_sr) // divisor
+        from scipy.signal import resample_poly
+        with tracer.span("audio.resample", orig_sr=orig_sr, target_sr=target_sr):
+            resampled = resample_poly(data, up, down, axis=0)
+        return resampled.astype(np.float32, copy=False)
+    
+    def probe_sample_rate(self, file_path):
+        """Read the native sample rate of the first audio stream.
+        
+        Args:
+            file_path: Path to the audio file
             
-        except Exception as e:
-            raise Exception(f"Error processing audio: {str(e)}")
+        Returns:
+            int: Sample rate in Hz
+        """
+        ffprobe_path = None
+        if self.ffmpeg_path:
+            ffmpeg_dir, ffmpeg_name = os.path.split(self.ffmpeg_path)
+            candidate = os.path.join(ffmpeg_dir, ffmpeg_name.replace("ffmpeg", "ffprobe"))
+            if os.path.exists(candidate):
+                ffprobe_path = candidate
+        ffprobe_path = ffprobe_path or shutil.which("ffprobe")
+        
+        if not ffprobe_path:
+            raise RuntimeError("FFprobe not found")
+        
+        result = subprocess.run(
+            [
+                ffprobe_path, "-v", "error",
+                "-select_streams", "a:0",
+                "-show_entries", "stream=sample_rate",
+                "-of", "default=noprint_wrappers=1:nokey=1",
+                file_path
+            ],
+            capture_output=True,
+            check=True
+        )
+        return int(result.stdout.decode().strip().splitlines()[0])
     
-    def get_audio_duration(self, audio_data):
-        """Estimate audio duration in seconds (assuming 16kHz sample rate).
+    def decode_to_memory(self, file_path, sample_rate=None):
+        """Decode any FFmpeg-readable file straight into a float32 mono buffer.
+        
+        FFmpeg writes raw little-endian float32 PCM to a pipe, so no
+        intermediate file is created next to the source.
+        
+        Args:
+            file_path: Path to the audio file
+            sample_rate: Output sample rate; the native rate is kept if None
+            
+        Returns:
+            tuple: (audio data as float32 numpy array, sample rate)
+        """
+        if not self.ffmpeg_path:
+            raise RuntimeError("FFmpeg not found")
+        
+        if sample_rate is None:
+            sample_rate = self.probe_sample_rate(file_path)
+        
+        cmd = [
+            self.ffmpeg_path, "-nostdin", "-v", "error",
+            "-i", file_path,
+            "-vn", "-ac", "1", "-ar", str(sample_rate),
+            "-f", "f32le", "-"
+        ]
+        with tracer.span("audio.ffmpeg_decode", sample_rate=sample_rate):
+            result = subprocess.run(cmd, capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode(errors="replace").strip())
+        
+        # frombuffer keeps a view on the pipe output instead of copying it
+        data = np.frombuffer(result.stdout, dtype="<f4")
+        return data, sample_rate
+    
+    def iter_windows(self, file_path, window_s=30, overlap_s=0, sample_rate=WHISPER_SAMPLE_RATE):
+        """Stream a file as fixed-size float32 mono windows.
+        
+        FFmpeg decodes and resamples into a pipe that is read into a single
+        reusable buffer, so memory stays bounded by the window size no matter
+        how long the file is.
+        
+        Args:
+            file_path: Path to the audio file
+            window_s: Window length in seconds
+            overlap_s: Overlap between consecutive windows in seconds
+            sample_rate: Output sample rate
+            
+        Yields:
+            tuple: (window start in seconds, float32 numpy array)
+        """
+        if not self.ffmpeg_path:
+            raise RuntimeError("FFmpeg not found")
+        
+        window_samples = int(window_s * sample_rate)
+        overlap_samples = int(overlap_s * sample_rate)
+        if window_samples <= 0 or not 0 <= overlap_samples < window_samples:
+            raise ValueError("overlap_s must be smaller than window_s")
+        
+        cmd = [
+            self.ffmpeg_path, "-nostdin", "-v", "error",
+            "-i", file_path,
+            "-vn", "-ac", "1", "-ar", str(sample_rate),
+            "-f", "f32le", "-"
+        ]
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        
+        buffer = np.empty(window_samples, dtype=np.float32)
+        buffer_bytes = memoryview(buffer.view(np.uint8))
+        window_bytes = buffer.nbytes
+        overlap_bytes = overlap_samples * buffer.itemsize
+        filled_bytes = 0
+        window_start = 0
+        
+        try:
+            while True:
+                # Fill the window from the pipe; short reads are normal
+                eof = False
+                while filled_bytes < window_bytes:
+                    read = process.stdout.readinto(buffer_bytes[filled_bytes:])
+                    if not read:
+                        eof = True
+                        break
+                    filled_bytes += read
+                
+                filled = filled_bytes // buffer.itemsize
+                if filled > overlap_samples or (window_start == 0 and filled):
+                    yield window_start / sample_rate, buffer[:filled].copy()
+                
+                if eof:
+                    break
+                
+                # Keep the overlap at the head of the buffer for the next window
+                buffer[:overlap_samples] = buffer[filled - overlap_samples:filled]
+                window_start += filled - overlap_samples
+                filled_bytes = overlap_bytes
+            
+            process.wait()
+            if process.returncode != 0:
+                raise RuntimeError(process.stderr.read().decode(errors="replace").strip())
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            process.stderr.close()
+    
+    def get_audio_duration(self, audio_data, sample_rate=WHISPER_SAMPLE_RATE):
+        """Get audio duration in seconds.
         
         Args:
             audio_data: Audio data as numpy array
+            sample_rate: Sample rate of audio_data, as returned by load_audio
             
         Returns:
-            float: Estimated duration in seconds
+            float: Duration in seconds
         """
-        return len(audio_data) / 16000  # Assuming 16kHz sample rate
+        return len(audio_data) / sample_rate
+
+class StreamResampler:
+    """Resample a stream chunk by chunk with the filter of AudioProcessor.resample.
+    
+    Resampling each chunk on its own restarts the filter at every chunk
+    boundary, which adds a click per chunk. The last input samples are
+    kept between calls instead, so the concatenated output matches
+    resampling the whole stream at once; each call holds back the few
+    output samples whose filter reaches into audio not yet received.
+    """
+    
+    def __init__(self, orig_sr, target_sr=WHISPER_SAMPLE_RATE):
+        """Initialize the resampler.
+        
+        Args:
+            orig_sr: Sample rate of the input
+            target_sr: Desired sample rate
+        """
+        divisor = gcd(int(orig_sr), int(target_sr))
+        self.up = int(target_sr) // divisor
+        self.down = int(orig_sr) // divisor
+        self.received = 0
+        self.emitted = 0
+        if self.up == self.down:
+            return
+        
+        # Same low-pass filter as scipy.signal.resample_poly
+        from scipy.signal import firwin
+        max_rate = max(self.up, self.down)
+        self.delay = 10 * max_rate
+        taps = firwin(2 * self.delay + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * self.up
+        self.taps_per_phase = -(-len(taps) // self.up)
+        taps = np.pad(taps, (0, self.taps_per_phase * self.up - len(taps)))
+        # phases[p, k] weighs the input sample k steps before the output position
+        self._phases = taps.reshape(self.taps_per_phase, self.up).T.astype(np.float32)
+        # The stream is preceded by silence, like the zero padding of resample_poly
+        self._history = np.zeros(self.taps_per_phase, dtype=np.float32)
+        self._history_start = -self.taps_per_phase
+    
+    def process(self, data):
+        """Resample the next chunk of a mono stream.
+        
+        Args:
+            data: float32 samples following the previous chunk
+            
+        Returns:
+            np.array: float32 output that can be computed so far
+        """
+        data = np.asarray(data, dtype=np.float32)
+        self.received += len(data)
+        if self.up == self.down:
+            self.emitted += len(data)
+            return data
+        
+        self._history = np.concatenate((self._history, data))
+        # Output m needs the input sample at (m * down + delay) // up
+        end = (self.received * self.up - 1 - self.delay) // self.down + 1
+        return self._emit(max(end, self.emitted))
+    
+    def flush(self):
+        """Get the output held back at the end of the stream."""
+        if self.up == self.down:
+            return np.zeros(0, dtype=np.float32)
+        total = -(-self.received * self.up // self.down)
+        self._history = np.concatenate((self._history, np.zeros(self.taps_per_phase, dtype=np.float32)))
+        return self._emit(total)
+    
+    def _emit(self, end):
+        """Compute the outputs up to end and drop input no longer needed."""
+        positions = np.arange(self.emitted, end) * self.down + self.delay
+        newest = positions // self.up - self._history_start
+        indices = newest[:, None] - np.arange(self.taps_per_phase)[None, :]
+        output = np.einsum("ij,ij->i", self._phases[positions % self.up], self._history[indices])
+        self.emitted = end
+        
+        oldest = (self.emitted * self.down + self.delay) // self.up - self.taps_per_phase + 1
+        drop = min(max(oldest - self._history_start, 0), len(self._history))
+        self._history = self._history[drop:]
+        self._history_start += drop
+        return output.astype(np.float32, copy=False)
@@ -0,0 +1,213 @@
+"""
+Processing time estimates learned from the real-time factors of finished jobs.
+"""
+import json
+import math
+import os
+import threading
+import time
+from models.memory_budget import DEFAULT_FOOTPRINTS
+
+# Real-time factor of the base model before any job was measured
+PRIOR_RTF = {"cuda": 0.1, "cpu": 0.3}
+
+# Spread of log(RTF) assumed while few jobs have been measured
+PRIOR_LOG_STD = 0.7
+
+# Measured jobs needed before a group of samples is trusted on its own
+MIN_SAMPLES = 3
+
+# z-scores of two-sided confidence levels
+Z_SCORES = {0.5: 0.674, 0.8: 1.282, 0.9: 1.645, 0.95: 1.960}
+
+def default_factors(device="cpu"):
+    """Relative model speed from the default footprints (base = 1.0)."""
+    return {size: footprint / DEFAULT_FOOTPRINTS["base"] for size, footprint in DEFAULT_FOOTPRINTS.items()}
+
+def length_bucket(audio_s):
+    """Classify audio length; short files pay relatively more fixed overhead."""
+    if audio_s < 60:
+        return "short"
+    if audio_s < 600:
+        return "medium"
+    return "long"
+
+def density_bucket(audio_s, speech_s):
+    """Classify how much of the audio is speech."""
+    return "sparse" if audio_s and speech_s / audio_s < 0.5 else "dense"
+
+class ProcessingTimeEstimator:
+    """Predict transcription time from the history of finished jobs.
+    
+    Every finished job is stored with its real-time factor (processing
+    seconds per second of transcribed speech), the model, device and
+    thread count, and the length and speech density of the audio. A
+    prediction uses the log real-time factors of the most specific group
+    with enough samples: the same conditions, then the same model, device
+    and threads, then the same model and device, then other models on the
+    device scaled by their relative speed. Without history it falls back
+    to a prior with wide bounds.
+    """
+    
+    def __init__(self, history_path=None, max_samples=500, recent=20, factors=None):
+        """Initialize the estimator.
+        
+        Args:
+            history_path: JSON file the history is persisted in; None keeps
+                          it in memory only
+            max_samples: Number of jobs kept in the history
+            recent: Number of most recent matching jobs a prediction uses
+            factors: Callable device -> {model size: relative speed};
+                     scales samples between model sizes and the prior
+        """
+        self.history_path = history_path
+        self.max_samples = max_samples
+        self.recent = recent
+        self.factors = factors or default_factors
+        self._lock = threading.Lock()
+        self._samples = self._read()
+    
+    def _read(self):
+        """Load the history, or start empty if it is missing or unreadable."""
+        if not self.history_path:
+            return []
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("samples", [])
+        except (OSError, ValueError, AttributeError):
+            return []
+    
+    def _write(self):
+        """Persist the history atomically."""
+        if not self.history_path:
+            return
+        directory = os.path.dirname(self.history_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.history_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"samples": self._samples}, f)
+        os.replace(temp_path, self.history_path)
+    
+    def record(self, model_size, device, threads, audio_s, speech_s, elapsed_s):
+        """Store the outcome of a finished job.
+        
+        Args:
+            model_size: Model size (e.g. "small", or "small:int8" when quantized)
+            device: "cuda" or "cpu"
+            threads: Torch thread count (None if unknown)
+            audio_s: Duration of the audio in seconds
+            speech_s: Seconds of audio that were transcribed
+            elapsed_s: Processing time in seconds
+        """
+        if speech_s <= 0 or elapsed_s <= 0:
+            return
+        sample = {
+            "model": model_size,
+            "device": device,
+            "threads": threads,
+            "length": length_bucket(audio_s),
+            "density": density_bucket(audio_s, speech_s),
+            "rtf": elapsed_s / speech_s,
+            "at": time.time()
+        }
+        with self._lock:
+            self._samples.append(sample)
+            del self._samples[:-self.max_samples]
+            self._write()
+    
+    @staticmethod
+    def _factor(factors, model_size):
+        """Relative speed of a model size (quantized sizes use their base size)."""
+        return factors.get(model_size.split(":")[0], 1.0)
+    
+    def _log_rtfs(self, model_size, device, threads, length, density):
+        """Log real-time factors of the most specific group with enough samples.
+        
+        Returns:
+            tuple: (list of log RTFs, basis name)
+        """
+        conditions = [
+            ("exact", lambda s: s["model"] == model_size and s["threads"] == threads
+                and s["length"] == length and s["density"] == density),
+            ("model_threads", lambda s: s["model"] == model_size and s["threads"] == threads),
+            ("model", lambda s: s["model"] == model_size),
+            ("device", lambda s: True),
+        ]
+        factors = self.factors(device)
+        factor = self._factor(factors, model_size)
+        with self._lock:
+            samples = [s for s in self._samples if s["device"] == device]
+        
+        for basis, matches in conditions:
+            matching = [s for s in samples if matches(s)][-self.recent:]
+            if len(matching) >= MIN_SAMPLES or (basis == "device" and matching):
+                # Other model sizes are scaled by their relative speed
+                return [
+                    math.log(s["rtf"] * factor / self._factor(factors, s["model"]))
+                    for s in matching
+                ], basis
+        return [], "prior"
+    
+    def predict(self, model_size, device, threads, audio_s, speech_s=None, confidence=0.8):
+        """Predict the processing time of a job.
+        
+        Args:
+            model_size: Model size (as passed to record())
+            device: "cuda" or "cpu"
+            threads: Torch thread count
+            audio_s: Duration of the audio in seconds
+            speech_s: Seconds of speech to transcribe (defaults to audio_s)
+            confidence: Confidence level of the bounds (0.5, 0.8, 0.9 or 0.95)
+            
+        Returns:
+            dict: seconds (median estimate), low, high, rtf, samples and
+                  basis ("exact", "model_threads", "model", "device" or "prior")
+        """
+        speech_s = audio_s if speech_s is None else speech_s
+        values, basis = self._log_rtfs(
+            model_size, device, threads, length_bucket(audio_s), density_bucket(audio_s, speech_s)
+        )
+        
+        if values:
+            count = len(values)
+            mean = sum(values) / count
+            variance = sum((value - mean) ** 2 for value in values) / max(count - 1, 1)
+            # Shrink toward the prior spread while there are few samples;
+            # the 1 + 1/n term widens the interval for a single new job
+            weight = 2.0
+            spread = math.sqrt(
+                ((count - 1) * variance + weight * PRIOR_LOG_STD ** 2) / (count - 1 + weight)
+                * (1 + 1 / count)
+            )
+        else:
+            count = 0
+            factor = self._factor(self.factors(device), model_size)
+            mean = math.log(PRIOR_RTF.get(device, PRIOR_RTF["cpu"]) * factor)
+            spread = PRIOR_LOG_STD
+        
+        z = Z_SCORES.get(confidence, Z_SCORES[0.8])
+        rtf = math.exp(mean)
+        return {
+            "seconds": rtf * speech_s,
+            "low": math.exp(mean - z * spread) * speech_s,
+            "high": math.exp(mean + z * spread) * speech_s,
+            "rtf": rtf,
+            "samples": count,
+            "basis": basis
+        }
+    
+    def get_stats(self):
+        """Get the number of recorded jobs per model and device.
+        
+        Returns:
+            dict: "model@device" -> {"jobs", "median_rtf"}
+        """
+        groups = {}
+        with self._lock:
+            for sample in self._samples:
+                groups.setdefault(f"{sample['model']}@{sample['device']}", []).append(sample["rtf"])
+        return {
+            key: {"jobs": len(rtfs), "median_rtf": sorted(rtfs)[len(rtfs) // 2]}
+            for key, rtfs in groups.items()
+        }
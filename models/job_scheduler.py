@@ -0,0 +1,340 @@
+"""
+Bounded priority job scheduler for transcription work.
+"""
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class JobState:
+    """Possible states of a scheduled job."""
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class JobCancelled(Exception):
+    """Raised inside a job when its cancellation token has been triggered."""
+
+class JobTimeout(JobCancelled):
+    """Raised inside a job when it has exceeded its wall-clock timeout."""
+
+class CancellationToken:
+    """Cooperative cancellation flag with an optional deadline."""
+    
+    def __init__(self):
+        """Initialize an untriggered token without a deadline."""
+        self._event = threading.Event()
+        self.reason = None
+        self.deadline = None
+    
+    def cancel(self, reason="Cancelled"):
+        """Request cancellation."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+    
+    def set_timeout(self, seconds):
+        """Cancel automatically once seconds have passed from now."""
+        self.deadline = time.monotonic() + seconds if seconds else None
+    
+    @property
+    def is_cancelled(self):
+        """Whether cancellation was requested or the deadline has passed."""
+        return self._event.is_set() or (
+            self.deadline is not None and time.monotonic() > self.deadline
+        )
+    
+    def raise_if_cancelled(self):
+        """Raise JobCancelled or JobTimeout if the job should stop.
+        
+        Called by long-running work at safe points, e.g. between decoding
+        windows.
+        """
+        if self._event.is_set():
+            raise JobCancelled(self.reason)
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.cancel("Timed out")
+            raise JobTimeout(self.reason)
+
+class Job:
+    """A unit of work tracked by the JobScheduler."""
+    
+    def __init__(self, job_id, name, priority, func, args, kwargs, timeout=None, estimate_s=None):
+        """Initialize a job.
+        
+        Args:
+            job_id: Unique job id
+            name: Human readable job name
+            priority: Lower values run first
+            func: Callable to execute
+            args: Positional arguments for func
+            kwargs: Keyword arguments for func
+            timeout: Wall-clock limit in seconds once the job is running
+            estimate_s: Predicted run time in seconds, if known
+        """
+        self.id = job_id
+        self.name = name
+        self.priority = priority
+        self.estimate_s = estimate_s
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.token = CancellationToken()
+        
+        self.state = JobState.QUEUED
+        self.future = Future()
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+    
+    def cancel(self, reason="Cancelled"):
+        """Cancel the job.
+        
+        A queued job is dropped immediately; a running job stops at its next
+        cancellation check.
+        
+        Returns:
+            bool: True if the job had not finished yet
+        """
+        if self.future.done():
+            return False
+        self.token.cancel(reason)
+        if self.future.cancel():
+            self.state = JobState.CANCELLED
+            self.error = reason
+            self.finished_at = time.time()
+        return True
+    
+    def add_done_callback(self, callback):
+        """Call callback(job) once the job has finished or failed."""
+        self.future.add_done_callback(lambda _: callback(self))
+    
+    def result(self, timeout=None):
+        """Wait for the job and return its result (re-raises its exception)."""
+        return self.future.result(timeout)
+    
+    def to_dict(self):
+        """Get a snapshot of the job for monitoring."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "priority": self.priority,
+            "estimate_s": self.estimate_s,
+            "state": self.state,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+class JobScheduler:
+    """Run jobs on a fixed number of worker threads from a bounded priority queue.
+    
+    Within a priority, jobs with a shorter predicted run time go first when
+    shortest_job_first is set; jobs without a prediction follow in
+    submission order.
+    """
+    
+    PRIORITY_HIGH = 0
+    PRIORITY_NORMAL = 10
+    PRIORITY_LOW = 20
+    
+    def __init__(self, max_workers=1, max_queue=16, history_size=100, shortest_job_first=True):
+        """Initialize the scheduler.
+        
+        Args:
+            max_workers: Number of worker threads
+            max_queue: Maximum number of queued (not yet running) jobs
+            history_size: Number of finished jobs kept for get_jobs()
+            shortest_job_first: Order jobs of equal priority by estimate_s
+        """
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self.shortest_job_first = shortest_job_first
+        
+        # Unbounded so shutdown sentinels always fit; max_queue is enforced by the slots
+        self._queue = queue.PriorityQueue()
+        self._slots = threading.BoundedSemaphore(max_queue)
+        # Ids of queued jobs holding a slot; cancelling one frees it right away
+        self._queued = set()
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._workers = []
+        self._shutdown = False
+        self._local = threading.local()
+    
+    def _ensure_workers(self):
+        """Start worker threads on first use."""
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"transcription-worker-{len(self._workers) + 1}",
+                daemon=True
+            )
+            self._workers.append(worker)
+            worker.start()
+    
+    def submit(self, func, *args, priority=PRIORITY_NORMAL, name=None,
+               callback=None, block=False, timeout=None, job_timeout=None,
+               estimate_s=None, **kwargs):
+        """Queue a job.
+        
+        Args:
+            func: Callable to execute on a worker thread
+            *args: Positional arguments for func
+            priority: Lower values run first
+            name: Human readable job name
+            callback: Optional callback(job) when the job finishes
+            block: Wait for a free queue slot instead of failing
+            timeout: Maximum time to wait when block is True
+            job_timeout: Wall-clock limit in seconds once the job is running
+            estimate_s: Predicted run time in seconds for shortest-job-first
+                        ordering
+            **kwargs: Keyword arguments for func
+            
+        Returns:
+            Job: The queued job
+            
+        Raises:
+            queue.Full: If the queue is full
+            RuntimeError: If the scheduler has been shut down
+        """
+        if self._shutdown:
+            raise RuntimeError("Scheduler has been shut down")
+        if not self._slots.acquire(blocking=block, timeout=timeout if block else None):
+            raise queue.Full
+        if self._shutdown:
+            self._slots.release()
+            raise RuntimeError("Scheduler has been shut down")
+        
+        with self._lock:
+            job_id = next(self._ids)
+            job = Job(
+                job_id, name or getattr(func, "__name__", "job"),
+                priority, func, args, kwargs, timeout=job_timeout, estimate_s=estimate_s
+            )
+            self._jobs[job_id] = job
+            self._queued.add(job_id)
+            self._ensure_workers()
+        
+        # A job cancelled while queued stays in the queue until a worker pops it
+        job.add_done_callback(self._release_slot)
+        if callback:
+            job.add_done_callback(callback)
+        
+        order = estimate_s if self.shortest_job_first and estimate_s is not None else float("inf")
+        self._queue.put((priority, order, job_id, job))
+        return job
+    
+    def _worker_loop(self):
+        """Take jobs from the queue and run them."""
+        while True:
+            _, _, _, job = self._queue.get()
+            if job is None:
+                break
+            self._release_slot(job)
+            
+            if not job.future.set_running_or_notify_cancel():
+                # Cancelled through its future while still queued
+                self._queue.task_done()
+                continue
+            
+            job.state = JobState.RUNNING
+            job.started_at = time.time()
+            if job.timeout:
+                job.token.set_timeout(job.timeout)
+            self._local.job = job
+            try:
+                result = job.func(*job.args, **job.kwargs)
+            except JobCancelled as e:
+                job.error = str(e)
+                job.state = JobState.CANCELLED
+                job.finished_at = time.time()
+                job.future.set_exception(e)
+            except Exception as e:
+                job.error = str(e)
+                job.state = JobState.FAILED
+                job.finished_at = time.time()
+                job.future.set_exception(e)
+            else:
+                job.state = JobState.DONE
+                job.finished_at = time.time()
+                job.future.set_result(result)
+            finally:
+                self._local.job = None
+                self._queue.task_done()
+                self._prune_history()
+    
+    def _release_slot(self, job):
+        """Return the queue slot of a job once it leaves the queue or is cancelled."""
+        with self._lock:
+            if job.id not in self._queued:
+                return
+            self._queued.discard(job.id)
+        self._slots.release()
+    
+    def current_job(self):
+        """Get the job running on the calling worker thread, or None."""
+        return getattr(self._local, "job", None)
+    
+    def cancel_all(self, reason="Cancelled"):
+        """Cancel every queued and running job."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel(reason)
+    
+    def _prune_history(self):
+        """Forget the oldest finished jobs beyond history_size."""
+        with self._lock:
+            finished = [
+                job for job in self._jobs.values()
+                if job.state in (JobState.DONE, JobState.FAILED, JobState.CANCELLED)
+            ]
+            for job in finished[:max(len(finished) - self.history_size, 0)]:
+                del self._jobs[job.id]
+    
+    def get_job(self, job_id):
+        """Get a job by id, or None if unknown."""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def get_jobs(self, state=None):
+        """Get snapshots of known jobs, optionally filtered by state."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in jobs if state is None or job.state == state]
+    
+    def queued_count(self):
+        """Get the number of jobs waiting for a worker (cancelled ones excluded)."""
+        with self._lock:
+            return len(self._queued)
+    
+    def shutdown(self, wait=True):
+        """Cancel the queued jobs and stop the workers once running jobs finish.
+        
+        Args:
+            wait: Block until all workers have exited
+        """
+        self._shutdown = True
+        while True:
+            try:
+                _, _, _, job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                self._release_slot(job)
+                job.cancel("Scheduler shut down")
+            self._queue.task_done()
+        for _ in self._workers:
+            self._queue.put_nowait((float("inf"), float("inf"), float("inf"), None))
+        if wait:
+            for worker in self._workers:
+                worker.join()
@@ -0,0 +1,308 @@
+"""
+Memory budget for loading Whisper models: measured footprints and admission checks.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+GB = 1024 ** 3
+
+# Model sizes from smallest to largest
+MODEL_ORDER = ["tiny", "base", "small", "medium", "large"]
+
+# Approximate resident memory per model until a load has been measured
+DEFAULT_FOOTPRINTS = {
+    "tiny": 1 * GB,
+    "base": 1 * GB,
+    "small": 2 * GB,
+    "medium": 5 * GB,
+    "large": 10 * GB
+}
+
+def available_memory():
+    """Get the memory available for new allocations in bytes, or None if unknown."""
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/meminfo", "r", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("MemAvailable:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+    
+    if sys.platform == "win32":
+        import ctypes
+        
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong)
+            ]
+        
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+    
+    return None
+
+def process_rss():
+    """Get the resident set size of this process in bytes, or None if unknown."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def process_memory(pid=None):
+    """Get the memory of a process.
+    
+    Resident pages include shared memory mapped by several processes;
+    private pages belong to the process alone.
+    
+    Args:
+        pid: Process id, defaults to this process
+        
+    Returns:
+        dict: {"rss": bytes or None, "private": bytes or None}
+    """
+    if psutil is not None:
+        try:
+            info = psutil.Process(pid).memory_full_info()
+            return {"rss": info.rss, "private": getattr(info, "uss", None)}
+        except (psutil.Error, OSError):
+            return {"rss": None, "private": None}
+    
+    memory = {"rss": None, "private": None}
+    try:
+        with open(f"/proc/{pid or 'self'}/smaps_rollup", "r", encoding="ascii") as f:
+            fields = {
+                line.split(":")[0]: int(line.split()[1]) * 1024
+                for line in f if line.rstrip().endswith("kB")
+            }
+        memory["rss"] = fields.get("Rss")
+        memory["private"] = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    except (OSError, ValueError, IndexError):
+        if pid is None:
+            memory["rss"] = process_rss()
+    return memory
+
+class ModelFootprints:
+    """Table of measured model memory footprints persisted as JSON.
+    
+    Entries are kept per device and model key, e.g.
+    {"cpu": {"small": {"bytes": 2147483648, "load_s": 3.2}, "small:int8": {...}}};
+    a key is a model size, with ":int8" appended for quantized models.
+    """
+    
+    def __init__(self, table_path):
+        """Initialize the table.
+        
+        Args:
+            table_path: Path of the JSON file holding measured footprints
+        """
+        self.table_path = table_path
+        self._table = self._read()
+    
+    def _read(self):
+        """Load the table, or start empty if it is missing or unreadable."""
+        try:
+            with open(self.table_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write(self):
+        """Persist the table atomically."""
+        directory = os.path.dirname(self.table_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.table_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._table, f, indent=2)
+        os.replace(temp_path, self.table_path)
+    
+    def get(self, model_size, device="cpu"):
+        """Get the footprint of a model in bytes (measured, else the default).
+        
+        An unmeasured int8 model is assumed to need as much as the fp32 one.
+        """
+        entry = self._table.get(device, {}).get(model_size)
+        if entry:
+            return entry["bytes"]
+        size = model_size.split(":")[0]
+        if size != model_size and self.is_measured(size, device):
+            return self.get(size, device)
+        return DEFAULT_FOOTPRINTS.get(size, DEFAULT_FOOTPRINTS["large"])
+    
+    def is_measured(self, model_size, device="cpu"):
+        """Whether the footprint of a model has been measured on this device."""
+        return model_size in self._table.get(device, {})
+    
+    def record(self, model_size, footprint, load_s=None, device="cpu"):
+        """Store a measured footprint.
+        
+        Args:
+            model_size: Model key: the size, e.g. "small" or "small:int8"
+            footprint: Measured memory in bytes
+            load_s: Measured load time in seconds
+            device: Device the model was loaded onto
+        """
+        self._table.setdefault(device, {})[model_size] = {
+            "bytes": int(footprint),
+            "load_s": load_s
+        }
+        self._write()
+    
+    def get_factors(self, device="cpu"):
+        """Get processing time factors relative to the base model.
+        
+        Compute per decoded token grows with the number of weights, so the
+        footprint ratio stands in for the relative speed.
+        
+        Returns:
+            dict: Model size -> factor (base = 1.0)
+        """
+        base = self.get("base", device)
+        return {size: self.get(size, device) / base for size in MODEL_ORDER}
+
+class MemoryBudget:
+    """Check available memory before a model is loaded."""
+    
+    POLICY_REFUSE = "refuse"
+    POLICY_FALLBACK = "fallback"
+    
+    def __init__(self, footprints, device="cpu", headroom_bytes=512 * 1024 ** 2,
+                 policy=POLICY_FALLBACK):
+        """Initialize the budget.
+        
+        Args:
+            footprints: ModelFootprints table
+            device: Device models are loaded onto
+            headroom_bytes: Memory kept free for audio and decoding
+            policy: What to do when a model does not fit after evicting
+                    idle models: "refuse" or "fallback" to the largest
+                    model that fits
+        """
+        self.footprints = footprints
+        self.device = device
+        self.headroom_bytes = headroom_bytes
+        self.policy = policy
+    
+    def available(self):
+        """Get the memory available for a new model in bytes, or None if unknown."""
+        if self.device == "cuda":
+            import torch
+            free, _ = torch.cuda.mem_get_info()
+            return free
+        return available_memory()
+    
+    def fits(self, model_size, key=None):
+        """Whether a model fits into the available memory minus the headroom.
+        
+        Args:
+            model_size: Model size
+            key: Callable mapping a size to its footprint key (default: the size)
+        """
+        available = self.available()
+        if available is None:
+            return True
+        footprint = self.footprints.get(key(model_size) if key else model_size, self.device)
+        return footprint + self.headroom_bytes <= available
+    
+    def admit(self, model_size, registry=None, in_use=None, key=None):
+        """Decide which model to load.
+        
+        Idle resident models are evicted (least recently used first) until
+        the requested model fits.
+        
+        Args:
+            model_size: Requested model size
+            registry: Optional ModelRegistry whose idle models may be evicted
+            in_use: Model size currently in use, which is never evicted
+            key: Callable mapping a size to its footprint key, so int8
+                 models are admitted by their own footprint
+            
+        Returns:
+            str: The model size to load
+            
+        Raises:
+            MemoryError: If no acceptable model fits
+        """
+        if self.fits(model_size, key):
+            return model_size
+        
+        if registry is not None:
+            for resident in registry.get_stats()["resident"]:
+                if resident == in_use:
+                    continue
+                registry.evict(resident)
+                if self.fits(model_size, key):
+                    return model_size
+        
+        if self.policy == self.POLICY_FALLBACK:
+            smaller = MODEL_ORDER[:MODEL_ORDER.index(model_size)] if model_size in MODEL_ORDER else []
+            for candidate in reversed(smaller):
+                if (registry is not None and registry.is_resident(candidate)) or self.fits(candidate, key):
+                    return candidate
+        
+        required = self.footprints.get(key(model_size) if key else model_size, self.device)
+        required += self.headroom_bytes
+        raise MemoryError(
+            f"Not enough memory for the {model_size} model: needs about "
+            f"{required / GB:.1f} GB, {self.available() / GB:.1f} GB available"
+        )
+    
+    @contextmanager
+    def measure(self, model_size):
+        """Measure the memory a model load adds and record it in the footprint table.
+        
+        Args:
+            model_size: Footprint key of the model, e.g. "small" or "small:int8"
+            
+        Yields:
+            dict: Filled with "model" by the caller; its weight size is used
+                  when the memory delta cannot be measured
+        """
+        loaded = {}
+        before = self._used()
+        start = time.perf_counter()
+        yield loaded
+        load_s = time.perf_counter() - start
+        after = self._used()
+        
+        footprint = after - before if before is not None and after is not None else 0
+        model = loaded.get("model")
+        if model is not None:
+            from models.model_registry import model_bytes
+            # Freed memory may be reused by the load, so never go below the weights
+            footprint = max(footprint, model_bytes(model))
+        if footprint > 0:
+            self.footprints.record(model_size, footprint, load_s, self.device)
+    
+    def _used(self):
+        """Get the memory used by this process (or CUDA allocator) in bytes."""
+        if self.device == "cuda":
+            import torch
+            return torch.cuda.memory_allocated()
+        return process_rss()
@@ -0,0 +1,160 @@
+"""
+Registry of resident Whisper models with least-recently-used eviction.
+"""
+import gc
+import threading
+import time
+from collections import OrderedDict
+
+def model_bytes(model):
+    """Get the memory held by a model's parameters and buffers in bytes."""
+    tensors = list(model.parameters()) + list(model.buffers())
+    for module in model.modules():
+        # Packed weights of quantized layers are not parameters
+        weight = getattr(module, "weight", None)
+        if callable(weight):
+            tensors.append(weight())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+def _whisper_loader(model_size, device):
+    """Load a model with Whisper's own loader."""
+    import whisper
+    return whisper.load_model(model_size, device=device)
+
+class ModelRegistry:
+    """Keep several loaded models resident so switching back needs no reload."""
+    
+    def __init__(self, device="cpu", max_models=2, max_bytes=None, loader=None):
+        """Initialize the registry.
+        
+        Args:
+            device: Torch device models are loaded onto
+            max_models: Maximum number of resident models
+            max_bytes: Optional cap on the weights of all resident models
+            loader: Callable(model_size, device) returning a model;
+                    defaults to whisper.load_model
+        """
+        self.device = device
+        self.max_models = max(1, max_models)
+        self.max_bytes = max_bytes
+        self.loader = loader or _whisper_loader
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_times = {}
+        
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+    
+    def get(self, model_size):
+        """Get a model, loading it if it is not resident.
+        
+        Args:
+            model_size: Whisper model size
+            
+        Returns:
+            Model: The loaded model
+        """
+        with self._lock:
+            model = self._models.get(model_size)
+            if model is not None:
+                self._models.move_to_end(model_size)
+                self.hits += 1
+                return model
+            self.misses += 1
+        
+        # Load outside the lock so lookups of resident models are not blocked
+        start = time.perf_counter()
+        model = self.loader(model_size, self.device)
+        self.load_times[model_size] = time.perf_counter() - start
+        
+        with self._lock:
+            self._models[model_size] = model
+            self._sizes[model_size] = model_bytes(model)
+            self._evict(keep=model_size)
+        return model
+    
+    def is_resident(self, model_size):
+        """Whether a model is loaded and can be used without disk I/O."""
+        with self._lock:
+            return model_size in self._models
+    
+    def resident_bytes(self):
+        """Get the total size of the resident models' weights in bytes."""
+        with self._lock:
+            return sum(self._sizes.values())
+    
+    def _evict(self, keep):
+        """Drop least recently used models until the limits hold."""
+        evicted = False
+        while len(self._models) > 1 and (
+            len(self._models) > self.max_models
+            or (self.max_bytes and sum(self._sizes.values()) > self.max_bytes)
+        ):
+            model_size = next(iter(self._models))
+            if model_size == keep:
+                break
+            del self._models[model_size]
+            del self._sizes[model_size]
+            self.evictions += 1
+            evicted = True
+        
+        if evicted:
+            self._release_memory()
+    
+    def evict(self, model_size):
+        """Unload one model.
+        
+        Returns:
+            bool: True if the model was resident
+        """
+        with self._lock:
+            if model_size not in self._models:
+                return False
+            del self._models[model_size]
+            del self._sizes[model_size]
+            self.evictions += 1
+        self._release_memory()
+        return True
+    
+    def clear(self):
+        """Unload all models."""
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+        self._release_memory()
+    
+    def _release_memory(self):
+        """Return the memory of dropped models to the system.
+        
+        A model still referenced elsewhere (e.g. by a running
+        transcription) is freed once that reference goes away.
+        """
+        gc.collect()
+        if self.device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+    
+    def get_stats(self):
+        """Get registry statistics.
+        
+        Returns:
+            dict: Resident models (most recent last), their sizes in bytes,
+                  hits, misses, evictions and the last load time per size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "resident": list(self._models),
+                "resident_bytes": dict(self._sizes),
+                "total_bytes": sum(self._sizes.values()),
+                "max_models": self.max_models,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "load_times": dict(self.load_times)
+            }
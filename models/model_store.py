@@ -0,0 +1,152 @@
+"""
+Local store of Whisper models in a flat, memory-mappable layout.
+"""
+import json
+import os
+import numpy as np
+
+# Byte alignment of every tensor in the weights file
+ALIGNMENT = 64
+
+class LocalModelStore:
+    """Convert Whisper checkpoints once and map them into memory on load.
+    
+    Every model is a directory holding weights.bin, all tensors back to back
+    at aligned offsets, and meta.json with the model dimensions and the
+    dtype, shape and offset of every tensor. Loading maps the file and
+    wraps slices of it as tensors, so nothing is unpickled or copied and
+    pages are read from disk (or the page cache) on first use.
+    """
+    
+    WEIGHTS_FILE = "weights.bin"
+    META_FILE = "meta.json"
+    
+    def __init__(self, store_dir, download_root=None, offline=False):
+        """Initialize the store.
+        
+        Args:
+            store_dir: Directory holding the converted models
+            download_root: Directory of the original Whisper checkpoints
+                           (<size>.pt); Whisper's cache directory if None
+            offline: Never download; converting needs the checkpoint in
+                     download_root
+        """
+        self.store_dir = store_dir
+        self.download_root = download_root
+        self.offline = offline
+    
+    def model_dir(self, model_size, checksum):
+        """Get the directory of a converted model."""
+        return os.path.join(self.store_dir, f"{model_size}-{checksum[:12]}")
+    
+    def contains(self, model_size, checksum):
+        """Whether a model has been converted."""
+        return os.path.exists(os.path.join(self.model_dir(model_size, checksum), self.META_FILE))
+    
+    def load(self, model_size, checksum=None, device="cpu"):
+        """Load a model from the store, converting its checkpoint on first use.
+        
+        Args:
+            model_size: Whisper model size
+            checksum: Checksum of the original weights (defaults to model_size)
+            device: Torch device; anything but the CPU gets a copy of the weights
+            
+        Returns:
+            Model: The loaded Whisper model
+        """
+        checksum = checksum or model_size
+        if not self.contains(model_size, checksum):
+            self.convert(model_size, checksum)
+        
+        model = self._map(self.model_dir(model_size, checksum))
+        return model if device == "cpu" else model.to(device)
+    
+    def convert(self, model_size, checksum=None):
+        """Write a model into the store from its Whisper checkpoint.
+        
+        Raises:
+            FileNotFoundError: If offline and the checkpoint is not in download_root
+        """
+        checksum = checksum or model_size
+        source = model_size
+        if self.offline:
+            source = os.path.join(
+                self.download_root or os.path.join(os.path.expanduser("~"), ".cache", "whisper"),
+                f"{model_size}.pt"
+            )
+            if not os.path.exists(source):
+                raise FileNotFoundError(
+                    f"Model {model_size} is not in {self.store_dir} and no checkpoint "
+                    f"was found at {source} (offline mode)"
+                )
+        
+        import whisper
+        
+        model = whisper.load_model(source, device="cpu", download_root=self.download_root)
+        self._write(model, self.model_dir(model_size, checksum))
+    
+    def _write(self, model, directory):
+        """Store a model's tensors in a flat file plus a JSON index."""
+        tensors = dict(model.state_dict())
+        # Non-persistent buffers (decoder mask, alignment heads) are not in
+        # the state dict but cannot be rebuilt from the meta device
+        extras = {
+            name: buffer for name, buffer in model.named_buffers()
+            if name not in tensors
+        }
+        tensors.update(extras)
+        
+        temp_dir = f"{directory}.{os.getpid()}.tmp"
+        os.makedirs(temp_dir, exist_ok=True)
+        index = {}
+        offset = 0
+        with open(os.path.join(temp_dir, self.WEIGHTS_FILE), "wb") as f:
+            for name, tensor in tensors.items():
+                sparse = tensor.is_sparse
+                array = (tensor.to_dense() if sparse else tensor).detach().cpu().contiguous().numpy()
+                padding = -offset % ALIGNMENT
+                f.write(b"\0" * padding)
+                offset += padding
+                index[name] = {
+                    "dtype": array.dtype.str,
+                    "shape": list(array.shape),
+                    "offset": offset,
+                    "persistent": name not in extras,
+                    "sparse": sparse
+                }
+                f.write(array.tobytes())
+                offset += array.nbytes
+        
+        with open(os.path.join(temp_dir, self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"dims": model.dims.__dict__, "tensors": index}, f)
+        os.replace(temp_dir, directory)
+    
+    def _map(self, directory):
+        """Build a model whose tensors are views of the mapped weights file."""
+        import torch
+        from whisper.model import ModelDimensions, Whisper
+        
+        with open(os.path.join(directory, self.META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        # Copy-on-write: pages are shared with the page cache until written
+        weights = np.memmap(os.path.join(directory, self.WEIGHTS_FILE), dtype=np.uint8, mode="c")
+        
+        state_dict = {}
+        extras = {}
+        for name, entry in meta["tensors"].items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"], dtype=np.int64))
+            array = weights[entry["offset"]:entry["offset"] + count * dtype.itemsize]
+            tensor = torch.from_numpy(array.view(dtype).reshape(entry["shape"]))
+            if entry["sparse"]:
+                tensor = tensor.to_sparse()
+            (state_dict if entry["persistent"] else extras)[name] = tensor
+        
+        with torch.device("meta"):
+            model = Whisper(ModelDimensions(**meta["dims"]))
+        # assign=True keeps the mapped tensors instead of copying into new ones
+        model.load_state_dict(state_dict, assign=True)
+        for name, tensor in extras.items():
+            module_name, _, buffer_name = name.rpartition(".")
+            model.get_submodule(module_name).register_buffer(buffer_name, tensor, persistent=False)
+        return model.eval()
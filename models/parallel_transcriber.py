@@ -0,0 +1,378 @@
+"""
+Parallel chunked transcription of long audio across CPU cores.
+"""
+import itertools
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from models.audio_processor import WHISPER_SAMPLE_RATE
+from models.memory_budget import process_memory
+from models.vad import VoiceActivityDetector
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+def _load_model(model_size, device, model_store=None, checksum=None, quantized_store=None):
+    """Load a model from the local model store, or through Whisper without one.
+    
+    With a quantized_store the int8 model is loaded from it instead (CPU only).
+    """
+    if quantized_store is not None:
+        return quantized_store.load(
+            model_size, checksum, loader=lambda: _load_model(model_size, "cpu", model_store, checksum)
+        )
+    if model_store is not None:
+        return model_store.load(model_size, checksum, device)
+    
+    import whisper
+    return whisper.load_model(model_size, device=device)
+
+def _init_worker(model_size, threads, device, shared_model=None, model_store=None, checksum=None,
+                 quantized_store=None):
+    """Limit intra-op threads and load the model in a pool worker.
+    
+    Args:
+        model_size: Whisper model size to load
+        threads: Torch intra-op threads
+        device: Torch device
+        shared_model: Model whose weights live in shared memory; used
+                      read-only instead of loading a private copy
+        model_store: LocalModelStore to load from, so workers need no
+                     download (and work offline)
+        checksum: Checksum of the weights in the model store
+        quantized_store: QuantizedModelStore to load the int8 model from
+    """
+    global _worker_model
+    
+    # Must be set before torch spins up its thread pools (with a shared
+    # model, torch is already imported to unpickle it and
+    # set_num_threads below does the limiting)
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    
+    import torch
+    
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already initialized in this process
+        pass
+    if shared_model is not None:
+        _worker_model = shared_model
+    else:
+        _worker_model = _load_model(model_size, device, model_store, checksum, quantized_store)
+
+def _ping(delay):
+    """No-op task used to make every worker start and load its model."""
+    import time
+    time.sleep(delay)
+    return os.getpid()
+
+def _detect_language(audio_data):
+    """Detect the spoken language from the first 30 seconds of a chunk in a pool worker."""
+    import whisper
+    
+    audio = whisper.pad_or_trim(audio_data)
+    mel = whisper.log_mel_spectrogram(audio, _worker_model.dims.n_mels).to(_worker_model.device)
+    _, probabilities = _worker_model.detect_language(mel)
+    return max(probabilities, key=probabilities.get)
+
+def _transcribe_chunk(offset, audio_data, options):
+    """Transcribe one chunk in a pool worker.
+    
+    Returns:
+        tuple: (offset, list of segment dicts relative to the chunk)
+    """
+    result = _worker_model.transcribe(audio_data, **options)
+    segments = [
+        {
+            "start": segment["start"],
+            "end": segment["end"],
+            "text": segment["text"],
+            "tokens": segment.get("tokens", [])
+        }
+        for segment in result["segments"]
+    ]
+    return offset, segments
+
+def _share_weights(model):
+    """Move the weights of a CPU model into shared memory.
+    
+    Tensors in shared memory are sent to spawned processes as handles
+    (torch.multiprocessing), so every worker maps the same pages.
+    
+    Returns:
+        Model: The same model, with shared parameters and buffers
+    """
+    model.eval()
+    model.requires_grad_(False)
+    for tensor in itertools.chain(model.parameters(), model.buffers()):
+        # Sparse tensors (the alignment heads mask) have no shareable storage
+        if tensor.is_sparse or tensor.is_shared():
+            continue
+        try:
+            tensor.share_memory_()
+        except RuntimeError:
+            # Storage it does not own (e.g. a memory-mapped model store file)
+            tensor.data = tensor.data.clone().share_memory_()
+    return model
+
+def _normalize_words(text):
+    """Lower-case words without punctuation, for boundary comparison."""
+    return re.findall(r"\w+", text.lower())
+
+class ParallelTranscriber:
+    """Transcribe independent chunks of one file in a process pool."""
+    
+    def __init__(self, model_size, workers=2, threads_per_worker=None, device="cpu",
+                 chunk_s=120.0, vad=None, model=None, share_weights=True,
+                 model_store=None, checksum=None, quantized_store=None):
+        """Initialize the transcriber (worker processes start lazily).
+        
+        Args:
+            model_size: Whisper model size loaded by every worker
+            workers: Number of worker processes
+            threads_per_worker: Torch threads per worker; defaults to an
+                                even share of the CPU cores
+            device: Torch device for the workers
+            chunk_s: Nominal chunk length in seconds
+            vad: VoiceActivityDetector used to find low-energy split points
+            model: Already loaded model to share with the workers; loaded
+                   in this process when needed
+            share_weights: Keep one copy of the weights in shared memory
+                           that all workers read (CPU only); otherwise
+                           every worker loads its own copy
+            model_store: LocalModelStore the workers (and this process,
+                         when sharing) load the model from; Whisper's
+                         download cache if None
+            checksum: Checksum of the weights in the model store
+            quantized_store: QuantizedModelStore the workers load the
+                             int8 model from (CPU only; the packed int8
+                             weights cannot be shared)
+        """
+        self.model_size = model_size
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self.device = device
+        self.chunk_s = chunk_s
+        self.vad = vad or VoiceActivityDetector()
+        self.model = model
+        self.share_weights = share_weights and device == "cpu" and quantized_store is None
+        self.model_store = model_store
+        self.checksum = checksum
+        self.quantized_store = quantized_store
+        self._executor = None
+    
+    def _get_executor(self):
+        """Create the process pool on first use."""
+        if self._executor is None:
+            # Spawn avoids forking a parent that already holds torch threads
+            context = multiprocessing.get_context("spawn")
+            shared_model = None
+            if self.share_weights:
+                import torch.multiprocessing
+                
+                if self.model is None:
+                    self.model = _load_model(self.model_size, self.device, self.model_store, self.checksum)
+                # The parent keeps self.model alive for as long as workers map it
+                shared_model = _share_weights(self.model)
+                context = torch.multiprocessing.get_context("spawn")
+            
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(
+                    self.model_size, self.threads_per_worker, self.device, shared_model,
+                    self.model_store, self.checksum, self.quantized_store
+                )
+            )
+        return self._executor
+    
+    def warm_up(self):
+        """Start all workers and wait until each has loaded its model."""
+        executor = self._get_executor()
+        futures = [executor.submit(_ping, 0.2) for _ in range(self.workers)]
+        return sorted({future.result() for future in futures})
+    
+    def worker_memory(self):
+        """Get the memory of every worker process.
+        
+        With shared weights, rss counts the shared model pages in every
+        worker, while private grows only with the worker's own
+        activations and buffers.
+        
+        Returns:
+            list: {"pid", "rss", "private"} dicts (bytes), one per worker
+        """
+        if self._executor is None:
+            return []
+        # ProcessPoolExecutor keeps no public list of its processes
+        pids = sorted(getattr(self._executor, "_processes", None) or {})
+        return [dict(process_memory(pid), pid=pid) for pid in pids]
+    
+    def plan_chunks(self, audio_data, speech_regions=None):
+        """Cut audio into the chunks the workers decode.
+        
+        Args:
+            audio_data: 16 kHz mono audio as numpy array
+            speech_regions: Optional (start_seconds, end_seconds) tuples from
+                            VoiceActivityDetector.detect; only these are decoded
+            
+        Returns:
+            list: (start_seconds, audio slice) tuples
+        """
+        if speech_regions is None:
+            return self.vad.split(audio_data, chunk_s=self.chunk_s)
+        return list(self.vad.plan_chunks(audio_data, speech_regions, chunk_s=self.chunk_s, search_s=10.0))
+    
+    def transcribe(self, audio_data, token=None, options=None, meter=None, on_segment=None,
+                   speech_regions=None):
+        """Transcribe audio by splitting it at pauses and decoding chunks in parallel.
+        
+        The language is detected once, on the first chunk, and passed to
+        every chunk, so the chunks neither detect it again nor disagree.
+        
+        Args:
+            audio_data: 16 kHz mono audio as numpy array
+            token: Optional CancellationToken checked while waiting for chunks
+            options: Extra keyword arguments for model.transcribe
+            meter: Optional ProgressMeter updated as chunks finish
+            on_segment: Optional callback receiving stitched segments in
+                        timeline order as soon as all earlier chunks are done
+            speech_regions: Optional (start_seconds, end_seconds) tuples from
+                            VoiceActivityDetector.detect; only these are decoded
+            
+        Returns:
+            dict: {"text": full text, "segments": list of segment dicts,
+                   "language": language code passed to the chunks}
+        """
+        executor = self._get_executor()
+        chunks = self.plan_chunks(audio_data, speech_regions)
+        durations = {offset: len(chunk) / WHISPER_SAMPLE_RATE for offset, chunk in chunks}
+        if meter is not None:
+            # Chunks include the short pauses between the regions they group
+            meter.audio_total_s = sum(durations.values())
+        options = dict(options or {})
+        if chunks and not options.get("language"):
+            options["language"] = executor.submit(_detect_language, chunks[0][1]).result()
+        pending = {
+            executor.submit(_transcribe_chunk, offset, chunk, options)
+            for offset, chunk in chunks
+        }
+        
+        # Chunks finish in any order; stitch the contiguous finished prefix
+        order = [offset for offset, _ in chunks]
+        finished = {}
+        segments = []
+        next_index = 0
+        try:
+            while pending:
+                if token is not None:
+                    token.raise_if_cancelled()
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    offset, chunk_segments = future.result()
+                    finished[offset] = chunk_segments
+                    if meter is not None:
+                        meter.add_audio(durations[offset], len(chunk_segments))
+                
+                while next_index < len(order) and order[next_index] in finished:
+                    offset = order[next_index]
+                    stitched = self._stitch_chunk(segments, offset, finished.pop(offset))
+                    segments.extend(stitched)
+                    if on_segment:
+                        for segment in stitched:
+                            on_segment(segment)
+                    next_index += 1
+        except BaseException:
+            # Chunks already running finish in their worker; queued ones are dropped
+            for future in pending:
+                future.cancel()
+            raise
+        
+        text = "".join(segment["text"] for segment in segments).strip()
+        return {"text": text, "segments": segments, "language": options.get("language")}
+    
+    def stitch(self, chunk_results):
+        """Merge per-chunk segments onto one timeline.
+        
+        Args:
+            chunk_results: (offset, segments) tuples in any order
+            
+        Returns:
+            dict: {"text": full text, "segments": list of segment dicts}
+        """
+        segments = []
+        for offset, chunk_segments in sorted(chunk_results, key=lambda item: item[0]):
+            segments.extend(self._stitch_chunk(segments, offset, chunk_segments))
+        
+        text = "".join(segment["text"] for segment in segments).strip()
+        return {"text": text, "segments": segments}
+    
+    def _stitch_chunk(self, segments, offset, chunk_segments):
+        """Shift one chunk's segments onto the timeline and dedupe against the previous chunk.
+        
+        Args:
+            segments: Already stitched segments
+            offset: Start of the chunk in seconds
+            chunk_segments: Segments relative to the chunk
+            
+        Returns:
+            list: Segments to append
+        """
+        shifted = [
+            dict(segment, start=segment["start"] + offset, end=segment["end"] + offset)
+            for segment in chunk_segments
+        ]
+        if segments and shifted:
+            shifted = self._dedupe_boundary(segments[-1], shifted)
+        return shifted
+    
+    def _dedupe_boundary(self, previous, following, max_words=8, min_words=2):
+        """Drop words repeated at the start of a chunk from the end of the one before.
+        
+        A cut inside a pause rarely splits words, but Whisper sometimes
+        re-emits the last words of the previous chunk at the start of the
+        next one.
+        
+        Args:
+            previous: Last segment of the previous chunk
+            following: Segments of the next chunk
+            max_words: Longest repeated word sequence to look for
+            min_words: Shortest sequence treated as a repeat (single common
+                       words like "the" match too easily)
+            
+        Returns:
+            list: following, with the duplicated leading words removed
+        """
+        previous_words = _normalize_words(previous["text"])
+        first_words = _normalize_words(following[0]["text"])
+        
+        for length in range(min(max_words, len(previous_words), len(first_words)), min_words - 1, -1):
+            if previous_words[-length:] == first_words[:length]:
+                break
+        else:
+            return following
+        
+        if length == len(first_words):
+            return following[1:]
+        
+        # Remove the first `length` words from the original text
+        raw_words = following[0]["text"].split()
+        trimmed, seen = [], 0
+        for word in raw_words:
+            if seen < length and _normalize_words(word):
+                seen += len(_normalize_words(word))
+                continue
+            trimmed.append(word)
+        first = dict(following[0], text=" " + " ".join(trimmed))
+        return [first] + following[1:]
+    
+    def shutdown(self):
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,84 @@
+"""
+Progress measurement for running transcriptions.
+"""
+import threading
+import time
+
+class ProgressMeter:
+    """Accumulate decoding progress and report it as progress events.
+    
+    A progress event is a dict with:
+        audio_done_s: Seconds of audio fully decoded
+        audio_total_s: Seconds of audio to decode (None if unknown)
+        fraction: audio_done_s / audio_total_s (None if unknown)
+        segments_done: Number of finished segments
+        tokens_done: Number of decoder steps
+        tokens_per_s: Decoder steps per wall-clock second
+        audio_per_s: Seconds of audio decoded per wall-clock second
+        elapsed_s: Wall-clock seconds since decoding started
+        eta_s: Remaining seconds at the measured throughput (None if unknown)
+    """
+    
+    def __init__(self, callback=None, audio_total_s=None, min_interval=0.25):
+        """Initialize the meter.
+        
+        Args:
+            callback: Called with each progress event
+            audio_total_s: Total seconds of audio to decode, if known
+            min_interval: Minimum seconds between token-driven events
+        """
+        self.callback = callback
+        self.audio_total_s = audio_total_s
+        self.min_interval = min_interval
+        
+        self.audio_done_s = 0.0
+        self.segments_done = 0
+        self.tokens_done = 0
+        self.start_time = time.monotonic()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+    
+    def add_tokens(self, count=1):
+        """Record decoder steps; emits at most every min_interval seconds."""
+        with self._lock:
+            self.tokens_done += count
+            due = time.monotonic() - self._last_emit >= self.min_interval
+        if due:
+            self.emit()
+    
+    def add_audio(self, seconds, segments=0):
+        """Record a fully decoded stretch of audio and its segments, then emit."""
+        with self._lock:
+            self.audio_done_s += seconds
+            self.segments_done += segments
+        self.emit()
+    
+    def snapshot(self):
+        """Build the current progress event."""
+        with self._lock:
+            elapsed = max(time.monotonic() - self.start_time, 1e-6)
+            audio_per_s = self.audio_done_s / elapsed
+            fraction = None
+            eta = None
+            if self.audio_total_s:
+                fraction = min(self.audio_done_s / self.audio_total_s, 1.0)
+                if audio_per_s > 0:
+                    eta = max(self.audio_total_s - self.audio_done_s, 0.0) / audio_per_s
+            
+            return {
+                "audio_done_s": self.audio_done_s,
+                "audio_total_s": self.audio_total_s,
+                "fraction": fraction,
+                "segments_done": self.segments_done,
+                "tokens_done": self.tokens_done,
+                "tokens_per_s": self.tokens_done / elapsed,
+                "audio_per_s": audio_per_s,
+                "elapsed_s": elapsed,
+                "eta_s": eta
+            }
+    
+    def emit(self):
+        """Send the current progress event to the callback."""
+        self._last_emit = time.monotonic()
+        if self.callback:
+            self.callback(self.snapshot())
@@ -0,0 +1,141 @@
+"""
+Dynamic int8 quantization of Whisper models for CPU inference, cached on disk.
+"""
+import os
+
+def _plain_linears(module):
+    """Replace Whisper's nn.Linear subclass with plain nn.Linear modules.
+    
+    quantize_dynamic only converts modules whose type is exactly
+    nn.Linear; the weights are shared, not copied.
+    """
+    import torch
+    
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            linear = torch.nn.Linear(
+                child.in_features, child.out_features,
+                bias=child.bias is not None, device="meta"
+            )
+            linear.weight = child.weight
+            linear.bias = child.bias
+            setattr(module, name, linear)
+        else:
+            _plain_linears(child)
+    return module
+
+def quantize_model(model):
+    """Quantize the Linear layers of a CPU model to int8 with dynamic activation scales.
+    
+    Args:
+        model: fp32 Whisper model on the CPU
+        
+    Returns:
+        Model: The quantized model (embeddings, convolutions and layer
+               norms stay fp32)
+    """
+    import torch
+    
+    alignment_heads = model.alignment_heads
+    # In place: a copy would hold a second fp32 model during the conversion
+    model = torch.quantization.quantize_dynamic(
+        _plain_linears(model.eval()), {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+    model.register_buffer("alignment_heads", alignment_heads, persistent=False)
+    return model
+
+class QuantizedModelStore:
+    """Load int8 models from disk, quantizing and saving them on first use."""
+    
+    def __init__(self, store_dir, download_root=None):
+        """Initialize the store.
+        
+        Args:
+            store_dir: Directory holding the quantized checkpoints
+            download_root: Directory of the fp32 Whisper checkpoints
+        """
+        self.store_dir = store_dir
+        self.download_root = download_root
+    
+    def path(self, model_size, checksum):
+        """Get the checkpoint path of a quantized model.
+        
+        The fp32 checksum and torch version are part of the name, since
+        packed int8 weights are only readable by the torch build that
+        wrote them.
+        """
+        import torch
+        
+        name = f"{model_size}-{checksum[:12]}-int8-torch{torch.__version__.split('+')[0]}.pt"
+        return os.path.join(self.store_dir, name)
+    
+    def load(self, model_size, checksum=None, loader=None):
+        """Get the quantized model, creating the checkpoint if needed.
+        
+        Args:
+            model_size: Whisper model size
+            checksum: Checksum of the fp32 weights (defaults to model_size)
+            loader: Callable returning the fp32 CPU model to quantize;
+                    defaults to whisper.load_model
+            
+        Returns:
+            Model: Quantized Whisper model on the CPU
+        """
+        path = self.path(model_size, checksum or model_size)
+        if os.path.exists(path):
+            try:
+                return self._read(path)
+            except Exception as e:
+                print(f"Discarding unreadable quantized model {path}: {e}")
+                os.remove(path)
+        
+        if loader is None:
+            import whisper
+            model = whisper.load_model(model_size, device="cpu", download_root=self.download_root)
+        else:
+            model = loader()
+        model = quantize_model(model)
+        self._write(model, path)
+        return model
+    
+    def _read(self, path):
+        """Rebuild the quantized architecture and load the saved weights into it."""
+        import torch
+        from whisper.model import ModelDimensions, Whisper
+        
+        checkpoint = torch.load(path, map_location="cpu", weights_only=False)
+        with torch.device("meta"):
+            skeleton = Whisper(ModelDimensions(**checkpoint["dims"]))
+        skeleton.to_empty(device="cpu")
+        # Defined values for the observers; the saved weights replace them
+        with torch.no_grad():
+            for parameter in skeleton.parameters():
+                parameter.zero_()
+        # Non-persistent buffers (decoder mask, alignment heads) are not in
+        # the state dict and would stay uninitialized after to_empty()
+        if "buffers" not in checkpoint:
+            raise ValueError("checkpoint has no non-persistent buffers")
+        for name, buffer in checkpoint["buffers"].items():
+            module_name, _, buffer_name = name.rpartition(".")
+            skeleton.get_submodule(module_name).register_buffer(buffer_name, buffer, persistent=False)
+        
+        model = quantize_model(skeleton)
+        model.load_state_dict(checkpoint["model_state_dict"])
+        return model
+    
+    def _write(self, model, path):
+        """Save a quantized model atomically."""
+        import torch
+        
+        os.makedirs(self.store_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        state_dict = model.state_dict()
+        torch.save({
+            "dims": model.dims.__dict__,
+            "buffers": {
+                name: buffer for name, buffer in model.named_buffers()
+                if name not in state_dict
+            },
+            "model_state_dict": state_dict
+        }, temp_path)
+        os.replace(temp_path, path)
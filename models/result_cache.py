@@ -0,0 +1,232 @@
+"""
+Persistent cache of finished transcriptions keyed by audio content and decode settings.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from models.audio_cache import file_content_hash
+
+class TranscriptionResultCache:
+    """Store transcription results in SQLite as compressed JSON with LRU eviction."""
+    
+    # Remembered file hashes; the oldest are forgotten beyond this (uploads
+    # to the server get a new path every time)
+    MAX_FILE_HASHES = 10000
+    
+    def __init__(self, db_path, max_bytes=256 * 1024 ** 2):
+        """Initialize the cache.
+        
+        Args:
+            db_path: Path of the SQLite database file
+            max_bytes: Size cap for stored payloads; least recently used
+                       results are evicted beyond it
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash TEXT NOT NULL
+            );
+        """)
+        self._connection.commit()
+    
+    def audio_hash(self, file_path):
+        """Get the content hash of an audio file.
+        
+        The full-file hash is remembered per path, size and mtime, so files
+        seen before are not read again.
+        
+        Args:
+            file_path: Path to the audio file
+            
+        Returns:
+            str: Hex digest of the file content
+        """
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT hash FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (file_path, stat.st_size, stat.st_mtime_ns)
+            ).fetchone()
+        if row:
+            return row[0]
+        
+        content_hash = file_content_hash(file_path)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                (file_path, stat.st_size, stat.st_mtime_ns, content_hash)
+            )
+            self._prune_file_hashes()
+            self._connection.commit()
+        return content_hash
+    
+    def forget_file(self, file_path):
+        """Drop the remembered hash of a file that is about to be deleted."""
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM file_hashes WHERE path = ?", (os.path.abspath(file_path),)
+            )
+            self._connection.commit()
+    
+    def _prune_file_hashes(self):
+        """Forget the oldest remembered hashes beyond MAX_FILE_HASHES (lock held)."""
+        # INSERT OR REPLACE gives a row a new rowid, so rowid order is insertion order
+        self._connection.execute(
+            "DELETE FROM file_hashes WHERE rowid <= "
+            "(SELECT MAX(rowid) FROM file_hashes) - ?",
+            (self.MAX_FILE_HASHES,)
+        )
+    
+    def make_key(self, audio_hash, model_size, model_checksum, language=None, options=None):
+        """Build the cache key.
+        
+        Args:
+            audio_hash: Content hash of the audio file
+            model_size: Whisper model size
+            model_checksum: Checksum identifying the model weights
+            language: Transcription language, None for auto-detection
+            options: Dict of decode options that affect the result
+            
+        Returns:
+            str: Cache key
+        """
+        material = json.dumps({
+            "audio": audio_hash,
+            "model": model_size,
+            "checksum": model_checksum,
+            "language": language,
+            "options": options or {}
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+    
+    def get(self, key):
+        """Look up a result.
+        
+        Args:
+            key: Cache key from make_key()
+            
+        Returns:
+            dict: {"text", "segments"}, or None on a miss
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._connection.execute(
+                "UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._connection.commit()
+        
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+    
+    def put(self, key, result):
+        """Store a result.
+        
+        Args:
+            key: Cache key from make_key()
+            result: Result dict with "text" and "segments"
+        """
+        compact = {
+            "text": result["text"],
+            "segments": [
+                {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+                for segment in result.get("segments", [])
+            ]
+        }
+        payload = zlib.compress(
+            json.dumps(compact, separators=(",", ":")).encode("utf-8"), 6
+        )
+        now = time.time()
+        
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (key, payload, size, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now)
+            )
+            self._evict()
+            self._connection.commit()
+    
+    def _evict(self):
+        """Delete least recently used results until the cache fits its cap."""
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        rows = self._connection.execute(
+            "SELECT key, size FROM results ORDER BY last_access"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+    
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._connection.execute("DELETE FROM results")
+            self._connection.execute("DELETE FROM file_hashes")
+            self._connection.commit()
+    
+    def get_stats(self):
+        """Get cache statistics.
+        
+        Returns:
+            dict: Hits, misses, hit rate, evictions, entries and size in bytes
+        """
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes
+            }
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
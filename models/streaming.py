@@ -0,0 +1,289 @@
+"""
+Live transcription of a PCM stream with partial and final segments.
+"""
+import threading
+import time
+from collections import deque
+import numpy as np
+from models.audio_processor import WHISPER_SAMPLE_RATE
+from models.job_scheduler import JobScheduler
+from models.vad import SpeechEndpointer
+from utils.tracing import tracer
+
+def percentile(values, q):
+    """Percentile of a list (None if empty)."""
+    return float(np.percentile(values, q)) if values else None
+
+class PCMRingBuffer:
+    """Fixed-size buffer holding the most recent seconds of a stream.
+    
+    Positions are absolute sample counts since the stream started, so
+    readers address audio by its place on the stream timeline; audio
+    older than capacity_s has been overwritten.
+    """
+    
+    def __init__(self, capacity_s=60.0, sample_rate=WHISPER_SAMPLE_RATE):
+        """Initialize an empty buffer.
+        
+        Args:
+            capacity_s: Seconds of audio kept
+            sample_rate: Sample rate of the stream
+        """
+        self.sample_rate = sample_rate
+        self.capacity = int(capacity_s * sample_rate)
+        self.written = 0
+        self._buffer = np.zeros(self.capacity, dtype=np.float32)
+        self._lock = threading.Lock()
+    
+    @property
+    def oldest(self):
+        """Position of the oldest sample still held."""
+        return max(self.written - self.capacity, 0)
+    
+    def write(self, samples):
+        """Append samples, overwriting the oldest ones when full."""
+        samples = np.asarray(samples, dtype=np.float32)
+        with self._lock:
+            # Only the last capacity samples of an oversized write survive
+            self.written += len(samples) - min(len(samples), self.capacity)
+            samples = samples[len(samples) - min(len(samples), self.capacity):]
+            index = self.written % self.capacity
+            first = min(len(samples), self.capacity - index)
+            self._buffer[index:index + first] = samples[:first]
+            self._buffer[:len(samples) - first] = samples[first:]
+            self.written += len(samples)
+    
+    def read(self, start, end):
+        """Copy the samples between two positions.
+        
+        Args:
+            start: First position; clipped to the oldest sample held
+            end: Position after the last sample; clipped to what was written
+            
+        Returns:
+            numpy.ndarray: float32 copy of the samples
+        """
+        with self._lock:
+            start = max(start, self.written - self.capacity, 0)
+            end = min(end, self.written)
+            if end <= start:
+                return np.zeros(0, dtype=np.float32)
+            first, last = start % self.capacity, end % self.capacity
+            if first < last:
+                return self._buffer[first:last].copy()
+            return np.concatenate((self._buffer[first:], self._buffer[:last]))
+
+class StreamingTranscriber:
+    """Transcribe a live stream while it arrives.
+    
+    Audio is fed from a reader thread into a ring buffer and through a
+    SpeechEndpointer. A decode thread re-transcribes the open utterance
+    every partial_interval_s and emits it as a "partial" segment; once
+    the utterance ends it is transcribed once more and emitted as
+    "final". Finals take precedence over partials, and a partial always
+    covers the latest audio, so a slow model skips partials instead of
+    falling further behind. Every segment carries its latency: the time
+    from the arrival of the newest audio it covers until it was emitted.
+    """
+    
+    def __init__(self, engine, endpointer=None, sample_rate=WHISPER_SAMPLE_RATE,
+                 buffer_s=60.0, partial_interval_s=1.0, on_segment=None):
+        """Initialize the transcriber.
+        
+        Args:
+            engine: TranscriptionEngine with a loaded model
+            endpointer: SpeechEndpointer finding utterances (default one if None)
+            sample_rate: Sample rate of the fed audio (must be 16 kHz for Whisper)
+            buffer_s: Seconds of audio kept; must exceed the longest utterance
+            partial_interval_s: Seconds between partial decodes of an open
+                                utterance (0 disables partials)
+            on_segment: Callback receiving each segment dict: type
+                        ("partial" or "final"), start, end, text, latency_s;
+                        a failed decode is reported once as type "error"
+                        with start, end and error
+        """
+        self.engine = engine
+        self.endpointer = endpointer or SpeechEndpointer(sample_rate=sample_rate)
+        self.sample_rate = sample_rate
+        self.buffer = PCMRingBuffer(buffer_s, sample_rate)
+        self.partial_interval_s = partial_interval_s
+        self.on_segment = on_segment
+        
+        self._arrivals = deque()
+        self._finals = deque()
+        self._utterance_start = None
+        self._last_partial_end = 0
+        self._last_partial_at = 0.0
+        self._closed = False
+        self.error = None
+        self._condition = threading.Condition()
+        self._thread = None
+        
+        self.stats = {"partial_latency_s": [], "final_latency_s": [], "decode_s": 0.0, "decodes": 0}
+    
+    def start(self):
+        """Start the decode thread."""
+        self._thread = threading.Thread(target=self._decode_loop, name="stream-decode", daemon=True)
+        self._thread.start()
+    
+    def feed(self, samples):
+        """Feed float32 samples in [-1, 1] following the previous ones.
+        
+        Raises:
+            RuntimeError: If a decode failed and the stream was stopped
+        """
+        if self.error is not None:
+            raise RuntimeError(f"Stream stopped: {self.error}")
+        now = time.monotonic()
+        self.buffer.write(samples)
+        events = self.endpointer.process(samples)
+        with self._condition:
+            self._arrivals.append((self.buffer.written, now))
+            self._apply_events(events)
+            self._trim_arrivals()
+            self._condition.notify()
+    
+    def close(self, timeout=None):
+        """End the stream, wait for the last final segment and stop.
+        
+        Args:
+            timeout: Seconds to wait for outstanding decodes, None = no limit
+        """
+        with self._condition:
+            self._apply_events(self.endpointer.flush())
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def _apply_events(self, events):
+        """Open utterances and queue finished ones for their final decode (lock held)."""
+        for kind, seconds in events:
+            if kind == "start":
+                self._utterance_start = seconds
+            elif self._utterance_start is not None:
+                self._finals.append((self._utterance_start, seconds))
+                self._utterance_start = None
+    
+    def _trim_arrivals(self):
+        """Forget arrival times of audio no longer in the buffer (lock held)."""
+        while len(self._arrivals) > 1 and self._arrivals[1][0] <= self.buffer.oldest:
+            self._arrivals.popleft()
+    
+    def _arrival(self, position):
+        """Wall-clock time at which the sample at a position arrived (lock held)."""
+        for written, arrived in self._arrivals:
+            if written >= position:
+                return arrived
+        return time.monotonic()
+    
+    def _next_task(self):
+        """Wait for the next decode: a final, a due partial, or None once closed."""
+        with self._condition:
+            while True:
+                if self._finals:
+                    return ("final",) + self._finals.popleft()
+                if self._closed:
+                    return None
+                
+                if self.partial_interval_s and self._utterance_start is not None:
+                    end = self.buffer.written
+                    wait_s = self._last_partial_at + self.partial_interval_s - time.monotonic()
+                    if wait_s <= 0 and end > self._last_partial_end:
+                        return ("partial", self._utterance_start, end / self.sample_rate)
+                    self._condition.wait(max(wait_s, 0.01))
+                else:
+                    self._condition.wait(0.1)
+    
+    def _decode_loop(self):
+        """Decode partials and finals until the stream is closed or a decode fails."""
+        try:
+            self._decode_tasks()
+        except Exception as e:
+            self._fail(e)
+    
+    def _fail(self, error):
+        """Stop the stream after a failed decode and report the error."""
+        with self._condition:
+            self.error = str(error) or type(error).__name__
+            self._closed = True
+            self._finals.clear()
+            self._condition.notify_all()
+            start_s = self._utterance_start or 0.0
+        if self.on_segment:
+            self.on_segment({
+                "type": "error",
+                "start": start_s,
+                "end": self.buffer.written / self.sample_rate,
+                "error": self.error
+            })
+    
+    def _decode_tasks(self):
+        """Decode partials and finals until the stream is closed."""
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+            kind, start_s, end_s = task
+            start = int(start_s * self.sample_rate)
+            end = int(end_s * self.sample_rate)
+            if kind == "partial":
+                self._last_partial_at = time.monotonic()
+                self._last_partial_end = end
+            
+            audio = self.buffer.read(start, end)
+            if len(audio) < self.sample_rate * 0.1:
+                continue
+            with tracer.span(f"stream.{kind}", duration_s=len(audio) / self.sample_rate):
+                text = self._transcribe(audio)
+            
+            emitted = time.monotonic()
+            with self._condition:
+                latency = emitted - self._arrival(end)
+            self.stats[f"{kind}_latency_s"].append(latency)
+            if self.on_segment and (text or kind == "final"):
+                self.on_segment({
+                    "type": kind,
+                    "start": start / self.sample_rate,
+                    "end": end / self.sample_rate,
+                    "text": text,
+                    "latency_s": latency
+                })
+    
+    def _transcribe(self, audio):
+        """Run one stretch of audio through the engine ahead of queued file jobs."""
+        decode_start = time.perf_counter()
+        # Stream decodes would crowd file jobs out of the estimator history
+        job = self.engine.transcribe(audio, priority=JobScheduler.PRIORITY_HIGH, record_time=False)
+        if not job:
+            raise RuntimeError("Model not loaded")
+        try:
+            text = job.result()["text"].strip()
+        finally:
+            self.stats["decode_s"] += time.perf_counter() - decode_start
+            self.stats["decodes"] += 1
+        return text
+    
+    def get_stats(self):
+        """Summarize latency and throughput so far.
+        
+        Returns:
+            dict: audio_s, decode_s, rtf (decode seconds per second of
+                  audio), counts and p50/p95/max latency of partial and
+                  final segments, and error (None unless a decode failed)
+        """
+        audio_s = self.buffer.written / self.sample_rate
+        summary = {
+            "error": self.error,
+            "audio_s": audio_s,
+            "decode_s": self.stats["decode_s"],
+            "decodes": self.stats["decodes"],
+            "rtf": self.stats["decode_s"] / audio_s if audio_s else None
+        }
+        for kind in ("partial", "final"):
+            latencies = self.stats[f"{kind}_latency_s"]
+            summary[f"{kind}s"] = len(latencies)
+            summary[f"{kind}_latency_p50_s"] = percentile(latencies, 50)
+            summary[f"{kind}_latency_p95_s"] = percentile(latencies, 95)
+            summary[f"{kind}_latency_max_s"] = max(latencies) if latencies else None
+        return summary
@@ -1,27 +1,193 @@
 """
 Handles the Whisper model and transcription processes.
 """
-import torch
-import whisper
+import gc
+import queue
 import threading
+import time
+from contextlib import contextmanager
+from models.audio_processor import WHISPER_SAMPLE_RATE
+from models.estimator import ProcessingTimeEstimator
+from models.job_scheduler import JobScheduler, JobCancelled
+from models.memory_budget import MemoryBudget
+from models.model_registry import ModelRegistry
+from models.model_store import LocalModelStore
+from models.parallel_transcriber import ParallelTranscriber
+from models.progress import ProgressMeter
+from models.quantization import QuantizedModelStore
+from models.result_cache import TranscriptionResultCache
+from models.vad import VoiceActivityDetector
+from utils.tracing import tracer
+
+# SHA256 of the Whisper checkpoints, as embedded in whisper._MODELS download
+# URLs; kept here so building a cache key does not import whisper and torch
+MODEL_CHECKSUMS = {
+    "tiny.en": "d3dd57d32accea0b295c96e26691aa14d8822fac7d9d27d5dc00b4ca2826dd03",
+    "tiny": "65147644a518d12f04e32d6f3b26facc3f8dd46e5390956a9424a650c0ce22b9",
+    "base.en": "25a8566e1d0c1e2231d1c762132cd20e0f96a85d16145c3a00adf5d1ac670ead",
+    "base": "ed3a0b6b1c0edf879ad9b11b1af5a0e6ab5db9205f891f668f8b0e6c6326e34e",
+    "small.en": "f953ad0fd29cacd07d5a9eda5624af0f6bcf2258be67c92b79389873d91e0872",
+    "small": "9ecf779972d90ba49c06d968637d720dd632c55bbf19d441fb42bf17a411e794",
+    "medium.en": "d7440d1dc186f76616474e0ff0b3b6b879abc9d1a4926b7adfa41db2d497ab4f",
+    "medium": "345ae4da62f9b3d59415adc60127b97c714f32e89e936602e85993674d08dcb1",
+    "large-v1": "e4b87e7e0bf463eb8e6956e646f1e277e901512310def2c24bf0e11bd3c28e9a",
+    "large-v2": "81f7c96c852ee8fc832187b0132e569d6c3065a3252ed18e56effd0b6a73e524",
+    "large-v3": "e5b1a55b89c1367dacf97e3e19bfd829a01529dbfdeefa8caeb59b3f1b81dadb",
+    "large": "e5b1a55b89c1367dacf97e3e19bfd829a01529dbfdeefa8caeb59b3f1b81dadb",
+}
 
 class TranscriptionEngine:
     """Handles the Whisper model loading and transcription."""
     
-    def __init__(self, status_callback=None):
+    def __init__(self, status_callback=None, max_workers=1, max_queue=16, result_cache=None,
+                 resident_models=2, resident_max_bytes=None, memory_budget=None,
+                 quantized_models=(), quantized_store=None, model_store=None,
+                 estimator=None, shortest_job_first=True):
         """Initialize the transcription engine.
         
         Args:
             status_callback: Callback function for status updates
+            max_workers: Number of scheduler worker threads
+            max_queue: Maximum number of queued jobs
+            result_cache: Optional TranscriptionResultCache for finished results
+            resident_models: Number of models kept loaded for fast switching
+            resident_max_bytes: Optional cap on the weights of resident models
+            memory_budget: Optional MemoryBudget checked before loading a model
+            quantized_models: Model sizes run with int8 Linear layers on the CPU
+            quantized_store: QuantizedModelStore caching the int8 models
+            model_store: Optional LocalModelStore models are mapped from
+                         instead of unpickling Whisper checkpoints
+            estimator: ProcessingTimeEstimator learning from finished jobs;
+                       an in-memory one is used if None
+            shortest_job_first: Run queued transcriptions of equal priority
+                                in order of their predicted duration
         """
         self.model = None
         self.model_size = "small"  # Default
-        self.device = self._detect_device()
+        # Detected with the first model load, which imports torch
+        self.device = None
         self.status_callback = status_callback
         self.is_loading = False
+        self.result_cache = result_cache
+        self.quantized_models = set(quantized_models)
+        self.quantized_store = quantized_store
+        self.model_store = model_store
+        self.models = ModelRegistry(
+            self.device, max_models=resident_models, max_bytes=resident_max_bytes,
+            loader=self._load_weights
+        )
+        self.memory_budget = memory_budget
+        self.estimator = estimator or ProcessingTimeEstimator()
+        
+        self.scheduler = JobScheduler(
+            max_workers=max_workers, max_queue=max_queue, shortest_job_first=shortest_job_first
+        )
+        # Whisper installs kv-cache hooks on the model for each decode, so
+        # transcriptions on one model and model swaps must not overlap
+        self._model_lock = threading.Lock()
+        self._parallel_transcriber = None
+        self._parallel_config = None
+        
+        # Audio is decoded in pause-aligned chunks of about one Whisper
+        # window, which gives cancellation and progress points
+        self.chunk_s = 30.0
+        self.splitter = VoiceActivityDetector()
+    
+    @classmethod
+    def from_settings(cls, settings, **kwargs):
+        """Create an engine with the stores and caches configured in AppSettings.
+        
+        Args:
+            settings: AppSettings instance
+            **kwargs: Overrides for the constructor arguments
+            
+        Returns:
+            TranscriptionEngine: The configured engine
+        """
+        options = dict(
+            max_workers=settings.max_workers,
+            max_queue=settings.max_queued_jobs,
+            resident_models=settings.resident_models,
+            resident_max_bytes=settings.resident_models_max_bytes,
+            memory_budget=MemoryBudget(
+                settings.get_model_footprints(),
+                headroom_bytes=settings.memory_headroom_bytes,
+                policy=settings.memory_policy
+            ),
+            quantized_models=settings.quantized_models,
+            quantized_store=QuantizedModelStore(settings.quantized_model_dir),
+            model_store=LocalModelStore(
+                settings.model_store_dir,
+                download_root=settings.model_download_root,
+                offline=settings.offline
+            ),
+            result_cache=TranscriptionResultCache(
+                settings.result_cache_path,
+                max_bytes=settings.result_cache_max_bytes
+            ),
+            estimator=ProcessingTimeEstimator(
+                settings.job_history_path, factors=settings.get_model_factors
+            ),
+            shortest_job_first=settings.shortest_job_first
+        )
+        options.update(kwargs)
+        return cls(**options)
+    
+    def get_model_checksum(self, model_size):
+        """Get a checksum identifying the weights of a model size.
+        
+        Whisper's download URLs embed the SHA256 of each checkpoint; sizes
+        missing from MODEL_CHECKSUMS are identified by their name.
+        """
+        return MODEL_CHECKSUMS.get(model_size, model_size)
+    
+    def result_cache_key(self, file_path, model_size=None, language=None, options=None):
+        """Build the result cache key for transcribing a file.
+        
+        Args:
+            file_path: Path to the audio file
+            model_size: Model size; defaults to the current one
+            language: Transcription language, None for auto-detection
+            options: Dict of decode options that affect the result
+            
+        Returns:
+            str: Cache key, or None if no result cache is configured
+        """
+        if not self.result_cache:
+            return None
+        
+        model_size = model_size or self.model_size
+        # Before the first load the device is unknown; int8 is used on the CPU
+        if self.device is None:
+            int8 = model_size in self.quantized_models and self.quantized_store is not None
+        else:
+            int8 = self.is_quantized(model_size)
+        options = dict(options or {}, chunk_s=self.chunk_s, int8=int8)
+        return self.result_cache.make_key(
+            self.result_cache.audio_hash(file_path),
+            model_size,
+            self.get_model_checksum(model_size),
+            language,
+            options
+        )
+    
+    def get_cached_result(self, cache_key):
+        """Look up a finished result without loading the model.
+        
+        Args:
+            cache_key: Key from result_cache_key()
+            
+        Returns:
+            dict: {"text", "segments"}, or None on a miss
+        """
+        if not cache_key or not self.result_cache:
+            return None
+        return self.result_cache.get(cache_key)
     
     def _detect_device(self):
         """Detect if a GPU is available for better performance."""
+        import torch
+        
         if torch.cuda.is_available():
             device = "cuda"
             print(f"GPU detected: {torch.cuda.get_device_name(0)}")
@@ -30,27 +196,115 @@ class TranscriptionEngine:
             print("No GPU detected. Using CPU.")
         return device
     
+    def is_quantized(self, model_size):
+        """Whether a model size runs in the int8 CPU mode."""
+        return (
+            model_size in self.quantized_models
+            and self.quantized_store is not None
+            and self.device == "cpu"
+        )
+    
+    def _load_weights(self, model_size, device):
+        """Load a model for the registry, quantized if selected for its size."""
+        checksum = self.get_model_checksum(model_size)
+        if self.is_quantized(model_size):
+            return self.quantized_store.load(
+                model_size, checksum, loader=lambda: self._load_fp32(model_size, "cpu")
+            )
+        return self._load_fp32(model_size, device)
+    
+    def _load_fp32(self, model_size, device):
+        """Load the original weights, from the local model store if there is one."""
+        if self.model_store is not None:
+            return self.model_store.load(model_size, self.get_model_checksum(model_size), device)
+        
+        import whisper
+        return whisper.load_model(model_size, device=device)
+    
+    def ensure_device(self):
+        """Detect the device on first use (imports torch).
+        
+        Returns:
+            str: "cuda" or "cpu"
+        """
+        if self.device is None:
+            self.device = self._detect_device()
+            self.models.device = self.device
+            if self.memory_budget is not None:
+                self.memory_budget.device = self.device
+        return self.device
+    
+    def get_model_stats(self):
+        """Get resident model statistics (see ModelRegistry.get_stats)."""
+        return self.models.get_stats()
+    
+    def get_worker_memory(self):
+        """Get the memory of the parallel worker processes (see ParallelTranscriber.worker_memory)."""
+        if self._parallel_transcriber is None:
+            return []
+        return self._parallel_transcriber.worker_memory()
+    
     def get_device_name(self):
-        """Get the current device name (GPU/CPU)."""
+        """Get the current device name (GPU/CPU, "..." before detection)."""
+        if self.device is None:
+            return "..."
         return "GPU" if self.device == "cuda" else "CPU"
     
     def load_model(self, model_size, on_complete=None):
-        """Load Whisper model in a separate thread.
+        """Load Whisper model as a high-priority scheduler job.
+        
+        The swap waits for a running transcription to finish and runs
+        before any queued transcription. Models still resident in the
+        registry are switched to without reloading. With a memory budget,
+        a model that does not fit is refused or replaced by the largest
+        one that does; self.model_size tells which one was loaded.
         
         Args:
             model_size: Size of the model to load
             on_complete: Callback when loading completes
+            
+        Returns:
+            Job: The scheduled job, or False if a load is already pending
         """
         if self.is_loading:
             return False
         
         self.is_loading = True
-        self.model_size = model_size
+        trace_tags = tracer.current_tags()
         
         def load_model_task():
+            job_id = self.scheduler.current_job().id
             try:
-                # Load model with selected device
-                self.model = whisper.load_model(model_size, device=self.device)
+                with tracer.context(**dict(trace_tags, job_id=job_id, model=model_size)), \
+                        tracer.span("model.load"):
+                    self.ensure_device()
+                    size = model_size
+                    if self.memory_budget is not None and not self.models.is_resident(size):
+                        with tracer.span("model.admit"):
+                            size = self.memory_budget.admit(
+                                size, self.models, in_use=self.model_size if self.model else None,
+                                key=self._estimator_model
+                            )
+                    
+                    # Load outside the lock so running jobs are not blocked by disk I/O
+                    with tracer.span("model.weights", model=size):
+                        if self.memory_budget is not None and not self.models.is_resident(size):
+                            with self.memory_budget.measure(self._estimator_model(size)) as loaded:
+                                loaded["model"] = model = self.models.get(size)
+                        else:
+                            model = self.models.get(size)
+                    with tracer.span("model.lock_wait"):
+                        self._model_lock.acquire()
+                    try:
+                        previous = self.model
+                        self.model = model
+                        self.model_size = size
+                    finally:
+                        self._model_lock.release()
+                    if previous is not None and previous is not model:
+                        # Frees the previous model if the registry evicted it
+                        previous = None
+                        self._release_memory()
                 self.is_loading = False
                 if on_complete:
                     on_complete(True, None)
@@ -58,53 +312,459 @@ class TranscriptionEngine:
                 self.is_loading = False
                 if on_complete:
                     on_complete(False, str(e))
+                raise
+        
+        def load_model_done(job):
+            # A load cancelled while queued never runs the task above
+            if job.future.cancelled():
+                self.is_loading = False
+                if on_complete:
+                    on_complete(False, job.error or "Cancelled")
         
-        threading.Thread(target=load_model_task, daemon=True).start()
-        return True
+        try:
+            return self.scheduler.submit(
+                load_model_task,
+                priority=JobScheduler.PRIORITY_HIGH,
+                name=f"load:{model_size}",
+                callback=load_model_done
+            )
+        except queue.Full:
+            self.is_loading = False
+            if on_complete:
+                on_complete(False, "Job queue is full")
+            return False
     
-    def transcribe(self, audio_data, on_complete=None):
+    def transcribe(self, audio_data, on_complete=None, speech_regions=None,
+                   priority=JobScheduler.PRIORITY_NORMAL, timeout=None, on_progress=None,
+                   on_segment=None, cache_key=None, record_time=True):
         """Transcribe audio data using the loaded model.
         
         Args:
-            audio_data: Audio data as numpy array
+            audio_data: Audio data as numpy array (16 kHz)
             on_complete: Callback when transcription completes with
                         (success, transcription, error) parameters
+            speech_regions: Optional (start_seconds, end_seconds) tuples from
+                            VoiceActivityDetector.detect; only these regions
+                            are transcribed
+            priority: Scheduler priority, lower values run first
+            timeout: Wall-clock limit in seconds once the job is running
+            on_progress: Callback receiving progress events (see ProgressMeter)
+            on_segment: Callback receiving each segment dict (start, end, text)
+                        as soon as it is decoded
+            cache_key: Key from result_cache_key(); the result is stored
+                       under it when the job succeeds
+            record_time: Record the run time in the estimator; off for short
+                         decodes (e.g. live streams) unlike file jobs
+            
+        Returns:
+            Job: The scheduled job, or False if it could not be queued
         """
-        if not self.model:
+        if speech_regions is None:
+            speech_regions = [(0.0, len(audio_data) / WHISPER_SAMPLE_RATE)]
+        total_s = sum(end - start for start, end in speech_regions)
+        
+        audio_s = len(audio_data) / WHISPER_SAMPLE_RATE
+        
+        def run(token):
+            # Transcribe only speech; timestamps stay on the original timeline
+            chunks = list(self.splitter.plan_chunks(
+                audio_data, speech_regions, chunk_s=self.chunk_s, search_s=5.0
+            ))
+            # Chunks include the short pauses between the regions they group
+            decoded_s = sum(len(chunk) for _, chunk in chunks) / WHISPER_SAMPLE_RATE
+            meter = ProgressMeter(on_progress, audio_total_s=decoded_s)
+            return self._transcribe_chunks(chunks, token=token, meter=meter, on_segment=on_segment)
+        
+        return self._submit_transcription(
+            self._timed(run, audio_s, total_s) if record_time else run,
+            on_complete, priority, "transcribe", timeout,
+            cache_key=cache_key,
+            estimate_s=self.predict_processing_time(audio_s, total_s)["seconds"]
+        )
+    
+    def transcribe_windows(self, windows, on_complete=None, overlap_s=0.0,
+                           priority=JobScheduler.PRIORITY_NORMAL, timeout=None,
+                           on_progress=None, total_s=None, on_segment=None, cache_key=None):
+        """Transcribe a stream of audio windows, e.g. from AudioProcessor.iter_windows.
+        
+        Windows are consumed one at a time, so peak memory is bounded by the
+        window size rather than the length of the recording.
+        
+        Args:
+            windows: Iterable of (start_seconds, audio_data) tuples
+            on_complete: Callback when transcription completes with
+                        (success, transcription, error) parameters
+            overlap_s: Overlap between consecutive windows in seconds
+            priority: Scheduler priority, lower values run first
+            timeout: Wall-clock limit in seconds once the job is running
+            on_progress: Callback receiving progress events (see ProgressMeter)
+            total_s: Duration of the whole stream, if known, for fraction and ETA
+            on_segment: Callback receiving each segment dict as soon as it is decoded
+            cache_key: Key from result_cache_key() to store the result under
+            
+        Returns:
+            Job: The scheduled job, or False if it could not be queued
+        """
+        def run(token):
+            meter = ProgressMeter(on_progress, audio_total_s=total_s)
+            return self._transcribe_chunks(
+                windows, overlap_s=overlap_s, token=token, meter=meter, on_segment=on_segment
+            )
+        
+        # Only a stream of known length can be timed and predicted
+        estimate_s = None
+        if total_s:
+            run = self._timed(run, total_s, total_s)
+            estimate_s = self.predict_processing_time(total_s)["seconds"]
+        return self._submit_transcription(
+            run, on_complete, priority, "transcribe_windows", timeout,
+            cache_key=cache_key, estimate_s=estimate_s
+        )
+    
+    def transcribe_parallel(self, audio_data, on_complete=None, workers=2,
+                            threads_per_worker=None, chunk_s=120.0,
+                            priority=JobScheduler.PRIORITY_NORMAL, timeout=None,
+                            on_progress=None, on_segment=None, cache_key=None,
+                            share_weights=True, speech_regions=None):
+        """Transcribe long audio as independent chunks in a process pool.
+        
+        The audio is cut at low-energy points and every worker process runs
+        the current model size with a limited number of threads. Segments
+        are stitched back onto one timeline.
+        
+        Args:
+            audio_data: Audio data as numpy array (16 kHz)
+            on_complete: Callback when transcription completes with
+                        (success, transcription, error) parameters
+            workers: Number of worker processes
+            threads_per_worker: Torch threads per worker (default: cores / workers)
+            chunk_s: Nominal chunk length in seconds
+            priority: Scheduler priority, lower values run first
+            timeout: Wall-clock limit in seconds once the job is running
+            on_progress: Callback receiving progress events, one per finished chunk
+            on_segment: Callback receiving each segment dict, in timeline order
+            cache_key: Key from result_cache_key() to store the result under
+            share_weights: Let all workers read the weights of the loaded
+                           model from shared memory instead of loading a
+                           copy each (not possible for int8 models)
+            speech_regions: Optional (start_seconds, end_seconds) tuples from
+                            VoiceActivityDetector.detect; only these regions
+                            are transcribed
+            
+        Returns:
+            Job: The scheduled job, or False if it could not be queued
+        """
+        self.ensure_device()
+        # int8 workers load the quantized model themselves; it cannot be shared
+        quantized = self.is_quantized(self.model_size)
+        share_weights = share_weights and not quantized
+        config = (self.model_size, workers, threads_per_worker, self.device, share_weights)
+        if self._parallel_transcriber is None or self._parallel_config != config:
+            # Worker processes hold a model each; replace them when the setup changes
+            if self._parallel_transcriber is not None:
+                self._parallel_transcriber.shutdown()
+            self._parallel_transcriber = ParallelTranscriber(
+                self.model_size, workers=workers,
+                threads_per_worker=threads_per_worker,
+                device=self.device,
+                model=self.model if share_weights else None,
+                share_weights=share_weights,
+                model_store=self.model_store,
+                checksum=self.get_model_checksum(self.model_size),
+                quantized_store=self.quantized_store if quantized else None
+            )
+            self._parallel_config = config
+        transcriber = self._parallel_transcriber
+        transcriber.chunk_s = chunk_s
+        audio_s = len(audio_data) / WHISPER_SAMPLE_RATE
+        speech_s = sum(end - start for start, end in speech_regions) if speech_regions is not None else audio_s
+        
+        def run(token):
+            if share_weights:
+                # Workers unpickle the model when they start; no decode may
+                # have its hooks installed meanwhile
+                with self._model_lock:
+                    transcriber.warm_up()
+            meter = ProgressMeter(on_progress, audio_total_s=speech_s)
+            return transcriber.transcribe(
+                audio_data, token=token, meter=meter, on_segment=on_segment,
+                speech_regions=speech_regions
+            )
+        
+        # Timed separately from single-process runs by their process layout
+        threads = f"{workers}x{transcriber.threads_per_worker}"
+        return self._submit_transcription(
+            self._timed(run, audio_s, speech_s, threads), on_complete, priority,
+            "transcribe_parallel", timeout, use_model=False, cache_key=cache_key,
+            estimate_s=self.predict_processing_time(audio_s, speech_s, threads=threads)["seconds"]
+        )
+    
+    def _submit_transcription(self, run, on_complete, priority, name, timeout=None,
+                              use_model=True, cache_key=None, estimate_s=None):
+        """Queue a transcription that holds the model lock while it runs.
+        
+        Args:
+            run: Callable taking a CancellationToken and returning a
+                 Whisper-style result dict
+            on_complete: Callback with (success, transcription, error) parameters
+            priority: Scheduler priority
+            name: Job name
+            timeout: Wall-clock limit in seconds once the job is running
+            use_model: Whether run uses self.model (and needs the model lock)
+            cache_key: Result cache key to store the result under on success
+            estimate_s: Predicted run time for shortest-job-first ordering
+            
+        Returns:
+            Job: The scheduled job, or False if it could not be queued
+        """
+        if use_model and not self.model and not self.is_loading:
             if on_complete:
                 on_complete(False, None, "Model not loaded")
             return False
         
+        trace_tags = tracer.current_tags()
+        
         def transcribe_task():
+            job = self.scheduler.current_job()
+            token = job.token
+            cancelled = None
             try:
-                # Transcribe using loaded model
-                result = self.model.transcribe(audio_data)
-                transcription = result["text"]
-                
-                if on_complete:
-                    on_complete(True, transcription, None)
+                with tracer.context(**dict(trace_tags, job_id=job.id)), tracer.span(name):
+                    if use_model:
+                        with tracer.span("transcribe.lock_wait"):
+                            self._model_lock.acquire()
+                        try:
+                            token.raise_if_cancelled()
+                            if not self.model:
+                                raise RuntimeError("Model not loaded")
+                            with tracer.context(model=self.model_size):
+                                result = run(token)
+                        finally:
+                            self._model_lock.release()
+                    else:
+                        result = run(token)
+                    transcription = result["text"]
+                    
+                    if cache_key and self.result_cache:
+                        with tracer.span("result_cache.put"):
+                            self.result_cache.put(cache_key, result)
+                    
+                    if on_complete:
+                        with tracer.span("callback.on_complete"):
+                            on_complete(True, transcription, None)
+                return result
+            except JobCancelled as e:
+                # Leave the except block first so the traceback (and the
+                # tensors its frames reference) can be released
+                cancelled = e
             except Exception as e:
                 if on_complete:
                     on_complete(False, None, str(e))
+                raise
+            
+            reason = str(cancelled)
+            cancelled_type = type(cancelled)
+            cancelled = None
+            self._release_memory()
+            if on_complete:
+                on_complete(False, None, reason)
+            raise cancelled_type(reason)
+        
+        try:
+            job = self.scheduler.submit(
+                transcribe_task, priority=priority, name=name, job_timeout=timeout,
+                estimate_s=estimate_s
+            )
+        except queue.Full:
+            if on_complete:
+                on_complete(False, None, "Job queue is full")
+            return False
         
-        threading.Thread(target=transcribe_task, daemon=True).start()
-        return True
+        def on_done(job):
+            # Jobs cancelled while queued never run transcribe_task
+            if job.future.cancelled() and on_complete:
+                on_complete(False, None, job.token.reason or "Cancelled")
+        
+        job.add_done_callback(on_done)
+        return job
+    
+    @contextmanager
+    def _decode_hooks(self, token=None, meter=None):
+        """Observe every encoder and decoder forward pass of a running decode.
+        
+        The encoder runs once per 30 second decoding window and the decoder
+        once per token, so a running model.transcribe() stops promptly when
+        the token is cancelled, and the meter counts decoder steps. While
+        tracing is enabled every encoder pass and decoder step is a span.
+        """
+        timing = tracer.enabled
+        if (token is None and meter is None and not timing) or self.model is None:
+            yield
+            return
+        starts = {}
+        
+        def on_encoder(module, inputs):
+            if token is not None:
+                token.raise_if_cancelled()
+            if timing:
+                starts["encoder"] = time.perf_counter()
+        
+        def on_decoder(module, inputs):
+            if token is not None:
+                token.raise_if_cancelled()
+            if meter is not None:
+                meter.add_tokens()
+            if timing:
+                starts["decoder"] = time.perf_counter()
+        
+        handles = [
+            self.model.encoder.register_forward_pre_hook(on_encoder),
+            self.model.decoder.register_forward_pre_hook(on_decoder)
+        ]
+        if timing:
+            # Spans per encoder window and per decoder step (one token)
+            handles += [
+                self.model.encoder.register_forward_hook(
+                    lambda module, inputs, output: tracer.record(
+                        "model.encoder", starts.pop("encoder"), time.perf_counter()
+                    )
+                ),
+                self.model.decoder.register_forward_hook(
+                    lambda module, inputs, output: tracer.record(
+                        "model.decoder_step", starts.pop("decoder"), time.perf_counter()
+                    )
+                )
+            ]
+        try:
+            yield
+        finally:
+            for handle in handles:
+                handle.remove()
     
-    def estimate_processing_time(self, audio_duration, model_factors):
-        """Estimate processing time based on audio duration and model.
+    def _release_memory(self):
+        """Free intermediate tensors left behind by an interrupted decode."""
+        gc.collect()
+        if self.device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+    
+    def cancel_all(self, reason="Cancelled"):
+        """Cancel every queued and running job of this engine."""
+        self.scheduler.cancel_all(reason)
+    
+    def _transcribe_chunks(self, chunks, overlap_s=0.0, token=None, meter=None, on_segment=None):
+        """Transcribe consecutive audio chunks and merge them onto one timeline.
+        
+        Each chunk is decoded with the tail of the previous text as prompt.
+        The language is detected on the first chunk with speech and passed
+        to the others, which saves an encoder pass per chunk and keeps
+        them from switching languages. When chunks overlap, a segment is
+        kept by the chunk in which it starts before the middle of the
+        overlap, so no speech is emitted twice.
         
         Args:
-            audio_duration: Duration of audio in seconds
-            model_factors: Dictionary of processing time factors for each model size
+            chunks: Iterable of (start_seconds, audio_data) tuples
+            overlap_s: Overlap between consecutive chunks in seconds
+            token: Optional CancellationToken checked between and inside chunks
+            meter: Optional ProgressMeter updated per decoder step and chunk
+            on_segment: Optional callback receiving each kept segment
             
         Returns:
-            float: Estimated processing time in seconds
+            dict: {"text": full text, "segments": list of segment dicts,
+                   "language": detected language code or None}
         """
-        factor = model_factors.get(self.model_size, 1.0)
+        segments = []
+        prompt = None
+        language = None
+        half_overlap = overlap_s / 2
         
-        if self.device == "cuda":
-            # GPU is faster
-            return audio_duration * factor * 0.1
-        else:
-            # CPU is slower
-            return audio_duration * factor * 0.3
+        iterator = iter(chunks)
+        current = next(iterator, None)
+        is_first = True
+        while current is not None:
+            # Look one chunk ahead so the last chunk keeps its whole tail
+            following = next(iterator, None)
+            offset, audio_data = current
+            chunk_duration = len(audio_data) / WHISPER_SAMPLE_RATE
+            
+            if token is not None:
+                token.raise_if_cancelled()
+            with self._decode_hooks(token, meter), \
+                    tracer.span("transcribe.chunk", offset_s=offset, duration_s=chunk_duration):
+                options = {"initial_prompt": prompt}
+                if language:
+                    options["language"] = language
+                result = self.model.transcribe(audio_data, **options)
+            
+            kept = len(segments)
+            for segment in result["segments"]:
+                if not is_first and segment["start"] < half_overlap:
+                    continue
+                if following is not None and segment["start"] >= chunk_duration - half_overlap:
+                    continue
+                segments.append({
+                    "start": segment["start"] + offset,
+                    "end": segment["end"] + offset,
+                    "text": segment["text"],
+                    "tokens": segment.get("tokens", [])
+                })
+                if on_segment:
+                    on_segment(segments[-1])
+            
+            if meter is not None:
+                # Overlap at the head of the chunk was already counted
+                new_audio = chunk_duration if is_first else max(chunk_duration - overlap_s, 0.0)
+                meter.add_audio(new_audio, len(segments) - kept)
+            
+            if result["text"].strip():
+                prompt = result["text"][-200:]
+                # Detection on a chunk without speech is a guess
+                language = language or result.get("language")
+            current = following
+            is_first = False
+        
+        text = "".join(segment["text"] for segment in segments).strip()
+        return {"text": text, "segments": segments, "language": language}
+    
+    def _estimator_model(self, model_size=None):
+        """Model key for the estimator and footprint table; int8 models are tracked separately."""
+        model_size = model_size or self.model_size
+        return f"{model_size}:int8" if self.is_quantized(model_size) else model_size
+    
+    def get_thread_count(self):
+        """Get the number of torch threads, or None before the device is known."""
+        if self.device is None:
+            return None
+        import torch
+        return torch.get_num_threads()
+    
+    def predict_processing_time(self, audio_s, speech_s=None, model_size=None, threads=None):
+        """Predict how long transcribing audio will take with the current setup.
+        
+        Args:
+            audio_s: Duration of the audio in seconds
+            speech_s: Seconds of speech to transcribe (defaults to audio_s)
+            model_size: Model size; defaults to the current one
+            threads: Thread layout; defaults to the torch thread count
+            
+        Returns:
+            dict: seconds, low, high, rtf, samples and basis
+                  (see ProcessingTimeEstimator.predict)
+        """
+        return self.estimator.predict(
+            self._estimator_model(model_size), self.device or "cpu",
+            threads or self.get_thread_count(), audio_s, speech_s
+        )
+    
+    def _timed(self, run, audio_s, speech_s, threads=None):
+        """Wrap a job's run function so successful runs are recorded in the estimator."""
+        def timed_run(token):
+            model = self._estimator_model()
+            start = time.perf_counter()
+            result = run(token)
+            self.estimator.record(
+                model, self.device or "cpu", threads or self.get_thread_count(),
+                audio_s, speech_s, time.perf_counter() - start
+            )
+            return result
+        return timed_run
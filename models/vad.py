@@ -0,0 +1,365 @@
+"""
+Voice activity detection to skip silence before transcription.
+"""
+from collections import deque
+import numpy as np
+from models.audio_processor import WHISPER_SAMPLE_RATE
+from utils.tracing import tracer
+
+class VoiceActivityDetector:
+    """Detect speech regions from frame energy and spectral flatness."""
+    
+    def __init__(self, frame_ms=30, energy_margin_db=12.0, min_energy_db=-55.0,
+                 flatness_threshold=0.45, min_speech_s=0.25, min_silence_s=0.5,
+                 padding_s=0.25, block_frames=4096):
+        """Initialize the detector.
+        
+        Args:
+            frame_ms: Analysis frame length in milliseconds
+            energy_margin_db: Required level above the estimated noise floor
+            min_energy_db: Absolute level (dBFS) below which a frame is silent
+            flatness_threshold: Frames flatter than this are treated as noise
+            min_speech_s: Speech runs shorter than this are dropped
+            min_silence_s: Pauses shorter than this do not split a region
+            padding_s: Padding added around every region
+            block_frames: Frames analysed per FFT batch (bounds memory use)
+        """
+        self.frame_ms = frame_ms
+        self.energy_margin_db = energy_margin_db
+        self.min_energy_db = min_energy_db
+        self.flatness_threshold = flatness_threshold
+        self.min_speech_s = min_speech_s
+        self.min_silence_s = min_silence_s
+        self.padding_s = padding_s
+        self.block_frames = block_frames
+    
+    def frame_features(self, audio_data, sample_rate=WHISPER_SAMPLE_RATE):
+        """Compute per-frame energy (dBFS) and spectral flatness.
+        
+        Args:
+            audio_data: Mono audio as numpy array
+            sample_rate: Sample rate of audio_data
+            
+        Returns:
+            tuple: (energy_db array, flatness array), one value per frame
+        """
+        frame_len = max(1, int(sample_rate * self.frame_ms / 1000))
+        n_frames = len(audio_data) // frame_len
+        if n_frames == 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+        
+        # Non-overlapping frames as a view, no copy
+        frames = np.asarray(audio_data[:n_frames * frame_len], dtype=np.float32)
+        frames = frames.reshape(n_frames, frame_len)
+        window = np.hanning(frame_len).astype(np.float32)
+        
+        energy_db = np.empty(n_frames, dtype=np.float32)
+        flatness = np.empty(n_frames, dtype=np.float32)
+        eps = 1e-10
+        
+        for start in range(0, n_frames, self.block_frames):
+            block = frames[start:start + self.block_frames]
+            energy = np.mean(block * block, axis=1)
+            energy_db[start:start + len(block)] = 10 * np.log10(energy + eps)
+            
+            power = np.abs(np.fft.rfft(block * window, axis=1)) ** 2 + eps
+            geometric_mean = np.exp(np.mean(np.log(power), axis=1))
+            flatness[start:start + len(block)] = geometric_mean / np.mean(power, axis=1)
+        
+        return energy_db, flatness
+    
+    def detect(self, audio_data, sample_rate=WHISPER_SAMPLE_RATE):
+        """Find speech regions.
+        
+        Args:
+            audio_data: Mono audio as numpy array
+            sample_rate: Sample rate of audio_data
+            
+        Returns:
+            list: (start_seconds, end_seconds) tuples, padded and merged
+        """
+        with tracer.span("vad.features"):
+            energy_db, flatness = self.frame_features(audio_data, sample_rate)
+        if len(energy_db) == 0:
+            return []
+        
+        frame_s = self.frame_ms / 1000
+        noise_floor = np.percentile(energy_db, 10)
+        threshold = max(noise_floor + self.energy_margin_db, self.min_energy_db)
+        is_speech = (energy_db > threshold) & (flatness < self.flatness_threshold)
+        
+        # Run boundaries of the boolean mask
+        edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1) * frame_s
+        ends = np.flatnonzero(edges == -1) * frame_s
+        if len(starts) == 0:
+            return []
+        
+        # Close short pauses, then drop runs that are still too short
+        gaps = starts[1:] - ends[:-1]
+        group_starts = np.flatnonzero(np.concatenate(([True], gaps >= self.min_silence_s)))
+        group_ends = np.concatenate((group_starts[1:] - 1, [len(ends) - 1]))
+        starts, ends = starts[group_starts], ends[group_ends]
+        
+        long_enough = (ends - starts) >= self.min_speech_s
+        starts, ends = starts[long_enough], ends[long_enough]
+        
+        duration = len(audio_data) / sample_rate
+        starts = np.maximum(starts - self.padding_s, 0.0)
+        ends = np.minimum(ends + self.padding_s, duration)
+        
+        # Padding can make neighbours overlap again
+        regions = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if regions and start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+            else:
+                regions.append((start, end))
+        return regions
+    
+    def split_points(self, audio_data, sample_rate=WHISPER_SAMPLE_RATE, chunk_s=120.0, search_s=10.0):
+        """Choose cut points for splitting long audio into independent chunks.
+        
+        Each cut is placed at the quietest frame within search_s seconds
+        before the nominal chunk boundary, so words are rarely cut in half.
+        
+        Args:
+            audio_data: Mono audio as numpy array
+            sample_rate: Sample rate of audio_data
+            chunk_s: Nominal chunk length in seconds
+            search_s: How far before each boundary to look for a pause
+            
+        Returns:
+            list: Sample indices of the cuts (excluding 0 and the end)
+        """
+        frame_len = max(1, int(sample_rate * self.frame_ms / 1000))
+        n_frames = len(audio_data) // frame_len
+        frame_s = frame_len / sample_rate
+        if n_frames == 0 or len(audio_data) <= chunk_s * sample_rate:
+            return []
+        
+        frames = np.asarray(audio_data[:n_frames * frame_len], dtype=np.float32)
+        energy = np.mean(frames.reshape(n_frames, frame_len) ** 2, axis=1)
+        
+        cuts = []
+        position = 0.0
+        duration = len(audio_data) / sample_rate
+        while duration - position > chunk_s:
+            search_end = int((position + chunk_s) / frame_s)
+            search_start = max(int((position + chunk_s - search_s) / frame_s), int(position / frame_s) + 1)
+            quietest = search_start + int(np.argmin(energy[search_start:search_end]))
+            cuts.append(quietest * frame_len)
+            position = quietest * frame_s
+        return cuts
+    
+    def split(self, audio_data, sample_rate=WHISPER_SAMPLE_RATE, chunk_s=120.0, search_s=10.0):
+        """Split audio at low-energy points.
+        
+        Args:
+            audio_data: Mono audio as numpy array
+            sample_rate: Sample rate of audio_data
+            chunk_s: Nominal chunk length in seconds
+            search_s: How far before each boundary to look for a pause
+            
+        Returns:
+            list: (start_seconds, audio slice) tuples covering the whole audio
+        """
+        bounds = [0] + self.split_points(audio_data, sample_rate, chunk_s, search_s) + [len(audio_data)]
+        return [
+            (start / sample_rate, audio_data[start:end])
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+    
+    def plan_chunks(self, audio_data, regions, sample_rate=WHISPER_SAMPLE_RATE, chunk_s=30.0, search_s=5.0):
+        """Group regions of the audio into pause-aligned chunks of about chunk_s.
+        
+        Neighbouring regions are decoded together, pauses included, while
+        they span at most chunk_s: Whisper pads every call to a full 30
+        second window, so one call per short region would cost more
+        encoder passes than no VAD at all. Longer regions are split at
+        pauses.
+        
+        Args:
+            audio_data: Mono audio as numpy array
+            regions: (start_seconds, end_seconds) tuples to transcribe
+            sample_rate: Sample rate of audio_data
+            chunk_s: Nominal chunk length in seconds
+            search_s: How far before each boundary to look for a pause
+            
+        Yields:
+            tuple: (start_seconds, audio slice)
+        """
+        def split(start, end):
+            region = audio_data[int(start * sample_rate):int(end * sample_rate)]
+            for offset, chunk in self.split(region, sample_rate, chunk_s=chunk_s, search_s=search_s):
+                yield start + offset, chunk
+        
+        group = None
+        for start, end in regions:
+            if group is not None and end - group[0] <= chunk_s:
+                group[1] = end
+                continue
+            if group is not None:
+                yield from split(*group)
+            group = [start, end]
+        if group is not None:
+            yield from split(*group)
+    
+    def extract(self, audio_data, regions, sample_rate=WHISPER_SAMPLE_RATE):
+        """Yield the audio of each region with its position on the original timeline.
+        
+        Args:
+            audio_data: Mono audio as numpy array
+            regions: (start_seconds, end_seconds) tuples from detect()
+            sample_rate: Sample rate of audio_data
+            
+        Yields:
+            tuple: (start_seconds, audio slice)
+        """
+        for start, end in regions:
+            yield start, audio_data[int(start * sample_rate):int(end * sample_rate)]
+    
+    def build_report(self, regions, total_duration):
+        """Summarize how much audio the regions skip.
+        
+        Args:
+            regions: (start_seconds, end_seconds) tuples from detect()
+            total_duration: Duration of the full audio in seconds
+            
+        Returns:
+            dict: Total, speech and skipped seconds, skipped ratio and region count
+        """
+        speech = sum(end - start for start, end in regions)
+        skipped = max(total_duration - speech, 0.0)
+        return {
+            "total_s": total_duration,
+            "speech_s": speech,
+            "skipped_s": skipped,
+            "skipped_ratio": skipped / total_duration if total_duration else 0.0,
+            "regions": len(regions)
+        }
+
+class SpeechEndpointer:
+    """Find where utterances start and end in a live stream, frame by frame.
+    
+    Uses the thresholds of a VoiceActivityDetector, with the noise floor
+    taken as the quietest frame of the last noise_window_s seconds
+    instead of a percentile of the whole file: a stream that opens with
+    speech has no silence to estimate it from, but the pauses between
+    syllables bring the minimum down within a second. As in detect(),
+    pauses shorter than min_silence_s do not interrupt speech: an
+    utterance starts once speech has lasted min_speech_s and ends after
+    min_silence_s of silence. One that grows longer than max_utterance_s
+    is cut at the quietest frame of its last search_s seconds.
+    """
+    
+    def __init__(self, detector=None, sample_rate=WHISPER_SAMPLE_RATE, noise_window_s=10.0,
+                 max_utterance_s=20.0, search_s=2.0):
+        """Initialize the endpointer.
+        
+        Args:
+            detector: VoiceActivityDetector providing features and thresholds
+            sample_rate: Sample rate of the stream
+            noise_window_s: Seconds of history the noise floor is estimated from
+            max_utterance_s: Longest utterance before a forced cut
+            search_s: How far back a forced cut looks for a pause
+        """
+        self.detector = detector or VoiceActivityDetector()
+        self.sample_rate = sample_rate
+        self.frame_len = max(1, int(sample_rate * self.detector.frame_ms / 1000))
+        self.frame_s = self.frame_len / sample_rate
+        self.max_utterance_s = max_utterance_s
+        self.search_frames = max(1, int(search_s / self.frame_s))
+        
+        self._energies = deque(maxlen=max(1, int(noise_window_s / self.frame_s)))
+        self._recent = deque(maxlen=self.search_frames)
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._frames = 0
+        self._first_speech = None  # Frame index where a not yet confirmed utterance began
+        self._silence_run = 0
+        self._last_end = 0.0
+        self.utterance_start = None
+    
+    @property
+    def in_speech(self):
+        """Whether an utterance is open."""
+        return self.utterance_start is not None
+    
+    def process(self, samples):
+        """Analyse the next samples of the stream.
+        
+        Args:
+            samples: Mono float32 audio following the previous call's
+            
+        Returns:
+            list: ("start", seconds) and ("end", seconds) events in stream order
+        """
+        data = np.concatenate((self._remainder, np.asarray(samples, dtype=np.float32)))
+        n_frames = len(data) // self.frame_len
+        self._remainder = data[n_frames * self.frame_len:]
+        if n_frames == 0:
+            return []
+        
+        with tracer.span("vad.features"):
+            energy_db, flatness = self.detector.frame_features(data[:n_frames * self.frame_len], self.sample_rate)
+        self._energies.extend(energy_db.tolist())
+        noise_floor = min(self._energies)
+        threshold = max(noise_floor + self.detector.energy_margin_db, self.detector.min_energy_db)
+        is_speech = (energy_db > threshold) & (flatness < self.detector.flatness_threshold)
+        
+        min_speech = max(1, int(self.detector.min_speech_s / self.frame_s))
+        min_silence = max(1, int(self.detector.min_silence_s / self.frame_s))
+        padding = self.detector.padding_s
+        events = []
+        for speech, energy in zip(is_speech.tolist(), energy_db.tolist()):
+            self._frames += 1
+            self._recent.append(energy)
+            now = self._frames * self.frame_s
+            
+            self._silence_run = 0 if speech else self._silence_run + 1
+            if self.utterance_start is None:
+                if self._first_speech is None:
+                    if speech:
+                        self._first_speech = self._frames - 1
+                elif self._silence_run >= min_silence:
+                    self._first_speech = None
+                elif speech and self._frames - self._first_speech >= min_speech:
+                    start = max(self._first_speech * self.frame_s - padding, self._last_end, 0.0)
+                    self.utterance_start = start
+                    events.append(("start", start))
+                continue
+            
+            if self._silence_run >= min_silence:
+                end = min(now - self._silence_run * self.frame_s + padding, now)
+                events.append(("end", end))
+                self._close(end)
+            elif now - self.utterance_start >= self.max_utterance_s:
+                # Cut at the quietest recent frame in the second half of the
+                # utterance; the next one continues from there
+                span = min(len(self._recent), max(1, int((now - self.utterance_start) / 2 / self.frame_s)))
+                quietest = int(np.argmin(list(self._recent)[-span:]))
+                cut = now - (span - quietest - 1) * self.frame_s
+                events.append(("end", cut))
+                events.append(("start", cut))
+                self.utterance_start = cut
+                self._last_end = cut
+        return events
+    
+    def _close(self, end):
+        """End the open utterance."""
+        self.utterance_start = None
+        self._last_end = end
+        self._first_speech = None
+        self._silence_run = 0
+    
+    def flush(self):
+        """End the stream; closes an open utterance at the last sample.
+        
+        Returns:
+            list: The ("end", seconds) event, or an empty list
+        """
+        if self.utterance_start is None:
+            return []
+        end = (self._frames * self.frame_len + len(self._remainder)) / self.sample_rate
+        self._close(end)
+        return [("end", end)]
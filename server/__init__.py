@@ -0,0 +1,7 @@
+"""Transcription server and client for the Whisper Transcription App."""
+from .service import TranscriptionService, ServerJob, ServiceError
+from .http_api import create_server
+from .client import TranscriptionClient, RemoteJob, ServerError
+
+__all__ = ['TranscriptionService', 'ServerJob', 'ServiceError', 'create_server',
+           'TranscriptionClient', 'RemoteJob', 'ServerError']
@@ -0,0 +1,291 @@
+"""
+Thin client of the transcription server.
+"""
+import http.client
+import json
+import os
+import socket
+import threading
+from urllib.parse import quote, urlsplit
+
+class ServerError(Exception):
+    """Error answered by the transcription server (or raised reaching it)."""
+    
+    def __init__(self, message, status=None, job=None):
+        """Initialize the error.
+        
+        Args:
+            message: Error message
+            status: HTTP status code, None if the server could not be reached
+            job: Job dict the server sent along, if any
+        """
+        super().__init__(message)
+        self.status = status
+        self.job = job
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix socket."""
+    
+    def __init__(self, socket_path, timeout=None):
+        """Initialize the connection.
+        
+        Args:
+            socket_path: Path of the server's Unix socket
+            timeout: Socket timeout in seconds
+        """
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self):
+        """Connect to the Unix socket."""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class RemoteJob:
+    """Handle of a job on the server; cancel() matches the scheduler's Job."""
+    
+    def __init__(self, client, job_id):
+        """Initialize the handle.
+        
+        Args:
+            client: TranscriptionClient the job was submitted with
+            job_id: Job id on the server
+        """
+        self.client = client
+        self.id = job_id
+    
+    def cancel(self, reason="Cancelled"):
+        """Ask the server to cancel the job.
+        
+        Returns:
+            bool: True if the request reached the server
+        """
+        try:
+            self.client.cancel(self.id)
+        except ServerError:
+            return False
+        return True
+
+class TranscriptionClient:
+    """Submit files to a transcription server over keep-alive connections.
+    
+    Connections are kept open between requests. The client is
+    thread-safe: a request takes an idle connection or opens another, so
+    a long-polling thread does not hold up a cancel from another one. A
+    connection the server closed while idle is reopened and the request
+    sent again.
+    """
+    
+    def __init__(self, url="http://127.0.0.1:8765", timeout=75.0, chunk_bytes=4 * 1024 ** 2):
+        """Initialize the client.
+        
+        Args:
+            url: Server URL, "http://host:port" or "unix:///path/to/socket"
+            timeout: Socket timeout in seconds (must exceed long-poll waits)
+            chunk_bytes: Upload chunk size
+        """
+        self.url = url
+        self.timeout = timeout
+        self.chunk_bytes = chunk_bytes
+        self._idle = []
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_settings(cls, settings):
+        """Create the client configured in AppSettings, or None if no server is set."""
+        if not settings.server_url:
+            return None
+        return cls(settings.server_url)
+    
+    def _connect(self):
+        """Open a new connection to the server."""
+        parts = urlsplit(self.url)
+        if parts.scheme == "unix":
+            return UnixHTTPConnection(parts.path, timeout=self.timeout)
+        return http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=self.timeout)
+    
+    def _request(self, method, path, body=None, headers=None):
+        """Send a request and decode the JSON answer.
+        
+        Returns:
+            tuple: (HTTP status, response dict)
+            
+        Raises:
+            ServerError: If the server cannot be reached
+        """
+        headers = dict(headers or {})
+        if isinstance(body, dict):
+            body = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        
+        for attempt in range(2):
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            reused = connection is not None
+            if not reused:
+                connection = self._connect()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                connection.close()
+                # A kept-alive connection may have been closed by the server
+                if not reused or attempt:
+                    raise ServerError(f"Cannot reach {self.url}: {e}")
+                continue
+            
+            if response.will_close:
+                connection.close()
+            else:
+                with self._lock:
+                    self._idle.append(connection)
+            break
+        
+        try:
+            payload = json.loads(data) if data else {}
+        except ValueError:
+            raise ServerError(f"Invalid response from {self.url}", response.status)
+        return response.status, payload
+    
+    def _call(self, method, path, body=None, headers=None, expected=(200,)):
+        """Send a request and raise ServerError unless the status is expected."""
+        status, payload = self._request(method, path, body, headers)
+        if status not in expected:
+            raise ServerError(payload.get("error", f"HTTP {status}"), status, payload.get("job"))
+        return payload
+    
+    def close(self):
+        """Close the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+    
+    def health(self):
+        """Get the server status (model, device, ready, queue sizes)."""
+        return self._call("GET", "/health")
+    
+    def upload(self, file_path):
+        """Upload a file in chunks.
+        
+        Returns:
+            str: Upload id for submit()
+        """
+        upload_id = self._call(
+            "POST", "/uploads", {"name": os.path.basename(file_path)}, expected=(201,)
+        )["upload_id"]
+        offset = 0
+        try:
+            with open(file_path, "rb") as f:
+                while True:
+                    chunk = f.read(self.chunk_bytes)
+                    if not chunk:
+                        break
+                    offset = self._call(
+                        "PUT", f"/uploads/{upload_id}?offset={offset}", chunk,
+                        {"Content-Type": "application/octet-stream"}
+                    )["size"]
+        except Exception:
+            try:
+                self._call("DELETE", f"/uploads/{upload_id}")
+            except ServerError:
+                pass
+            raise
+        return upload_id
+    
+    def submit(self, upload_id, priority=None, model_size=None):
+        """Transcribe an upload.
+        
+        Returns:
+            dict: The job
+        """
+        request = {"upload_id": upload_id}
+        if priority is not None:
+            request["priority"] = priority
+        if model_size:
+            request["model"] = model_size
+        return self._call("POST", "/jobs", request, expected=(202,))
+    
+    def transcribe_file(self, file_path, priority=None, model_size=None):
+        """Upload a file and submit it.
+        
+        Returns:
+            RemoteJob: Handle of the queued job
+        """
+        job = self.submit(self.upload(file_path), priority, model_size)
+        return RemoteJob(self, job["id"])
+    
+    def status(self, job_id, segments_from=None):
+        """Get a job, with the segments from index segments_from on if given."""
+        path = f"/jobs/{quote(job_id)}"
+        if segments_from is not None:
+            path += f"?segments={segments_from}"
+        return self._call("GET", path)
+    
+    def result(self, job_id, wait_s=0.0):
+        """Get the result of a job.
+        
+        Args:
+            job_id: Job id
+            wait_s: Seconds the server waits for the job to finish
+            
+        Returns:
+            dict: {"text", "segments", "job"}, or None if not finished yet
+            
+        Raises:
+            ServerError: If the job failed or was cancelled
+        """
+        payload = self._call(
+            "GET", f"/jobs/{quote(job_id)}/result?wait={wait_s}", expected=(200, 202)
+        )
+        return payload if "text" in payload else None
+    
+    def wait(self, job_id, on_status=None, on_segment=None, interval_s=0.5):
+        """Wait for a job, reporting its progress and segments as they arrive.
+        
+        Args:
+            job_id: Job id
+            on_status: Callback receiving each job status dict
+            on_segment: Callback receiving each new segment
+            interval_s: Seconds between status requests
+            
+        Returns:
+            dict: {"text", "segments", "job"}
+            
+        Raises:
+            ServerError: If the job failed or was cancelled
+        """
+        segments_done = 0
+        reporting = on_status is not None or on_segment is not None
+        while True:
+            if reporting:
+                job = self.status(job_id, segments_from=segments_done)
+                for segment in job.pop("segments"):
+                    segments_done += 1
+                    if on_segment:
+                        on_segment(segment)
+                if on_status:
+                    on_status(job)
+            # Without callbacks the server holds the request until the job ends
+            result = self.result(job_id, wait_s=interval_s if reporting else 30.0)
+            if result is not None:
+                # Segments decoded after the last status request
+                if on_segment:
+                    for segment in result["segments"][segments_done:]:
+                        on_segment(segment)
+                return result
+    
+    def cancel(self, job_id):
+        """Cancel a job.
+        
+        Returns:
+            dict: The job
+        """
+        return self._call("DELETE", f"/jobs/{quote(job_id)}")
+    
+    def list_jobs(self):
+        """Get every job the server remembers."""
+        return self._call("GET", "/jobs")["jobs"]
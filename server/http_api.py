@@ -0,0 +1,236 @@
+"""
+HTTP/1.1 API of the transcription service, over TCP or a Unix socket.
+    
+    GET    /health                  Model, device and queue status
+    POST   /uploads                 Start an upload ({"name": "talk.mp3"})
+    PUT    /uploads/<id>?offset=N   Append a chunk at byte offset N
+    DELETE /uploads/<id>            Discard an upload
+    POST   /jobs                    Transcribe an upload ({"upload_id", "priority"})
+    GET    /jobs                    List jobs
+    GET    /jobs/<id>?segments=N    Job status, with the segments from index N
+    GET    /jobs/<id>/result?wait=S Result (200), or the job (202) if it has not
+                                    finished within S seconds
+    DELETE /jobs/<id>               Cancel a job
+
+Responses are JSON with a Content-Length, so connections stay open
+between requests.
+"""
+import json
+import os
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from .service import ServerJob, ServiceError
+
+# Longest long-poll a client may request
+MAX_WAIT_S = 60.0
+
+class TranscriptionRequestHandler(BaseHTTPRequestHandler):
+    """Route requests to the server's TranscriptionService."""
+    
+    protocol_version = "HTTP/1.1"
+    server_version = "WhisperTranscription/1.0"
+    # Idle keep-alive connections are closed after this many seconds
+    timeout = 120
+    # Headers and body are written separately; without TCP_NODELAY every
+    # response on a kept-alive connection waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+    
+    def address_string(self):
+        """Client address for the log; Unix socket peers have none."""
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+    
+    def log_message(self, format, *args):
+        """Log requests only in verbose mode."""
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def _send_json(self, status, payload):
+        """Send a JSON response."""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _content_length(self):
+        """Get the request body size (400 if missing or invalid)."""
+        try:
+            return int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            raise ServiceError(400, "Invalid Content-Length")
+    
+    def _read_json(self):
+        """Read a JSON request body; an empty body is an empty object."""
+        length = self._content_length()
+        if not length:
+            return {}
+        try:
+            payload = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise ServiceError(400, "Request body is not valid JSON")
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "Request body must be a JSON object")
+        return payload
+    
+    def _discard_body(self):
+        """Read an unused request body so the connection can be reused."""
+        length = self._content_length()
+        while length > 0:
+            data = self.rfile.read(min(length, 1024 ** 2))
+            if not data:
+                break
+            length -= len(data)
+    
+    def _handle(self, method):
+        """Dispatch a request and turn service errors into JSON error responses."""
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        service = self.server.service
+        try:
+            routes = {
+                ("GET", "health"): lambda: (200, service.health()),
+                ("POST", "uploads"): lambda: (
+                    201, service.create_upload(self._read_json().get("name", "audio"))
+                ),
+                ("GET", "jobs"): lambda: (200, {"jobs": service.list_jobs()}),
+                ("POST", "jobs"): lambda: self._submit(service),
+            }
+            if len(parts) == 1 and (method, parts[0]) in routes:
+                status, payload = routes[(method, parts[0])]()
+            elif len(parts) == 2 and parts[0] == "uploads" and method == "PUT":
+                status, payload = 200, service.append_upload(
+                    parts[1], int(query.get("offset", 0)), self.rfile, self._content_length()
+                )
+            elif len(parts) == 2 and parts[0] == "uploads" and method == "DELETE":
+                service.discard_upload(parts[1])
+                status, payload = 200, {"upload_id": parts[1]}
+            elif len(parts) == 2 and parts[0] == "jobs" and method == "GET":
+                segments_from = int(query["segments"]) if "segments" in query else None
+                status, payload = 200, service.status(parts[1], segments_from)
+            elif len(parts) == 2 and parts[0] == "jobs" and method == "DELETE":
+                status, payload = 200, service.cancel(parts[1])
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result" and method == "GET":
+                status, payload = self._result(service, parts[1], query)
+            else:
+                raise ServiceError(404, f"No route for {method} {url.path}")
+        except ServiceError as e:
+            status, payload = e.status, {"error": str(e)}
+        except ValueError as e:
+            status, payload = 400, {"error": str(e)}
+        
+        if method in ("POST", "PUT") and status >= 400:
+            # The body may not have been read; the connection cannot be reused
+            self.close_connection = True
+        self._send_json(status, payload)
+    
+    def _submit(self, service):
+        """POST /jobs."""
+        request = self._read_json()
+        if "upload_id" not in request:
+            raise ServiceError(400, "upload_id is required")
+        kwargs = {"model_size": request.get("model")}
+        if "priority" in request:
+            kwargs["priority"] = int(request["priority"])
+        return 202, service.submit(request["upload_id"], **kwargs)
+    
+    @staticmethod
+    def _result(service, job_id, query):
+        """GET /jobs/<id>/result: 200 with the result, 202 while running, 409 if it failed."""
+        wait_s = min(max(float(query.get("wait", 0)), 0.0), MAX_WAIT_S)
+        job, result = service.result(job_id, wait_s)
+        if job["state"] == ServerJob.DONE:
+            return 200, dict(result, job=job)
+        if job["state"] in ServerJob.FINISHED:
+            return 409, {"error": job["error"] or job["state"], "job": job}
+        return 202, {"job": job}
+    
+    def do_GET(self):
+        self._handle("GET")
+    
+    def do_POST(self):
+        self._handle("POST")
+    
+    def do_PUT(self):
+        self._handle("PUT")
+    
+    def do_DELETE(self):
+        self._discard_body()
+        self._handle("DELETE")
+
+class UnixRequestHandler(TranscriptionRequestHandler):
+    """Request handler for Unix sockets, which have no Nagle algorithm to disable."""
+    
+    disable_nagle_algorithm = False
+
+class TranscriptionHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server on a TCP port."""
+    
+    daemon_threads = True
+    
+    def __init__(self, address, service, verbose=False):
+        """Initialize the server.
+        
+        Args:
+            address: (host, port) to listen on
+            service: TranscriptionService answering the requests
+            verbose: Log every request to stderr
+        """
+        self.service = service
+        self.verbose = verbose
+        super().__init__(address, TranscriptionRequestHandler)
+    
+    @property
+    def url(self):
+        """Base URL clients connect to."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+class UnixTranscriptionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded HTTP server on a Unix socket, reachable only by local users."""
+    
+    daemon_threads = True
+    
+    def __init__(self, socket_path, service, verbose=False):
+        """Initialize the server; a stale socket file is replaced.
+        
+        Args:
+            socket_path: Path of the Unix socket
+            service: TranscriptionService answering the requests
+            verbose: Log every request to stderr
+        """
+        self.service = service
+        self.verbose = verbose
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, UnixRequestHandler)
+        os.chmod(socket_path, 0o600)
+    
+    @property
+    def url(self):
+        """Base URL clients connect to."""
+        return f"unix://{self.server_address}"
+    
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+def create_server(service, host="127.0.0.1", port=8765, socket_path=None, verbose=False):
+    """Create the HTTP server for a service.
+    
+    Args:
+        service: TranscriptionService answering the requests
+        host: Interface to listen on (ignored with socket_path)
+        port: TCP port (ignored with socket_path)
+        socket_path: Listen on this Unix socket instead of TCP
+        verbose: Log every request to stderr
+        
+    Returns:
+        TranscriptionHTTPServer or UnixTranscriptionServer
+    """
+    if socket_path:
+        return UnixTranscriptionServer(socket_path, service, verbose)
+    return TranscriptionHTTPServer((host, port), service, verbose)
@@ -0,0 +1,426 @@
+"""
+Transcription service hosting one warm TranscriptionEngine for many clients.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from models.job_scheduler import JobScheduler, JobState
+from utils.tracing import tracer
+
+class ServiceError(Exception):
+    """A request the service cannot fulfil; status is the HTTP status to answer with."""
+    
+    def __init__(self, status, message):
+        """Initialize the error.
+        
+        Args:
+            status: HTTP status code
+            message: Error message for the client
+        """
+        super().__init__(message)
+        self.status = status
+
+class ServerJob:
+    """A transcription requested by a client, from decoding to the result."""
+    
+    DECODING = "decoding"
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    FINISHED = (DONE, FAILED, CANCELLED)
+    
+    def __init__(self, job_id, file_name, priority):
+        """Initialize a job record.
+        
+        Args:
+            job_id: Unique job id
+            file_name: Name of the uploaded file (for display only)
+            priority: Scheduler priority
+        """
+        self.id = job_id
+        self.file_name = file_name
+        self.priority = priority
+        self.state = self.DECODING
+        self.duration_s = None
+        self.estimate = None
+        self.progress = None
+        self.segments = []
+        self.result = None
+        self.error = None
+        self.cached = False
+        self.submitted_at = time.time()
+        self.finished_at = None
+        
+        self.engine_job = None
+        self.cancel_requested = False
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+    
+    def finish(self, state, result=None, error=None):
+        """Record the outcome once; later calls are ignored."""
+        with self.lock:
+            if self.state in self.FINISHED:
+                return
+            self.state = state
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+        self.done.set()
+    
+    def current_state(self):
+        """Get the state; a queued job counts as running once the engine started it."""
+        engine_job = self.engine_job
+        if self.state == self.QUEUED and engine_job is not None and engine_job.state == JobState.RUNNING:
+            return self.RUNNING
+        return self.state
+    
+    def to_dict(self, segments_from=None):
+        """Get a snapshot of the job.
+        
+        Args:
+            segments_from: Include the segments decoded so far from this
+                           index on (None leaves them out)
+        """
+        with self.lock:
+            snapshot = {
+                "id": self.id,
+                "file": self.file_name,
+                "state": self.current_state(),
+                "priority": self.priority,
+                "duration_s": self.duration_s,
+                "estimate": self.estimate,
+                "progress": self.progress,
+                "segments_done": len(self.segments),
+                "cached": self.cached,
+                "error": self.error,
+                "submitted_at": self.submitted_at,
+                "finished_at": self.finished_at
+            }
+            if segments_from is not None:
+                snapshot["segments"] = self.segments[segments_from:]
+        return snapshot
+
+class TranscriptionService:
+    """Accept uploads and transcription jobs for one warm model.
+    
+    Uploads arrive in chunks and are appended to a file in upload_dir.
+    Submitting an upload decodes it on a decode thread (so the next file
+    is decoded while the model runs), then queues it on the engine's
+    scheduler. Results already in the engine's result cache are answered
+    without decoding. Finished jobs are kept for history_size jobs.
+    """
+    
+    def __init__(self, engine, audio_processor, model_size, upload_dir, vad=None,
+                 max_upload_bytes=2 * 1024 ** 3, decode_workers=2, history_size=100,
+                 job_timeout_s=None):
+        """Initialize the service.
+        
+        Args:
+            engine: TranscriptionEngine shared by every client
+            audio_processor: AudioProcessor used for decoding uploads
+            model_size: Model size the engine serves
+            upload_dir: Directory uploads are written to
+            vad: Optional VoiceActivityDetector to skip silence
+            max_upload_bytes: Largest accepted upload
+            decode_workers: Uploads decoded in parallel
+            history_size: Number of finished jobs kept for status requests
+            job_timeout_s: Wall-clock limit per transcription, None = unlimited
+        """
+        self.engine = engine
+        self.audio_processor = audio_processor
+        self.model_size = model_size
+        self.upload_dir = upload_dir
+        self.vad = vad
+        self.max_upload_bytes = max_upload_bytes
+        self.history_size = history_size
+        self.job_timeout_s = job_timeout_s
+        self.started_at = time.time()
+        
+        os.makedirs(upload_dir, exist_ok=True)
+        self._uploads = {}
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._decoder = ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix="decode")
+    
+    def start(self, on_ready=None):
+        """Load the model and import the audio libraries before the first request.
+        
+        Args:
+            on_ready: Callback with (success, error) once the model is loaded
+        """
+        threading.Thread(target=self.audio_processor.warm_up, daemon=True).start()
+        self.engine.load_model(self.model_size, on_complete=on_ready)
+    
+    @property
+    def served_model(self):
+        """Model size in use; the memory budget may have chosen a smaller one."""
+        return self.engine.model_size if self.engine.model else self.model_size
+    
+    def health(self):
+        """Get the service status.
+        
+        Returns:
+            dict: model, device, ready, queued and running jobs, uptime
+        """
+        with self._lock:
+            states = [job.current_state() for job in self._jobs.values()]
+        return {
+            "status": "ok",
+            "model": self.served_model,
+            "device": self.engine.get_device_name(),
+            "ready": self.engine.model is not None and not self.engine.is_loading,
+            "decoding": states.count(ServerJob.DECODING),
+            "queued": states.count(ServerJob.QUEUED),
+            "running": states.count(ServerJob.RUNNING),
+            "uptime_s": time.time() - self.started_at
+        }
+    
+    def create_upload(self, file_name="audio"):
+        """Start an upload.
+        
+        Args:
+            file_name: Client-side file name; its extension selects the decoder
+            
+        Returns:
+            dict: upload_id and size (0)
+        """
+        upload_id = uuid.uuid4().hex
+        extension = os.path.splitext(os.path.basename(file_name or ""))[1].lower()[:10]
+        path = os.path.join(self.upload_dir, f"{upload_id}{extension}")
+        open(path, "wb").close()
+        with self._lock:
+            self._uploads[upload_id] = {
+                "path": path, "name": os.path.basename(file_name or ""), "size": 0,
+                "lock": threading.Lock()
+            }
+        return {"upload_id": upload_id, "size": 0}
+    
+    def _get_upload(self, upload_id):
+        """Get an upload by id (404 if unknown)."""
+        with self._lock:
+            upload = self._uploads.get(upload_id)
+        if upload is None:
+            raise ServiceError(404, f"Unknown upload: {upload_id}")
+        return upload
+    
+    def append_upload(self, upload_id, offset, stream, length):
+        """Append a chunk to an upload.
+        
+        Args:
+            upload_id: Id from create_upload()
+            offset: Byte offset of the chunk; must equal the current size,
+                    so a chunk that is sent twice is rejected
+            stream: File-like object to read the chunk from
+            length: Chunk size in bytes
+            
+        Returns:
+            dict: upload_id and the new size
+            
+        Raises:
+            ServiceError: 404 for unknown uploads, 409 on an offset
+                          mismatch, 413 if the upload gets too large
+        """
+        upload = self._get_upload(upload_id)
+        with upload["lock"]:
+            if offset != upload["size"]:
+                raise ServiceError(409, f"Expected offset {upload['size']}, got {offset}")
+            if upload["size"] + length > self.max_upload_bytes:
+                raise ServiceError(413, f"Uploads are limited to {self.max_upload_bytes} bytes")
+            
+            with open(upload["path"], "ab") as f:
+                remaining = length
+                while remaining > 0:
+                    data = stream.read(min(remaining, 1024 ** 2))
+                    if not data:
+                        break
+                    f.write(data)
+                    remaining -= len(data)
+            upload["size"] += length - remaining
+            if remaining:
+                raise ServiceError(400, "Upload chunk ended early")
+            return {"upload_id": upload_id, "size": upload["size"]}
+    
+    def discard_upload(self, upload_id):
+        """Delete an upload that was not submitted."""
+        with self._lock:
+            upload = self._uploads.pop(upload_id, None)
+        if upload is not None and os.path.exists(upload["path"]):
+            os.remove(upload["path"])
+    
+    def submit(self, upload_id, priority=JobScheduler.PRIORITY_NORMAL, model_size=None):
+        """Transcribe a finished upload.
+        
+        Args:
+            upload_id: Id from create_upload()
+            priority: Scheduler priority, lower values run first
+            model_size: Must match the served model if given
+            
+        Returns:
+            dict: The new job (see ServerJob.to_dict)
+        """
+        if model_size and model_size != self.served_model:
+            raise ServiceError(409, f"This server runs the {self.served_model} model")
+        
+        with self._lock:
+            upload = self._uploads.pop(upload_id, None)
+        if upload is None:
+            raise ServiceError(404, f"Unknown upload: {upload_id}")
+        if upload["size"] == 0:
+            os.remove(upload["path"])
+            raise ServiceError(400, "Upload is empty")
+        
+        job = ServerJob(uuid.uuid4().hex, upload["name"], priority)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._prune()
+        self._decoder.submit(self._prepare, job, upload["path"])
+        return job.to_dict()
+    
+    def _prepare(self, job, path):
+        """Look up the result cache or decode an upload, then queue it (decode thread)."""
+        try:
+            with tracer.context(file=job.file_name, model=self.served_model):
+                self._queue(job, path)
+        except Exception as e:
+            job.finish(ServerJob.FAILED, error=str(e))
+        finally:
+            # Every upload has a new path; its hash would never be looked up again
+            if self.engine.result_cache is not None:
+                self.engine.result_cache.forget_file(path)
+            os.remove(path)
+    
+    def _queue(self, job, path):
+        """Answer from the result cache, or decode the upload and queue it on the engine."""
+        cache_key = self.engine.result_cache_key(
+            path, model_size=self.served_model,
+            options={"vad": self.vad is not None, "parallel_chunk_s": None}
+        )
+        cached = self.engine.get_cached_result(cache_key)
+        if cached is not None:
+            job.cached = True
+            job.segments = list(cached["segments"])
+            job.finish(ServerJob.DONE, result=cached)
+            return
+        
+        audio, sample_rate = self.audio_processor.load_audio(path)
+        job.duration_s = self.audio_processor.get_audio_duration(audio, sample_rate)
+        speech_regions = None
+        speech_s = job.duration_s
+        if self.vad is not None:
+            speech_regions = self.vad.detect(audio, sample_rate)
+            speech_s = sum(end - start for start, end in speech_regions)
+        job.estimate = self.engine.predict_processing_time(job.duration_s, speech_s)
+        
+        def on_progress(event):
+            with job.lock:
+                job.progress = event
+        
+        def on_segment(segment):
+            with job.lock:
+                job.segments.append(
+                    {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+                )
+        
+        def on_complete(success, transcription, error):
+            if success:
+                return
+            state = ServerJob.CANCELLED if job.cancel_requested else ServerJob.FAILED
+            job.finish(state, error=error)
+        
+        with job.lock:
+            cancelled = job.cancel_requested
+            if not cancelled:
+                job.state = ServerJob.QUEUED
+        if cancelled:
+            job.finish(ServerJob.CANCELLED, error="Cancelled by client")
+            return
+        
+        engine_job = self.engine.transcribe(
+            audio, on_complete, speech_regions=speech_regions, priority=job.priority,
+            timeout=self.job_timeout_s, on_progress=on_progress, on_segment=on_segment,
+            cache_key=cache_key
+        )
+        if not engine_job:
+            return
+        job.engine_job = engine_job
+        engine_job.add_done_callback(lambda done: self._on_engine_done(job, done))
+        if job.cancel_requested:
+            engine_job.cancel()
+    
+    @staticmethod
+    def _on_engine_done(job, engine_job):
+        """Take over the result once the engine's job has finished."""
+        if engine_job.future.cancelled() or engine_job.future.exception() is not None:
+            # on_complete has recorded the failure
+            return
+        result = engine_job.future.result()
+        with job.lock:
+            job.segments = [
+                {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+                for segment in result["segments"]
+            ]
+        job.finish(ServerJob.DONE, result={"text": result["text"], "segments": job.segments})
+    
+    def _get_job(self, job_id):
+        """Get a job by id (404 if unknown)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise ServiceError(404, f"Unknown job: {job_id}")
+        return job
+    
+    def status(self, job_id, segments_from=None):
+        """Get a job (see ServerJob.to_dict)."""
+        return self._get_job(job_id).to_dict(segments_from)
+    
+    def list_jobs(self):
+        """Get every known job, oldest first."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in jobs]
+    
+    def result(self, job_id, wait_s=0.0):
+        """Get the result of a job, waiting up to wait_s seconds for it.
+        
+        Returns:
+            tuple: (job dict, result dict or None while not finished)
+        """
+        job = self._get_job(job_id)
+        if wait_s > 0:
+            job.done.wait(wait_s)
+        return job.to_dict(), job.result
+    
+    def cancel(self, job_id, reason="Cancelled by client"):
+        """Cancel a job; a job still decoding is cancelled before it is queued.
+        
+        Returns:
+            dict: The job
+        """
+        job = self._get_job(job_id)
+        with job.lock:
+            job.cancel_requested = True
+            engine_job = job.engine_job
+        if engine_job is not None:
+            engine_job.cancel(reason)
+        return job.to_dict()
+    
+    def _prune(self):
+        """Forget the oldest finished jobs beyond history_size."""
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.state in ServerJob.FINISHED]
+            for job_id in finished[:max(len(finished) - self.history_size, 0)]:
+                del self._jobs[job_id]
+    
+    def shutdown(self):
+        """Cancel running work and delete pending uploads."""
+        self.engine.cancel_all("Server shutting down")
+        self._decoder.shutdown(wait=False)
+        with self._lock:
+            upload_ids = list(self._uploads)
+        for upload_id in upload_ids:
+            self.discard_upload(upload_id)
@@ -1,5 +1,8 @@
 """Utility modules for the Whisper Transcription App."""
 from .file_operations import FileOperations
 from .status_tracker import StatusTracker
+from .startup_profile import StartupProfile
+from .tracing import Tracer, tracer
+from .ui_bus import UIEventBus
 
-__all__ = ['FileOperations', 'StatusTracker']
\ No newline at end of file
+__all__ = ['FileOperations', 'StatusTracker', 'StartupProfile', 'Tracer', 'tracer', 'UIEventBus']
\ No newline at end of file
@@ -2,7 +2,6 @@
 File operations for the Whisper Transcription App.
 """
 import os
-from customtkinter import filedialog
 
 class FileOperations:
     """Handles file operations for the application."""
@@ -23,6 +22,8 @@ class FileOperations:
         Returns:
             str: Selected file path or empty string if canceled
         """
+        from customtkinter import filedialog
+        
         filename = filedialog.askopenfilename(
             title=title,
             filetypes=self.filetypes
@@ -43,6 +44,8 @@ class FileOperations:
         if not transcript:
             return False, "No transcript to save"
         
+        from customtkinter import filedialog
+        
         file_path = filedialog.asksaveasfilename(
             defaultextension=default_extension,
             filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
@@ -0,0 +1,83 @@
+"""
+Timing of application startup phases and import costs.
+"""
+import time
+from contextlib import contextmanager
+
+# Reference point for all marks; main.py imports this module first
+PROCESS_START = time.perf_counter()
+
+class StartupProfile:
+    """Record how long each startup phase takes and when it finished."""
+    
+    def __init__(self):
+        """Initialize an empty profile."""
+        self.phases = []
+        self.marks = {}
+    
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as a named phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+    
+    def mark(self, name):
+        """Record the seconds since process start under a name."""
+        self.marks[name] = time.perf_counter() - PROCESS_START
+        return self.marks[name]
+    
+    def to_dict(self):
+        """Get the profile as a JSON-serializable dict."""
+        return {
+            "phases": [{"name": name, "seconds": seconds} for name, seconds in self.phases],
+            "marks": dict(self.marks)
+        }
+    
+    @staticmethod
+    def format_report(profile, imports=None):
+        """Format a profile dict (and optional import breakdown) as text lines.
+        
+        Args:
+            profile: Dict from to_dict()
+            imports: Optional (package, seconds) tuples from parse_importtime()
+            
+        Returns:
+            list: Report lines
+        """
+        lines = [f"{'phase':<28}{'time [ms]':>12}"]
+        for phase in profile["phases"]:
+            lines.append(f"{phase['name']:<28}{phase['seconds'] * 1000:>12.1f}")
+        for name, seconds in profile["marks"].items():
+            lines.append(f"{name + ' (since start)':<28}{seconds * 1000:>12.1f}")
+        
+        if imports:
+            lines.append("")
+            lines.append(f"{'import (self time)':<28}{'time [ms]':>12}")
+            for package, seconds in imports:
+                lines.append(f"{package:<28}{seconds * 1000:>12.1f}")
+        return lines
+
+def parse_importtime(output, top=15):
+    """Aggregate `python -X importtime` output per top-level package.
+    
+    Args:
+        output: stderr of a run with -X importtime
+        top: Number of packages to return
+        
+    Returns:
+        list: (package, self seconds) tuples, most expensive first
+    """
+    totals = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # Header line
+            continue
+        package = fields[2].strip().split(".")[0]
+        totals[package] = totals.get(package, 0.0) + int(fields[0]) / 1e6
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
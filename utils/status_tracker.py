@@ -2,22 +2,33 @@
 Status and progress tracking for the Whisper application.
 """
 import time
-import threading
 
 class StatusTracker:
-    """Track status, progress, and timing for the application."""
+    """Track status, progress, and timing for the application.
     
-    def __init__(self, status_label=None, progress_bar=None, percent_label=None, time_label=None):
+    With a UIEventBus, status and progress updates may be made from any
+    thread: they are posted to the bus and applied on the Tk main loop,
+    and only the latest pending status, progress and time text are shown.
+    """
+    
+    def __init__(self, status_label=None, progress_bar=None, percent_label=None, time_label=None,
+                 ui_bus=None):
         """Initialize the status tracker with UI components."""
         self.status_label = status_label
         self.progress_bar = progress_bar
         self.percent_label = percent_label
         self.time_label = time_label
+        self.ui_bus = ui_bus
+        self._shown = {}
         
         self.start_time = 0
         self.estimated_total_time = 0
+        self.prediction = None
         self.processing = False
-        self.progress_update_thread = None
+        
+        # Cancellation of the running job
+        self.current_job = None
+        self.cancel_requested = False
     
     def set_ui_components(self, status_label, progress_bar, percent_label, time_label):
         """Set the UI components for status updates."""
@@ -26,81 +37,107 @@ class StatusTracker:
         self.percent_label = percent_label
         self.time_label = time_label
     
+    def _post(self, key, func, *args):
+        """Apply an update through the UI bus, or directly without one."""
+        if self.ui_bus:
+            self.ui_bus.post(key, func, *args)
+        else:
+            func(*args)
+    
+    def _configure(self, name, widget, text):
+        """Set a label's text unless it already shows it (main thread only)."""
+        if widget and self._shown.get(name) != text:
+            self._shown[name] = text
+            widget.configure(text=text)
+    
     def update_status(self, message):
         """Update the status message."""
-        if self.status_label:
-            self.status_label.configure(text=message)
+        self._post("status", self._configure, "status", self.status_label, message)
     
-    def update_progress(self, value, time_info=""):
-        """Update progress bar with percentage and time information."""
-        if self.progress_bar:
-            self.progress_bar.set(value)
+    def update_progress(self, value, time_info=None):
+        """Update progress bar with percentage and time information.
         
-        if self.percent_label:
-            percent = int(value * 100)
-            self.percent_label.configure(text=f"{percent}%")
-        
-        if self.time_label:
-            self.time_label.configure(text=time_info)
+        Passing time_info=None leaves the time label unchanged.
+        """
+        self._post("progress", self._apply_progress, value)
+        if time_info is not None:
+            self._post("time", self._configure, "time", self.time_label, time_info)
+    
+    def _apply_progress(self, value):
+        """Show a progress value (main thread only)."""
+        if self.progress_bar and self._shown.get("progress") != value:
+            self._shown["progress"] = value
+            self.progress_bar.set(value)
+        self._configure("percent", self.percent_label, f"{int(value * 100)}%")
     
     def start_timer(self):
         """Start the processing timer."""
         self.start_time = time.time()
         self.processing = True
+        self.cancel_requested = False
+        self.current_job = None
+        self.prediction = None
         return self.start_time
     
+    def set_estimate(self, prediction):
+        """Set the predicted processing time used until decoding reports an ETA.
+        
+        Args:
+            prediction: Dict with seconds, low and high
+                        (see models.estimator.ProcessingTimeEstimator.predict)
+        """
+        self.prediction = prediction
+        self.estimated_total_time = prediction["seconds"]
+    
+    def track_job(self, job):
+        """Remember the scheduler job that cancel() should stop."""
+        self.current_job = job
+        if self.cancel_requested and job:
+            job.cancel()
+    
+    def cancel(self, reason="Cancelled"):
+        """Cancel the tracked job, or the next one if it has not been submitted yet.
+        
+        Returns:
+            bool: True if processing was running
+        """
+        if not self.processing:
+            return False
+        
+        self.cancel_requested = True
+        if self.current_job:
+            self.current_job.cancel(reason)
+        return True
+    
     def stop_timer(self):
         """Stop the processing timer and return elapsed time."""
         self.processing = False
-        if self.progress_update_thread and self.progress_update_thread.is_alive():
-            # Let the thread finish naturally
-            self.progress_update_thread.join(timeout=0.5)
+        self.current_job = None
         
         elapsed_time = time.time() - self.start_time
         return elapsed_time
     
-    def start_progress_updates(self, start_progress, end_progress, estimated_duration, text_provider):
-        """Start a thread to update progress periodically.
+    def report_progress(self, event, start_progress, end_progress, text_provider):
+        """Update progress from a progress event emitted by the transcription engine.
         
         Args:
-            start_progress: Starting progress value (0.0-1.0)
-            end_progress: Ending progress value (0.0-1.0)
-            estimated_duration: Estimated duration for the task in seconds
+            event: Progress event dict (see models.progress.ProgressMeter)
+            start_progress: Progress value at the start of decoding (0.0-1.0)
+            end_progress: Progress value when decoding is finished (0.0-1.0)
             text_provider: Function that returns text based on remaining time
         """
-        self.estimated_total_time = estimated_duration
-        
-        def update_progress_timer():
-            """Update the progress regularly during transcription."""
-            start_update_time = time.time()
-            
-            # Update every 0.1 seconds
-            update_interval = 0.1
-            last_progress = start_progress
-            
-            while self.processing and last_progress < end_progress:
-                elapsed = time.time() - start_update_time
-                # Calculate progress based on elapsed time
-                if estimated_duration > 0:
-                    progress_fraction = elapsed / estimated_duration
-                    current_progress = start_progress + progress_fraction * (end_progress - start_progress)
-                    # Limit progress to end_progress
-                    current_progress = min(current_progress, end_progress)
-                else:
-                    current_progress = min(last_progress + 0.01, end_progress)
-                
-                # Calculate remaining time
-                if progress_fraction > 0 and progress_fraction < 1:
-                    remaining_time = (estimated_duration - elapsed)
-                    self.update_progress(current_progress, text_provider(remaining_time))
-                
-                last_progress = current_progress
-                time.sleep(update_interval)
+        if not self.processing or event.get("fraction") is None:
+            return
         
-        self.progress_update_thread = threading.Thread(
-            target=update_progress_timer,
-            daemon=True
-        )
-        self.progress_update_thread.start()
+        current_progress = start_progress + event["fraction"] * (end_progress - start_progress)
         
-        return self.progress_update_thread
+        # Until the first chunk finishes only token throughput is known,
+        # so the prediction from past jobs is counted down instead
+        if event["eta_s"] is not None:
+            self.estimated_total_time = event["elapsed_s"] + event["eta_s"]
+            self.update_progress(current_progress, text_provider(event["eta_s"]))
+        elif self.prediction:
+            remaining = max(self.prediction["seconds"] - (time.time() - self.start_time), 0)
+            self.update_progress(current_progress, text_provider(remaining))
+        else:
+            self.update_progress(current_progress)
@@ -0,0 +1,196 @@
+"""
+Lightweight span tracing with Chrome trace export.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+class _NullSpan:
+    """Span returned while tracing is disabled; entering it does nothing."""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    """A running span; recorded when the block exits."""
+    
+    __slots__ = ("tracer", "name", "tags", "start")
+    
+    def __init__(self, tracer, name, tags):
+        self.tracer = tracer
+        self.name = name
+        self.tags = tags
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.tags["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.start, time.perf_counter(), **self.tags)
+        return False
+
+class Tracer:
+    """Record timed spans tagged with job id, file, model size and thread.
+    
+    Disabled by default: span() then returns a shared no-op context
+    manager, so instrumented code pays one attribute check. Tags set with
+    context() apply to every span recorded on the same thread inside the
+    block; current_tags() lets a job carry its submitter's tags over to
+    the worker thread.
+    """
+    
+    def __init__(self, max_events=200000):
+        """Initialize a disabled tracer.
+        
+        Args:
+            max_events: Spans kept at most; later spans are counted as dropped
+        """
+        self.enabled = False
+        self.max_events = max_events
+        self.dropped = 0
+        self._events = []
+        self._threads = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def enable(self):
+        """Start recording spans."""
+        self.enabled = True
+    
+    def disable(self):
+        """Stop recording spans (recorded ones are kept)."""
+        self.enabled = False
+    
+    def clear(self):
+        """Discard recorded spans."""
+        with self._lock:
+            self._events = []
+            self._threads = {}
+            self.dropped = 0
+    
+    def span(self, name, **tags):
+        """Time the enclosed block.
+        
+        Args:
+            name: Span name, e.g. "audio.decode"
+            **tags: Extra tags merged over the thread's context tags
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, tags)
+    
+    def current_tags(self):
+        """Get the context tags of the calling thread."""
+        return dict(getattr(self._local, "tags", {}))
+    
+    @contextmanager
+    def context(self, **tags):
+        """Apply tags to every span recorded on this thread inside the block."""
+        previous = getattr(self._local, "tags", {})
+        self._local.tags = dict(previous, **{key: value for key, value in tags.items() if value is not None})
+        try:
+            yield
+        finally:
+            self._local.tags = previous
+    
+    def record(self, name, start, end, **tags):
+        """Record a finished span.
+        
+        Args:
+            name: Span name
+            start: time.perf_counter() at the start
+            end: time.perf_counter() at the end
+            **tags: Extra tags merged over the thread's context tags
+        """
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        args = dict(getattr(self._local, "tags", {}), **tags)
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._threads[thread.ident] = thread.name
+            self._events.append((name, start, end, thread.ident, args))
+    
+    def to_chrome_trace(self):
+        """Build a Chrome trace (chrome://tracing, Perfetto) of the recorded spans.
+        
+        Returns:
+            dict: Trace Event Format document
+        """
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        
+        trace = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        for name, start, end, tid, args in events:
+            trace.append({
+                "name": name,
+                "cat": name.split(".")[0],
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": pid,
+                "tid": tid,
+                "args": args
+            })
+        return {"traceEvents": trace, "displayTimeUnit": "ms", "otherData": {"dropped": self.dropped}}
+    
+    def export_chrome_trace(self, path):
+        """Write the recorded spans as a Chrome trace JSON file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+    
+    def summary(self):
+        """Aggregate the recorded spans per name.
+        
+        Returns:
+            list: Dicts with name, count, total_s, mean_s and max_s,
+                  largest total first
+        """
+        totals = {}
+        with self._lock:
+            for name, start, end, _, _ in self._events:
+                entry = totals.setdefault(name, {"name": name, "count": 0, "total_s": 0.0, "max_s": 0.0})
+                entry["count"] += 1
+                entry["total_s"] += end - start
+                entry["max_s"] = max(entry["max_s"], end - start)
+        
+        rows = sorted(totals.values(), key=lambda entry: entry["total_s"], reverse=True)
+        for entry in rows:
+            entry["mean_s"] = entry["total_s"] / entry["count"]
+        return rows
+    
+    def format_summary(self):
+        """Format summary() as text lines."""
+        lines = [f"{'span':<28}{'count':>8}{'total [ms]':>12}{'mean [ms]':>12}{'max [ms]':>12}"]
+        for entry in self.summary():
+            lines.append(
+                f"{entry['name']:<28}{entry['count']:>8}{entry['total_s'] * 1000:>12.1f}"
+                f"{entry['mean_s'] * 1000:>12.2f}{entry['max_s'] * 1000:>12.1f}"
+            )
+        if self.dropped:
+            lines.append(f"({self.dropped} spans dropped beyond max_events)")
+        return lines
+
+# Process-wide tracer used by the instrumented modules
+tracer = Tracer()
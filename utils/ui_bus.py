@@ -0,0 +1,104 @@
+"""
+Thread-safe hand-over of UI updates to the Tk main loop.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from itertools import count
+
+class UIEventBus:
+    """Queue UI updates from any thread and apply them on the Tk main loop.
+    
+    Worker threads never touch widgets: they post callables, and the main
+    loop drains them every interval_ms via after(). Updates posted with a
+    key replace a pending update with the same key, so a burst of progress
+    events costs one repaint per drain. Calls posted without a key are all
+    applied, in order.
+    """
+    
+    def __init__(self, root, interval_ms=50, max_batch=200):
+        """Initialize the bus.
+        
+        Args:
+            root: Tk widget whose after() drives the draining
+            interval_ms: Milliseconds between drains (caps the repaint rate)
+            max_batch: Updates applied per drain; the rest wait for the next one
+        """
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_batch = max_batch
+        self.coalesced = 0
+        self._pending = OrderedDict()
+        self._ids = count()
+        self._lock = threading.Lock()
+        self._after_id = None
+    
+    def post(self, key, func, *args):
+        """Queue an update that supersedes any pending update with the same key.
+        
+        Args:
+            key: Update slot, e.g. "progress" or "status"
+            func: Callable run on the main loop
+            *args: Arguments for func
+        """
+        with self._lock:
+            if key in self._pending:
+                self.coalesced += 1
+                # The update moves to the end so it applies after earlier calls
+                del self._pending[key]
+            self._pending[key] = (func, args)
+    
+    def call(self, func, *args):
+        """Queue a call that is never merged with other updates.
+        
+        Args:
+            func: Callable run on the main loop
+            *args: Arguments for func
+        """
+        with self._lock:
+            self._pending[("call", next(self._ids))] = (func, args)
+    
+    def pending(self):
+        """Get the number of queued updates."""
+        with self._lock:
+            return len(self._pending)
+    
+    def start(self):
+        """Start draining on the main loop (call from the main thread)."""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._tick)
+    
+    def stop(self):
+        """Stop draining; queued updates are dropped."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        with self._lock:
+            self._pending.clear()
+    
+    def _tick(self):
+        """Drain, then schedule the next drain."""
+        try:
+            self.drain()
+        finally:
+            if self._after_id is not None:
+                self._after_id = self.root.after(self.interval_ms, self._tick)
+    
+    def drain(self):
+        """Apply queued updates on the calling (main) thread.
+        
+        Returns:
+            int: Number of updates applied
+        """
+        with self._lock:
+            batch = []
+            while self._pending and len(batch) < self.max_batch:
+                batch.append(self._pending.popitem(last=False)[1])
+        
+        for func, args in batch:
+            try:
+                func(*args)
+            except Exception:
+                # One failing update must not stop the others or the drain loop
+                self.root.report_callback_exception(*sys.exc_info())
+        return len(batch)